@@ -0,0 +1,190 @@
+"""
+Define a Barnes-Hut octree used to approximate potential steering forces at large populations.
+Source points are stored in an octree, every node remembers the centroid and the number of points under it. When a
+node is small compared with its distance to the pulled object (size / distance < theta), all its points are replaced
+by one point at the centroid weighted by the count. All targets walk down the tree together, so the traversal is done
+with numpy arrays instead of one Python loop per target.
+Run this file directly to benchmark the approximation against the exact sum.
+First version Created on 10/18/2026
+
+:author: Zack (Wanzhi Wang)
+:version: 2026.10.18
+"""
+import time
+import numpy as np
+
+from SpatialHashGrid import expandRanges
+
+
+class BarnesHutTree:
+    """
+    Octree over source points. Node 0 is the root.
+    """
+    leaf_size = 8  # int, nodes with no more points than this are not split
+    max_depth = 16  # int
+    points = None  # numpy.ndarray(n, 3), source points sorted so that points of every node are contiguous
+
+    node_lower = None  # numpy.ndarray(m, 3), lower corner of every node cube
+    node_size = None  # numpy.ndarray(m), edge length of every node cube
+    node_centroid = None  # numpy.ndarray(m, 3)
+    node_count = None  # numpy.ndarray(m)
+    node_start = None  # numpy.ndarray(m), first point of every node in points
+    node_children = None  # numpy.ndarray(m, 8), -1 for missing children, all -1 for leaves
+
+    def __init__(self, points, leaf_size=8, max_depth=16):
+        """
+        :param points: source points
+        :type points: numpy.ndarray(n, 3)
+        :param leaf_size: nodes with no more points than this are not split
+        :param max_depth: nodes at this depth are not split
+        """
+        self.leaf_size = leaf_size
+        self.max_depth = max_depth
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        lower = np.min(points, axis=0) if len(points) > 0 else np.zeros(3)
+        upper = np.max(points, axis=0) if len(points) > 0 else np.zeros(3)
+        size = max(float(np.max(upper - lower)), 1e-9)
+
+        self.points = points.copy()
+        lowers = []
+        sizes = []
+        centroids = []
+        counts = []
+        starts = []
+        children = []
+
+        # (node index, first point, end point, lower corner, size, depth)
+        stack = [(0, 0, len(points), lower, size, 0)]
+        lowers.append(lower)
+        sizes.append(size)
+        centroids.append(None)
+        counts.append(len(points))
+        starts.append(0)
+        children.append([-1] * 8)
+        while stack:
+            node, start, end, node_lower, node_size, depth = stack.pop()
+            chunk = self.points[start:end]
+            centroids[node] = np.mean(chunk, axis=0) if end > start else node_lower + node_size / 2
+            if end - start <= self.leaf_size or depth >= self.max_depth:
+                continue
+            half = node_size / 2
+            octant = np.sum((chunk >= node_lower + half) * np.array([4, 2, 1]), axis=1)
+            order = np.argsort(octant, kind="stable")
+            self.points[start:end] = chunk[order]
+            octant_count = np.bincount(octant, minlength=8)
+            first = start
+            for k in range(8):
+                if octant_count[k] == 0:
+                    continue
+                child = len(sizes)
+                child_lower = node_lower + half * np.array([(k >> 2) & 1, (k >> 1) & 1, k & 1])
+                lowers.append(child_lower)
+                sizes.append(half)
+                centroids.append(None)
+                counts.append(int(octant_count[k]))
+                starts.append(first)
+                children.append([-1] * 8)
+                children[node][k] = child
+                stack.append((child, first, first + int(octant_count[k]), child_lower, half, depth + 1))
+                first += int(octant_count[k])
+
+        self.node_lower = np.array(lowers).reshape(-1, 3)
+        self.node_size = np.array(sizes)
+        self.node_centroid = np.array(centroids).reshape(-1, 3)
+        self.node_count = np.array(counts)
+        self.node_start = np.array(starts)
+        self.node_children = np.array(children, dtype=np.int64).reshape(-1, 8)
+
+    def forces(self, targets, kernel, theta=0.5):
+        """
+        Approximate sum of kernel forces from all source points on every target
+
+        :param targets: positions of pulled objects
+        :type targets: numpy.ndarray(m, 3)
+        :param kernel: potential kernel, see PotentialField
+        :type kernel: Kernel
+        :param theta: opening angle, nodes with size / distance < theta are summarized by their centroid.
+            0 gives the exact sum
+        :type theta: float
+        :return: force on every target
+        :rtype: numpy.ndarray(m, 3)
+        """
+        targets = np.asarray(targets, dtype=float).reshape(-1, 3)
+        total = np.zeros((len(targets), 3))
+        if len(targets) == 0 or len(self.points) == 0:
+            return total
+        cutoff2 = kernel.cutoff * kernel.cutoff
+        is_leaf = np.all(self.node_children < 0, axis=1)
+
+        t = np.arange(len(targets))
+        node = np.zeros(len(targets), dtype=np.int64)
+        while len(t) > 0:
+            # skip nodes whose cube is entirely further than the cutoff
+            gap = np.clip(self.node_lower[node] - targets[t], 0, None) + \
+                np.clip(targets[t] - self.node_lower[node] - self.node_size[node, None], 0, None)
+            reachable = np.einsum("ij,ij->i", gap, gap) <= cutoff2
+            t = t[reachable]
+            node = node[reachable]
+
+            d = self.node_centroid[node] - targets[t]
+            dist2 = np.einsum("ij,ij->i", d, d)
+            size = self.node_size[node]
+            accept = (size * size < theta * theta * dist2) & (dist2 <= cutoff2)
+            if np.any(accept):
+                force = d[accept] * (self.node_count[node[accept]] * kernel.weight(dist2[accept]))[:, None]
+                for axis in range(3):
+                    total[:, axis] += np.bincount(t[accept], weights=force[:, axis], minlength=len(targets))
+
+            # leaves that are too close are summed exactly over their points
+            leaf = ~accept & is_leaf[node]
+            owner, index = expandRanges(t[leaf], self.node_start[node[leaf]], self.node_count[node[leaf]])
+            d = self.points[index] - targets[owner]
+            dist2 = np.einsum("ij,ij->i", d, d)
+            near = dist2 <= cutoff2
+            force = d[near] * kernel.weight(dist2[near])[:, None]
+            for axis in range(3):
+                total[:, axis] += np.bincount(owner[near], weights=force[:, axis], minlength=len(targets))
+
+            # open the other nodes
+            opened = ~accept & ~is_leaf[node]
+            child = self.node_children[node[opened]]
+            t = np.repeat(t[opened], 8)
+            node = child.reshape(-1)
+            exists = node >= 0
+            t = t[exists]
+            node = node[exists]
+        return total
+
+
+if __name__ == "__main__":
+    from PotentialField import GaussianKernel, InverseSquareKernel
+
+    # Benchmark: a few predators pulled by clustered prey in a large tank, Barnes-Hut against the exact sum
+    rng = np.random.default_rng(0)
+    cluster_centers = rng.uniform(-20, 20, (40, 3))
+    sources = (cluster_centers[rng.integers(0, 40, 20000)] + rng.normal(0, 1.5, (20000, 3)))
+    pulled = rng.uniform(-20, 20, (200, 3))
+
+    for kernel in [GaussianKernel(cutoff=3.0, width=2.0), InverseSquareKernel(cutoff=40.0)]:
+        t1 = time.time()
+        exact = np.zeros((len(pulled), 3))
+        for start in range(0, len(pulled), 10):
+            d = sources[None, :, :] - pulled[start:start + 10, None, :]
+            dist2 = np.einsum("ijk,ijk->ij", d, d)
+            w = np.where(dist2 <= kernel.cutoff ** 2, kernel.weight(dist2), 0)
+            exact[start:start + 10] = np.einsum("ij,ijk->ik", w, d)
+        exact_time = time.time() - t1
+
+        t1 = time.time()
+        tree = BarnesHutTree(sources)
+        build_time = time.time() - t1
+        print(type(kernel).__name__, "exact sum: %.3fs, tree build: %.3fs" % (exact_time, build_time))
+        scale = np.linalg.norm(exact, axis=1)
+        for theta in [0.0, 0.3, 0.5, 0.8, 1.2]:
+            t1 = time.time()
+            approx = tree.forces(pulled, kernel, theta)
+            spent = time.time() - t1
+            error = np.linalg.norm(approx - exact, axis=1)
+            relative = np.median(error[scale > 0] / scale[scale > 0]) if np.any(scale > 0) else 0.0
+            print("  theta %.1f: %.3fs, max abs error %.2e, median relative error %.2e"
+                  % (theta, spent, np.max(error), relative))
@@ -0,0 +1,92 @@
+"""
+Define a time sliced scheduler for steering decisions. Steering of a creature (potentials, flocking, pursuit,
+navigation) barely changes from one tick to the next, so every species can be given an update period: a creature only
+decides again every period ticks and keeps moving with its last decision in between. Creatures of a species are spread
+over the ticks in round-robin slices by their stable id, so every tick about 1 / period of them decide and the cost of
+a tick stays bounded. Creatures close to one of their predators are promoted and decide every tick.
+First version Created on 10/18/2026
+
+:author: Zack (Wanzhi Wang)
+:version: 2026.10.18
+"""
+import numpy as np
+
+from KDTree import KDTree
+
+
+class BehaviorRate:
+    """
+    How often creatures of one species decide
+    """
+    period = 1  # int, a creature decides every period ticks
+    threats = ()  # tuple<int>, species ids whose presence makes a creature decide every tick
+    threat_radius = 1.0  # float, creatures closer than this to a threat decide every tick
+
+    def __init__(self, period=1, threats=(), threat_radius=1.0):
+        self.period = max(1, int(period))
+        self.threats = tuple(threats)
+        self.threat_radius = threat_radius
+
+
+class BehaviorScheduler:
+    """
+    Table of update rates keyed by species id, species without a rate decide every tick
+    """
+    rates = None  # dict<int, BehaviorRate>
+    tick = 0  # int, number of ticks scheduled so far
+    decided = 0  # int, number of creatures that decided in the last tick
+    promoted = 0  # int, number of creatures that decided in the last tick only because a threat was close
+
+    def __init__(self):
+        self.rates = {}
+        self.tick = 0
+        self.decided = 0
+        self.promoted = 0
+
+    def setRate(self, species, rate):
+        """
+        :param species: species id
+        :param rate: how often it decides, None lets it decide every tick
+        :type rate: BehaviorRate
+        :return: None
+        """
+        if rate is None:
+            self.rates.pop(species, None)
+        else:
+            self.rates[species] = rate
+
+    def select(self, ids, species, positions):
+        """
+        Pick the creatures that decide in this tick and move on to the next tick
+
+        :param ids: stable id of every creature, used to spread creatures over the slices
+        :type ids: numpy.ndarray(n)
+        :param species: species id of every creature
+        :type species: numpy.ndarray(n)
+        :param positions: position of every creature
+        :type positions: numpy.ndarray(n, 3)
+        :return: bool mask of creatures that decide
+        :rtype: numpy.ndarray(n)
+        """
+        active = np.ones(len(ids), dtype=bool)
+        promoted = 0
+        for target, rate in self.rates.items():
+            if rate.period == 1:
+                continue
+            rows = np.flatnonzero(species == target)
+            if len(rows) == 0:
+                continue
+            due = (ids[rows] + self.tick) % rate.period == 0
+            if rate.threats:
+                threats = np.flatnonzero(np.isin(species, rate.threats))
+                if len(threats) > 0:
+                    waiting = rows[~due]
+                    found, _ = KDTree(positions[threats]).query(positions[waiting], 1, rate.threat_radius)
+                    near = found[:, 0] >= 0
+                    due[~due] = near
+                    promoted += int(np.count_nonzero(near))
+            active[rows] = due
+        self.tick += 1
+        self.decided = int(np.count_nonzero(active))
+        self.promoted = promoted
+        return active
@@ -0,0 +1,310 @@
+"""
+Define a dynamic bounding volume hierarchy (AABB tree) used as broadphase for bounding spheres of mixed radii.
+Every bounding sphere is wrapped in a fat axis aligned box, which is a little larger than the sphere. While an object
+stays inside its fat box nothing needs to be done; once it leaves, its leaf is taken out and inserted again, which
+refits all boxes above it. The tree is kept balanced with rotations, so insert and remove cost O(log N).
+Overlapping pairs of fat boxes are tracked incrementally, only leaves that moved are queried against the tree.
+First version Created on 10/18/2026
+
+:author: Zack (Wanzhi Wang)
+:version: 2026.10.18
+"""
+import numpy as np
+
+from Broadphase import Broadphase
+
+NULL_NODE = -1
+
+
+class BoundingVolumeHierarchy(Broadphase):
+    """
+    Dynamic AABB tree. Handles given to users are the leaf node indices, they stay valid until removed.
+    """
+    margin = 0.1  # float, how much fat boxes are larger than the sphere along every side
+    root = NULL_NODE  # int
+
+    boxes = None  # list<list<float>(6)>, box of every node as [min x, min y, min z, max x, max y, max z]
+    parent = None  # list<int>
+    child1 = None  # list<int>
+    child2 = None  # list<int>
+    height = None  # list<int>, leaf has height 0, free node has height -1
+    free_nodes = None  # list<int>
+
+    fat_boxes = None  # numpy.ndarray(capacity, 6), copy of boxes for vectorized escape tests
+    partners = None  # dict<int, set<int>>, leaves whose fat boxes overlap with a leaf
+    _pair_cache = None  # tuple of two numpy.ndarray, cached result of candidatePairs
+
+    def __init__(self, margin=0.1):
+        """
+        :param margin: extra space around every sphere, larger margin means less refits but more candidate pairs
+        :type margin: float
+        """
+        self.margin = margin
+        self.root = NULL_NODE
+        self.boxes = []
+        self.parent = []
+        self.child1 = []
+        self.child2 = []
+        self.height = []
+        self.free_nodes = []
+        self.fat_boxes = np.zeros((16, 6))
+        self.partners = {}
+        self._pair_cache = None
+
+    ################# Start of Broadphase interface
+    def insert(self, center, radius):
+        leaf = self._allocateNode()
+        self._setFatBox(leaf, center, radius)
+        self._insertLeaf(leaf)
+        self.partners[leaf] = set()
+        self._updatePartners(leaf)
+        return leaf
+
+    def remove(self, handle):
+        self._removeLeaf(handle)
+        for other in self.partners.pop(handle):
+            self.partners[other].discard(handle)
+        self._freeNode(handle)
+        self._pair_cache = None
+
+    def refit(self, handles, centers, radii):
+        handles = np.asarray(handles, dtype=np.int64)
+        if len(handles) == 0:
+            return
+        radii = np.asarray(radii, dtype=float)[:, None]
+        fat = self.fat_boxes[handles]
+        escaped = np.any(centers - radii < fat[:, :3], axis=1) | np.any(centers + radii > fat[:, 3:], axis=1)
+        moved = np.flatnonzero(escaped)
+        # refit all escaped leaves first, then find new partners with the final tree
+        for k in moved:
+            leaf = int(handles[k])
+            self._removeLeaf(leaf)
+            self._setFatBox(leaf, centers[k], radii[k, 0])
+            self._insertLeaf(leaf)
+        for k in moved:
+            self._updatePartners(int(handles[k]))
+
+    def candidatePairs(self):
+        if self._pair_cache is None:
+            first = []
+            second = []
+            for a, others in self.partners.items():
+                for b in others:
+                    if a < b:
+                        first.append(a)
+                        second.append(b)
+            self._pair_cache = (np.array(first, dtype=np.int64), np.array(second, dtype=np.int64))
+        return self._pair_cache
+
+    def query(self, lower, upper):
+        found = []
+        if self.root == NULL_NODE:
+            return found
+        box = [lower[0], lower[1], lower[2], upper[0], upper[1], upper[2]]
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if not _overlap(self.boxes[node], box):
+                continue
+            if self.child1[node] == NULL_NODE:
+                found.append(node)
+            else:
+                stack.append(self.child1[node])
+                stack.append(self.child2[node])
+        return found
+    ################# End of Broadphase interface
+
+    def _updatePartners(self, leaf):
+        """
+        Query the tree with the fat box of a leaf and update the pairs it takes part in
+        """
+        box = self.boxes[leaf]
+        found = set(self.query(box[:3], box[3:]))
+        found.discard(leaf)
+        old = self.partners[leaf]
+        for other in old - found:
+            self.partners[other].discard(leaf)
+        for other in found - old:
+            self.partners[other].add(leaf)
+        self.partners[leaf] = found
+        self._pair_cache = None
+
+    def _setFatBox(self, leaf, center, radius):
+        reach = radius + self.margin
+        box = [center[0] - reach, center[1] - reach, center[2] - reach,
+               center[0] + reach, center[1] + reach, center[2] + reach]
+        self.boxes[leaf] = [float(v) for v in box]
+        self.fat_boxes[leaf] = self.boxes[leaf]
+
+    def _allocateNode(self):
+        if self.free_nodes:
+            node = self.free_nodes.pop()
+        else:
+            node = len(self.boxes)
+            self.boxes.append(None)
+            self.parent.append(NULL_NODE)
+            self.child1.append(NULL_NODE)
+            self.child2.append(NULL_NODE)
+            self.height.append(0)
+            if node >= len(self.fat_boxes):
+                self.fat_boxes = np.concatenate((self.fat_boxes, np.zeros_like(self.fat_boxes)))
+        self.parent[node] = NULL_NODE
+        self.child1[node] = NULL_NODE
+        self.child2[node] = NULL_NODE
+        self.height[node] = 0
+        return node
+
+    def _freeNode(self, node):
+        self.height[node] = -1
+        self.free_nodes.append(node)
+
+    def _insertLeaf(self, leaf):
+        if self.root == NULL_NODE:
+            self.root = leaf
+            self.parent[leaf] = NULL_NODE
+            return
+
+        # Find the best sibling with surface area heuristic
+        leaf_box = self.boxes[leaf]
+        index = self.root
+        while self.child1[index] != NULL_NODE:
+            c1 = self.child1[index]
+            c2 = self.child2[index]
+            area = _perimeter(self.boxes[index])
+            combined_area = _perimeter(_union(self.boxes[index], leaf_box))
+            # cost of creating a new parent for this node and the new leaf
+            cost = 2 * combined_area
+            # minimum cost of pushing the leaf further down the tree
+            inheritance_cost = 2 * (combined_area - area)
+            cost1 = self._descendCost(c1, leaf_box) + inheritance_cost
+            cost2 = self._descendCost(c2, leaf_box) + inheritance_cost
+            if cost < cost1 and cost < cost2:
+                break
+            index = c1 if cost1 < cost2 else c2
+
+        # Create a new parent for the sibling and the leaf
+        sibling = index
+        old_parent = self.parent[sibling]
+        new_parent = self._allocateNode()
+        self.parent[new_parent] = old_parent
+        self.boxes[new_parent] = _union(leaf_box, self.boxes[sibling])
+        self.height[new_parent] = self.height[sibling] + 1
+        if old_parent != NULL_NODE:
+            if self.child1[old_parent] == sibling:
+                self.child1[old_parent] = new_parent
+            else:
+                self.child2[old_parent] = new_parent
+        else:
+            self.root = new_parent
+        self.child1[new_parent] = sibling
+        self.child2[new_parent] = leaf
+        self.parent[sibling] = new_parent
+        self.parent[leaf] = new_parent
+
+        self._fixUpwards(self.parent[leaf])
+
+    def _descendCost(self, node, leaf_box):
+        if self.child1[node] == NULL_NODE:
+            return _perimeter(_union(leaf_box, self.boxes[node]))
+        return _perimeter(_union(leaf_box, self.boxes[node])) - _perimeter(self.boxes[node])
+
+    def _removeLeaf(self, leaf):
+        if leaf == self.root:
+            self.root = NULL_NODE
+            return
+        parent = self.parent[leaf]
+        grand_parent = self.parent[parent]
+        sibling = self.child2[parent] if self.child1[parent] == leaf else self.child1[parent]
+        if grand_parent != NULL_NODE:
+            # Connect sibling to grand parent and destroy parent
+            if self.child1[grand_parent] == parent:
+                self.child1[grand_parent] = sibling
+            else:
+                self.child2[grand_parent] = sibling
+            self.parent[sibling] = grand_parent
+            self._freeNode(parent)
+            self._fixUpwards(grand_parent)
+        else:
+            self.root = sibling
+            self.parent[sibling] = NULL_NODE
+            self._freeNode(parent)
+        self.parent[leaf] = NULL_NODE
+
+    def _fixUpwards(self, index):
+        """
+        Walk back to the root, balance the tree and refit boxes and heights
+        """
+        while index != NULL_NODE:
+            index = self._balance(index)
+            c1 = self.child1[index]
+            c2 = self.child2[index]
+            self.height[index] = 1 + max(self.height[c1], self.height[c2])
+            self.boxes[index] = _union(self.boxes[c1], self.boxes[c2])
+            index = self.parent[index]
+
+    def _balance(self, a):
+        """
+        Perform a left or right rotation if node a is imbalanced
+
+        :return: the new root of the subtree
+        """
+        if self.child1[a] == NULL_NODE or self.height[a] < 2:
+            return a
+        b = self.child1[a]
+        c = self.child2[a]
+        balance = self.height[c] - self.height[b]
+        if balance > 1:
+            return self._rotateUp(a, c, b, 2)
+        if balance < -1:
+            return self._rotateUp(a, b, c, 1)
+        return a
+
+    def _rotateUp(self, a, up, other, slot):
+        """
+        Rotate child "up" of node a above a. slot tells which child of a "up" was (1 or 2)
+        """
+        f = self.child1[up]
+        g = self.child2[up]
+
+        # Swap a and up
+        self.child1[up] = a
+        self.parent[up] = self.parent[a]
+        self.parent[a] = up
+        if self.parent[up] != NULL_NODE:
+            if self.child1[self.parent[up]] == a:
+                self.child1[self.parent[up]] = up
+            else:
+                self.child2[self.parent[up]] = up
+        else:
+            self.root = up
+
+        # Keep the taller grandchild under "up", give the other one to a
+        if self.height[f] > self.height[g]:
+            keep, give = f, g
+        else:
+            keep, give = g, f
+        self.child2[up] = keep
+        if slot == 2:
+            self.child2[a] = give
+        else:
+            self.child1[a] = give
+        self.parent[give] = a
+        self.boxes[a] = _union(self.boxes[other], self.boxes[give])
+        self.boxes[up] = _union(self.boxes[a], self.boxes[keep])
+        self.height[a] = 1 + max(self.height[other], self.height[give])
+        self.height[up] = 1 + max(self.height[a], self.height[keep])
+        return up
+
+
+def _union(a, b):
+    return [min(a[0], b[0]), min(a[1], b[1]), min(a[2], b[2]),
+            max(a[3], b[3]), max(a[4], b[4]), max(a[5], b[5])]
+
+
+def _perimeter(box):
+    return 2 * ((box[3] - box[0]) + (box[4] - box[1]) + (box[5] - box[2]))
+
+
+def _overlap(a, b):
+    return (a[0] <= b[3] and b[0] <= a[3] and a[1] <= b[4] and b[1] <= a[4] and
+            a[2] <= b[5] and b[2] <= a[5])
@@ -0,0 +1,71 @@
+'''
+Define broadphase interface at here. A broadphase keeps the bounding spheres of all objects in the environment and
+reports candidate pairs that might collide, so exact sphere-sphere tests only run on a few pairs.
+Created on 10/18/2026
+
+:author: Zack (Wanzhi Wang)
+:version: 2026.10.18
+'''
+
+
+class Broadphase:
+    """
+    Interface for broadphase collision structures. Objects are identified by integer handles given by insert.
+    """
+    margin = 0.0  # float, extra space around every sphere, pairs up to 2 * margin apart are still reported
+
+    def insert(self, center, radius):
+        """
+        Add a bounding sphere
+
+        :param center: center of the bounding sphere
+        :type center: numpy.ndarray(3)
+        :param radius: radius of the bounding sphere
+        :type radius: float
+        :return: handle of the new proxy
+        :rtype: int
+        """
+        raise NotImplementedError("insert method not implemented yet")
+
+    def remove(self, handle):
+        """
+        Remove a bounding sphere
+
+        :param handle: handle returned by insert
+        :type handle: int
+        :return: None
+        """
+        raise NotImplementedError("remove method not implemented yet")
+
+    def refit(self, handles, centers, radii):
+        """
+        Called once per tick with the current bounding spheres of all proxies
+
+        :param handles: handle of every proxy
+        :type handles: numpy.ndarray(n)
+        :param centers: center of every bounding sphere
+        :type centers: numpy.ndarray(n, 3)
+        :param radii: radius of every bounding sphere
+        :type radii: numpy.ndarray(n)
+        :return: None
+        """
+        raise NotImplementedError("refit method not implemented yet")
+
+    def candidatePairs(self):
+        """
+        Pairs of proxies whose bounding volumes overlap, every pair is reported once
+
+        :return: two arrays of handles
+        """
+        raise NotImplementedError("candidatePairs method not implemented yet")
+
+    def query(self, lower, upper):
+        """
+        Find proxies whose bounding volumes overlap an axis aligned box
+
+        :param lower: lower corner of the box
+        :param upper: upper corner of the box
+        :return: handles of overlapping proxies
+        :rtype: list<int>
+        """
+        raise NotImplementedError("query method not implemented yet")
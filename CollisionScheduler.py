@@ -0,0 +1,174 @@
+"""
+Define an event driven collision scheduler. Instead of sweeping every listed pair each tick, the next wall hit of every
+object and the next contact begin/end of every pair are predicted from their linear motion and kept in a priority
+queue. Predictions stay valid as long as the velocities they were made with do not change, so every tick only objects
+whose velocity changed are predicted again, and collision work is only done for events that are due.
+Objects are identified by rows of a WorldState. Every row has a stamp that is raised whenever its predictions are
+redone, and events carrying an old stamp are dropped when they come out of the queue.
+First version Created on 10/18/2026
+
+:author: Zack (Wanzhi Wang)
+:version: 2026.10.18
+"""
+import heapq
+import numpy as np
+
+from ContinuousCollision import sweptSpheres, sweptWalls, separationTime
+from SpatialHashGrid import expandRanges
+
+# event kinds
+WALL = 0
+ENTER = 1
+EXIT = 2
+
+
+class CollisionScheduler:
+    """
+    Priority queue of predicted collision events, ordered by time in ticks
+    """
+    horizon = 50.0  # float, events further ahead than this many ticks are not queued, everything is predicted again
+    time = 0.0  # float, simulation time at the start of the current step
+    queue = None  # list, heap of (time, sequence, kind, row a, row b or wall axes, stamp a, stamp b)
+    sequence = 0  # int, breaks ties between events with the same time
+    stamps = None  # numpy.ndarray(n), version of the predictions of every row
+    velocities = None  # numpy.ndarray(n, 3), velocities the predictions of every row were made with
+    touched = None  # numpy.ndarray(n), bool, rows that had events and need new predictions
+    predicted_until = 0.0  # float, time when everything must be predicted again
+    builds = -1  # int, build count of the neighbor list the predictions were made from
+    processed = 0  # int, number of valid events handled so far
+
+    pair_i = None  # numpy.ndarray, rows of first objects of candidate pairs
+    pair_j = None  # numpy.ndarray, rows of second objects of candidate pairs
+    row_start = None  # numpy.ndarray(n), start of pairs of every row in row_pairs
+    row_count = None  # numpy.ndarray(n), number of pairs of every row
+    row_pairs = None  # numpy.ndarray, pair indices sorted by row
+
+    def __init__(self, horizon=50.0):
+        """
+        :param horizon: how many ticks ahead events are queued
+        :type horizon: float
+        """
+        self.horizon = horizon
+        self.time = 0.0
+        self.queue = []
+        self.sequence = 0
+        self.builds = -1
+        self.processed = 0
+
+    def reset(self, pair_i, pair_j, count):
+        """
+        Drop all events and take a new set of candidate pairs, e.g. after the neighbor list was rebuilt
+
+        :param pair_i: rows of first objects of candidate pairs
+        :param pair_j: rows of second objects of candidate pairs
+        :param count: number of rows
+        :return: None
+        """
+        self.queue = []
+        self.stamps = np.zeros(count, dtype=np.int64)
+        self.velocities = np.zeros((count, 3))
+        self.touched = np.zeros(count, dtype=bool)
+        self.pair_i = pair_i
+        self.pair_j = pair_j
+        rows = np.concatenate((pair_i, pair_j))
+        self.row_pairs = np.argsort(rows, kind="stable") % max(len(pair_i), 1)
+        self.row_count = np.bincount(rows, minlength=count)
+        self.row_start = np.cumsum(self.row_count) - self.row_count
+        self.predicted_until = self.time + self.horizon
+
+    def collect(self, neighbors, positions, velocities, radii, half, dt=1.0):
+        """
+        Predict events of rows whose velocity changed, then take all events due in this step out of the queue
+
+        :param neighbors: neighbor list covering all pairs that can touch in this step
+        :type neighbors: NeighborList
+        :param positions: positions of all rows at the start of the step
+        :param velocities: velocities of all rows for this step
+        :param radii: bounding radius of every row
+        :param half: half size of the tank
+        :param dt: length of the step in ticks
+        :return: due contact begins (i, j, time), due contact ends (i, j), and wall hits (time, axes) of every row.
+            Times are fractions of the step, inf for rows without a wall hit
+        """
+        n = len(positions)
+        if neighbors.builds != self.builds or self.stamps is None or len(self.stamps) != n or \
+                self.time >= self.predicted_until:
+            self.builds = neighbors.builds
+            self.reset(neighbors.pair_i, neighbors.pair_j, n)
+            changed = np.arange(n)
+        else:
+            changed = np.flatnonzero(np.any(velocities != self.velocities, axis=1) | self.touched)
+        self._predict(changed, positions, velocities, radii, half)
+        self.touched[:] = False
+        return self._popDue(n, dt)
+
+    def advance(self, dt=1.0):
+        """
+        Move the clock to the start of the next step
+        """
+        self.time += dt
+
+    def _predict(self, rows, positions, velocities, radii, half):
+        """
+        Raise stamps of rows and queue their next wall hit and contact events with all their candidate partners
+        """
+        if len(rows) == 0:
+            return
+        self.stamps[rows] += 1
+        self.velocities[rows] = velocities[rows]
+        limit = self.horizon
+
+        wall_time, walls = sweptWalls(positions[rows], velocities[rows], radii[rows], half, limit)
+        axes = walls @ np.array([1, 2, 4])
+        for row, t, bits in zip(rows[np.isfinite(wall_time)].tolist(), wall_time[np.isfinite(wall_time)].tolist(),
+                                axes[np.isfinite(wall_time)].tolist()):
+            self._push(t, WALL, row, bits, int(self.stamps[row]), -1)
+
+        _, index = expandRanges(rows, self.row_start[rows], self.row_count[rows])
+        pairs = np.unique(self.row_pairs[index])
+        i = self.pair_i[pairs]
+        j = self.pair_j[pairs]
+        d = positions[j] - positions[i]
+        dv = velocities[j] - velocities[i]
+        reach = radii[i] + radii[j]
+        enter = sweptSpheres(d, dv, reach, limit)
+        overlapping = enter == 0
+        leave = np.full(len(pairs), np.inf)
+        leave[overlapping] = separationTime(d[overlapping], dv[overlapping], reach[overlapping])
+        leave[leave > limit] = np.inf
+        stamp_i = self.stamps[i].tolist()
+        stamp_j = self.stamps[j].tolist()
+        for kind, times in ((ENTER, enter), (EXIT, leave)):
+            for k in np.flatnonzero(np.isfinite(times)).tolist():
+                self._push(float(times[k]), kind, int(i[k]), int(j[k]), stamp_i[k], stamp_j[k])
+
+    def _push(self, t, kind, a, b, stamp_a, stamp_b):
+        self.sequence += 1
+        heapq.heappush(self.queue, (self.time + t, self.sequence, kind, a, b, stamp_a, stamp_b))
+
+    def _popDue(self, n, dt):
+        wall_time = np.full(n, np.inf)
+        walls = np.zeros((n, 3), dtype=bool)
+        enters = []
+        exits = []
+        end = self.time + dt
+        while self.queue and self.queue[0][0] <= end:
+            t, _, kind, a, b, stamp_a, stamp_b = heapq.heappop(self.queue)
+            if stamp_a != self.stamps[a] or (kind != WALL and stamp_b != self.stamps[b]):
+                continue
+            self.processed += 1
+            fraction = max(t - self.time, 0.0) / dt
+            if kind == WALL:
+                if fraction < wall_time[a]:
+                    wall_time[a] = fraction
+                    walls[a] = [bool(b & 1), bool(b & 2), bool(b & 4)]
+                self.touched[a] = True
+            elif kind == ENTER:
+                enters.append((a, b, fraction))
+                self.touched[a] = self.touched[b] = True
+            else:
+                exits.append((a, b))
+        enter = np.array(enters, dtype=float).reshape(-1, 3)
+        leave = np.array(exits, dtype=np.int64).reshape(-1, 2)
+        return (enter[:, 0].astype(np.int64), enter[:, 1].astype(np.int64), enter[:, 2]), \
+            (leave[:, 0], leave[:, 1]), (wall_time, walls)
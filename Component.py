@@ -156,6 +156,34 @@ class Component:
         gl.glNewList(self.callListHandle, gl.GL_COMPILE)
         gl.glPushMatrix()
 
+        self.applyTransform()
+        self.drawDisplayable()
+
+        # Draw all children inside matrix push and pop will make children inherit translation and rotation
+        for c in self.children:
+            c.draw()
+
+        gl.glPopMatrix()
+        gl.glEndList()
+
+    def emit(self):
+        """
+        Issue the drawing of this component and all its children directly instead of through their display lists,
+        so that the current pose of the whole subtree can be recorded into one display list
+        :return: None
+        """
+        gl.glPushMatrix()
+        self.applyTransform()
+        self.drawDisplayable()
+        for c in self.children:
+            c.emit()
+        gl.glPopMatrix()
+
+    def applyTransform(self):
+        """
+        Multiply the current matrix with translation, rotation and scaling of this component
+        :return: None
+        """
         # translate and rotate to default_position we want
         gl.glTranslated(*self.current_position.getCoords())
         # last rotation before translation, can be used to control component's facing direction
@@ -170,20 +198,17 @@ class Component:
         # of it before all the following transformation
         gl.glMultMatrixf(self.pre_rotation_matrix)
 
-        # If this is a displayable component, draw it
+    def drawDisplayable(self):
+        """
+        If this is a displayable component, draw it with its current color
+        :return: None
+        """
         if isinstance(self.display_obj, Displayable):
             gl.glPushAttrib(gl.GL_CURRENT_BIT)
             gl.glColor3f(*self.current_color.getRGB())
             self.display_obj.draw()
             gl.glPopAttrib()
 
-        # Draw all children inside matrix push and pop will make children inherit translation and rotation
-        for c in self.children:
-            c.draw()
-
-        gl.glPopMatrix()
-        gl.glEndList()
-
     def rotate(self, degree, axis):
         """
         rotate along axis. axis should be one of this object's uAxis, vAxis, wAxis
@@ -0,0 +1,87 @@
+"""
+Define the contact solver stage of a tick. Every touching pair is resolved exactly once, in a deterministic order:
+earliest contact first, ties broken by the stable ids of the two objects. What happens to a pair is looked up in the
+species interaction table with boolean matrices, without branching per pair. Outcomes are collected into arrays first
+and written back to the world state in bulk, so the result does not depend on the order creatures are stored in, and
+every pair could later be resolved in parallel.
+First version Created on 10/18/2026
+
+:author: Zack (Wanzhi Wang)
+:version: 2026.10.18
+"""
+import numpy as np
+
+
+class ContactSolver:
+    """
+    Decide the outcome of all touching pairs of a tick from the species interaction table of the world: pairs of
+    species that bounce apart do so, and a creature eats an object it eats as soon as they start touching. An object
+    that has been eaten earlier in the tick neither eats nor bounces later.
+    """
+    bounce_i = None  # numpy.ndarray, rows of first creatures of bouncing pairs, in solving order
+    bounce_j = None  # numpy.ndarray, rows of second creatures of bouncing pairs
+    bounce_d = None  # numpy.ndarray(m, 3), positions[bounce_j] - positions[bounce_i]
+    bounce_dv = None  # numpy.ndarray(m, 3), relative motion of every bouncing pair during the step
+    bounce_toi = None  # numpy.ndarray(m), time of impact of every bouncing pair as a fraction of the step
+    eaters = None  # numpy.ndarray, rows of creatures that ate in the last tick, one entry per meal
+    eaten = None  # numpy.ndarray, rows eaten in the last tick, eaten[k] was eaten by eaters[k]
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """
+        Forget outcomes of the last tick
+        """
+        empty = np.zeros(0, dtype=np.int64)
+        self.bounce_i = self.bounce_j = empty
+        self.bounce_d = self.bounce_dv = np.zeros((0, 3))
+        self.bounce_toi = np.zeros(0)
+        self.eaters = self.eaten = empty
+
+    def solve(self, world, i, j, d, dv, toi, began):
+        """
+        Resolve all touching pairs of this tick and write eaten objects back to the world
+
+        :param world: world state the rows belong to, its interactions table decides the outcomes
+        :type world: WorldState
+        :param i: rows of first objects of touching pairs
+        :param j: rows of second objects of touching pairs
+        :param d: positions[j] - positions[i] of every pair
+        :param dv: relative motion of every pair during the step
+        :param toi: time of impact of every pair as a fraction of the step
+        :param began: bool mask of pairs that started touching in this tick
+        :return: None
+        """
+        ids = world.ids
+        species = world.species
+        alive = ~world.vanished[i] & ~world.vanished[j]
+        order = np.flatnonzero(alive)
+        order = order[np.lexsort((np.maximum(ids[i[order]], ids[j[order]]),
+                                  np.minimum(ids[i[order]], ids[j[order]]), toi[order]))]
+        i, j, d, dv, toi, began = i[order], j[order], d[order], dv[order], toi[order], began[order]
+        si = species[i]
+        sj = species[j]
+        size = max(world.interactions.speciesCount(), int(np.max(species[:world.count], initial=-1)) + 1)
+        eats = world.interactions.eatMatrix(size)
+        bounces = world.interactions.bounceMatrix(size)
+
+        # pairs are visited in solving order so nothing is eaten twice. If both species eat each other, i eats j
+        i_eats = eats[si, sj]
+        meals = np.flatnonzero(began & (i_eats | eats[sj, si]))
+        gone = set()
+        eaters = []
+        eaten = []
+        for eater, prey in zip(np.where(i_eats, i, j)[meals].tolist(), np.where(i_eats, j, i)[meals].tolist()):
+            if eater in gone or prey in gone:
+                continue
+            gone.add(prey)
+            eaters.append(eater)
+            eaten.append(prey)
+        self.eaters = np.array(eaters, dtype=np.int64)
+        self.eaten = np.array(eaten, dtype=np.int64)
+        world.vanished[self.eaten] = True
+
+        bounce = bounces[si, sj] & ~world.vanished[i] & ~world.vanished[j]
+        self.bounce_i, self.bounce_j = i[bounce], j[bounce]
+        self.bounce_d, self.bounce_dv, self.bounce_toi = d[bounce], dv[bounce], toi[bounce]
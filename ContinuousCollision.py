@@ -0,0 +1,85 @@
+"""
+Define swept-sphere time of impact tests used for continuous collision detection.
+Instead of testing whether bounding spheres overlap at the current positions, every sphere is swept along its motion
+of the whole tick and the fraction of the tick at which it first touches another sphere or a tank wall is solved for.
+Fast creatures and large time steps can then no longer tunnel through each other or through the walls.
+All functions work on arrays of pairs or objects at once.
+First version Created on 10/18/2026
+
+:author: Zack (Wanzhi Wang)
+:version: 2026.10.18
+"""
+import numpy as np
+
+
+def sweptSpheres(d, dv, reach, duration=1.0):
+    """
+    Time of impact of sphere pairs moving linearly: the smallest t in [0, duration] with |d + t * dv| = reach.
+
+    :param d: center of second sphere minus center of first sphere of every pair
+    :type d: numpy.ndarray(m, 3)
+    :param dv: velocity of second sphere minus velocity of first sphere of every pair
+    :type dv: numpy.ndarray(m, 3)
+    :param reach: sum of radii of every pair
+    :type reach: numpy.ndarray(m)
+    :param duration: length of the sweep in ticks
+    :type duration: float
+    :return: time of impact of every pair, 0 for pairs already overlapping, inf for pairs not touching
+    :rtype: numpy.ndarray(m)
+    """
+    a = np.einsum("ij,ij->i", dv, dv)
+    b = np.einsum("ij,ij->i", d, dv)
+    c = np.einsum("ij,ij->i", d, d) - reach * reach
+    disc = b * b - a * c
+    closing = (b < 0) & (a > 0) & (disc >= 0)
+    t = np.full(len(d), np.inf)
+    t[closing] = (-b[closing] - np.sqrt(disc[closing])) / a[closing]
+    t[c <= 0] = 0.0
+    t[t > duration] = np.inf
+    return t
+
+
+def sweptWalls(positions, velocities, radii, half, duration=1.0):
+    """
+    Time at which spheres moving linearly first touch a wall of an axis aligned box centered at origin.
+    Spheres already outside of a wall and moving further out touch it at 0.
+
+    :param positions: center of every sphere
+    :type positions: numpy.ndarray(n, 3)
+    :param velocities: velocity of every sphere
+    :type velocities: numpy.ndarray(n, 3)
+    :param radii: radius of every sphere
+    :type radii: numpy.ndarray(n)
+    :param half: half size of the box along x, y and z
+    :param duration: length of the sweep in ticks, a float or one per sphere
+    :return: time of impact of every sphere, inf if it touches no wall, and a bool mask (n, 3) of axes whose wall is
+        touched at that time
+    """
+    half = np.asarray(half, dtype=float)
+    limit = np.where(velocities > 0, half - radii[:, None], radii[:, None] - half)
+    # masked divide and putmask instead of boolean indexing, which copies all selected entries
+    axis_time = np.divide(limit - positions, velocities, out=np.full(positions.shape, np.inf), where=velocities != 0)
+    np.maximum(axis_time, 0.0, out=axis_time)
+    np.putmask(axis_time, axis_time > np.reshape(duration, (-1, 1)), np.inf)
+    t = np.min(axis_time, axis=1)
+    return t, (axis_time == t[:, None]) & np.isfinite(axis_time)
+
+
+def separationTime(d, dv, reach):
+    """
+    Time at which overlapping sphere pairs moving linearly stop overlapping: the larger t with |d + t * dv| = reach.
+
+    :param d: center of second sphere minus center of first sphere of every pair
+    :param dv: velocity of second sphere minus velocity of first sphere of every pair
+    :param reach: sum of radii of every pair
+    :return: separation time of every pair, inf for pairs that never separate (no relative motion)
+    :rtype: numpy.ndarray(m)
+    """
+    a = np.einsum("ij,ij->i", dv, dv)
+    b = np.einsum("ij,ij->i", d, dv)
+    c = np.einsum("ij,ij->i", d, d) - reach * reach
+    disc = np.maximum(b * b - a * c, 0.0)
+    t = np.full(len(d), np.inf)
+    moving = a > 0
+    t[moving] = np.maximum((-b[moving] + np.sqrt(disc[moving])) / a[moving], 0.0)
+    return t
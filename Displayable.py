@@ -12,6 +12,7 @@ class Displayable:
     """
     callListHandle = 0
     parent = None  # parent class, used for SetCurrent
+    bounding_sphere = None  # tuple, cached center and radius of the sphere enclosing the shape
 
     def __init__(self, parent):
         self.parent = parent
@@ -21,3 +22,20 @@ class Displayable:
 
     def initialize(self):
         raise NotImplementedError
+
+    def boundingSphere(self):
+        """
+        Sphere enclosing the shape in its own frame, scale included, computed once
+
+        :return: center and radius, None if the shape has no volume to collide with
+        :rtype: tuple
+        """
+        if self.bounding_sphere is None:
+            self.bounding_sphere = self.localBound()
+        return self.bounding_sphere
+
+    def localBound(self):
+        """
+        Compute the sphere returned by boundingSphere, shapes that can collide override this
+        """
+        return None
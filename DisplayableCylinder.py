@@ -96,3 +96,9 @@ class DisplayableCylinder(Displayable):
 
         gl.glPopMatrix()
         gl.glEndList()
+
+    def localBound(self):
+        # the cylinder grows from y = 0 down to y = -height
+        scale = np.asarray(self.scale, dtype=float)
+        center = scale * np.array([0, -self.height / 2, 0])
+        return center, np.hypot(self.radius, self.height / 2) * np.max(np.abs(scale))
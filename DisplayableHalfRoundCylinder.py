@@ -95,3 +95,9 @@ class DisplayableHalfRoundCylinder(Displayable):
 
         gl.glPopMatrix()
         gl.glEndList()
+
+    def localBound(self):
+        # the cylinder grows from y = 0 up to y = height with a ball on the top end
+        scale = np.asarray(self.scale, dtype=float)
+        center = scale * np.array([0, self.height / 2, 0])
+        return center, (self.height / 2 + self.radius) * np.max(np.abs(scale))
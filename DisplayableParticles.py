@@ -0,0 +1,64 @@
+'''
+An object which draws all pellets of a particle system with one batched draw call
+
+:author: Zack (Wanzhi Wang)
+:version: 2026.10.18
+'''
+import numpy as np
+
+try:
+    import OpenGL
+
+    try:
+        import OpenGL.GL as gl
+    except ImportError:
+        from ctypes import util
+
+        orig_util_find_library = util.find_library
+
+
+        def new_util_find_library(name):
+            res = orig_util_find_library(name)
+            if res:
+                return res
+            return '/System/Library/Frameworks/' + name + '.framework/' + name
+
+
+        util.find_library = new_util_find_library
+        import OpenGL.GL as gl
+except ImportError:
+    raise ImportError("Required dependency PyOpenGL not present")
+
+from Displayable import Displayable
+
+
+class DisplayableParticles(Displayable):
+    """
+    Draw every particle as a round point. Positions are handed to OpenGL as one vertex array, so the cost of a draw
+    does not grow with the number of Python objects but only with the number of points.
+    """
+    particles = None  # FoodParticles
+    point_size = 6.0  # float, size of a point in pixels
+
+    def __init__(self, parent, particles, point_size=6.0):
+        super().__init__(parent)
+        parent.context.SetCurrent(parent)
+        self.particles = particles
+        self.point_size = point_size
+
+    def draw(self):
+        n = self.particles.count
+        if n == 0:
+            return
+        gl.glPushAttrib(gl.GL_POINT_BIT | gl.GL_ENABLE_BIT)
+        gl.glEnable(gl.GL_POINT_SMOOTH)
+        gl.glPointSize(self.point_size)
+        gl.glEnableClientState(gl.GL_VERTEX_ARRAY)
+        gl.glVertexPointer(3, gl.GL_DOUBLE, 0, np.ascontiguousarray(self.particles.positions[:n]))
+        gl.glDrawArrays(gl.GL_POINTS, 0, n)
+        gl.glDisableClientState(gl.GL_VERTEX_ARRAY)
+        gl.glPopAttrib()
+
+    def initialize(self):
+        # nothing to precompute, positions change every tick
+        pass
@@ -85,3 +85,8 @@ class DisplayableSphere(Displayable):
 
         gl.glPopMatrix()
         gl.glEndList()
+
+    def localBound(self):
+        # sphere around the origin
+        scale = np.asarray(self.scale, dtype=float)
+        return np.zeros(3), self.radius * np.max(np.abs(scale))
@@ -0,0 +1,172 @@
+"""
+Define the entity registry of our Vivarium here. Every object in the tank gets a stable id and is kept in a pool of
+its type (creatures, food, static objects). Pools are dense lists with an index map, so membership tests are O(1)
+and an object is removed by moving the last entry into its slot (swap-remove) instead of shifting the whole list.
+Mass eat events then cost O(eaten) instead of O(eaten * N). Objects owning a run of rows in shared arrays (the joints
+or the parts of a creature) get their rows from a block pool that recycles released blocks the same way.
+First version Created on 10/18/2026
+
+:author: Zack (Wanzhi Wang)
+:version: 2026.10.18
+"""
+
+
+class EntityPool:
+    """
+    Dense list of objects with O(1) append, remove and membership. Removing an object changes the order of the
+    remaining ones, the last object takes the freed slot.
+    """
+    items = None  # list
+    slots = None  # dict<object, int>, position of every object in items
+
+    def __init__(self, items=()):
+        self.items = []
+        self.slots = {}
+        for item in items:
+            self.append(item)
+
+    def append(self, item):
+        if item in self.slots:
+            return
+        self.slots[item] = len(self.items)
+        self.items.append(item)
+
+    def remove(self, item):
+        """
+        Swap-remove an object, raises ValueError like list.remove if it is not in the pool
+        """
+        if item not in self.slots:
+            raise ValueError("object is not in this pool")
+        slot = self.slots.pop(item)
+        last = self.items.pop()
+        if last is not item:
+            self.items[slot] = last
+            self.slots[last] = slot
+
+    def clear(self):
+        self.items = []
+        self.slots = {}
+
+    def __contains__(self, item):
+        return item in self.slots
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+
+class BlockPool:
+    """
+    Ranges of slots in arrays shared by many objects, e.g. the joints of all creatures. A released block is handed to
+    the next object of the same size, other blocks are taken from the end, so adding or removing an object only
+    touches its own slots. Blocks of different sizes are never merged, creatures of one kind always have the same size.
+    """
+    end = 0  # int, slots before end have been handed out at least once
+    used = 0  # int, number of slots currently handed out
+    free = None  # dict<int, list<int>>, first slot of every released block keyed by its size
+
+    def __init__(self):
+        self.end = 0
+        self.used = 0
+        self.free = {}
+
+    def allocate(self, size):
+        """
+        :param size: number of slots
+        :type size: int
+        :return: first slot of the block, callers grow their arrays if it ends after their capacity
+        :rtype: int
+        """
+        self.used += size
+        starts = self.free.get(size)
+        if starts:
+            return starts.pop()
+        start = self.end
+        self.end += size
+        return start
+
+    def release(self, start, size):
+        """
+        :param start: first slot of a block given out by allocate
+        :param size: number of slots it was allocated with
+        :return: None
+        """
+        self.used -= size
+        if size > 0:
+            self.free.setdefault(size, []).append(start)
+
+    def clear(self):
+        self.end = 0
+        self.used = 0
+        self.free = {}
+
+
+class EntityRegistry:
+    """
+    Pools of objects keyed by type name, plus one pool of every registered object
+    """
+    everything = None  # EntityPool, all registered objects
+    pools = None  # dict<str, EntityPool>
+    kinds = None  # dict<object, str>, pool name of every registered object
+    entities = None  # dict<int, object>, object of every stable id
+    next_id = 0  # int, ids are never reused
+
+    def __init__(self, kinds=()):
+        """
+        :param kinds: pool names to create up front, other pools are created when first used
+        :type kinds: tuple<str>
+        """
+        self.everything = EntityPool()
+        self.pools = {kind: EntityPool() for kind in kinds}
+        self.kinds = {}
+        self.entities = {}
+        self.next_id = 0
+
+    def pool(self, kind):
+        """
+        :param kind: pool name
+        :return: pool of all objects of this kind, empty if nothing was added yet
+        :rtype: EntityPool
+        """
+        if kind not in self.pools:
+            self.pools[kind] = EntityPool()
+        return self.pools[kind]
+
+    def add(self, obj, kind):
+        """
+        Register an object and give it a stable id, stored in obj.entity_id
+
+        :param obj: object to register
+        :param kind: name of its pool
+        :type kind: str
+        :return: stable id of the object
+        :rtype: int
+        """
+        if obj in self.kinds:
+            return obj.entity_id
+        obj.entity_id = self.next_id
+        self.next_id += 1
+        self.entities[obj.entity_id] = obj
+        self.kinds[obj] = kind
+        self.pool(kind).append(obj)
+        self.everything.append(obj)
+        return obj.entity_id
+
+    def remove(self, obj):
+        """
+        Unregister an object, nothing happens if it is not registered
+        """
+        kind = self.kinds.pop(obj, None)
+        if kind is None:
+            return
+        self.pools[kind].remove(obj)
+        self.everything.remove(obj)
+        del self.entities[obj.entity_id]
+
+    def __contains__(self, obj):
+        return obj in self.kinds
@@ -0,0 +1,254 @@
+"""
+Define a precomputed environment field for influences that change slowly or never, like food resting on the floor,
+repulsion of walls and obstacles and water currents.
+Every source is baked into a 3D grid of steering vectors over the tank, one grid per affected species. When a source
+is added, moved or removed, only the grid nodes inside its region of influence are updated. Creatures sample the
+grids with trilinear interpolation, so steering costs the same for every creature no matter how many sources exist.
+First version Created on 10/18/2026
+
+:author: Zack (Wanzhi Wang)
+:version: 2026.10.18
+"""
+import numpy as np
+
+
+class FieldSource:
+    """
+    Interface of a baked influence. Subclasses implement bounds and evaluate.
+    """
+    targets = ()  # tuple<int>, species ids affected by this source
+
+    def bounds(self):
+        """
+        :return: lower and upper corner of the region this source influences, None for the whole tank
+        """
+        return None
+
+    def evaluate(self, points, target):
+        """
+        :param points: grid node positions
+        :type points: numpy.ndarray(m, 3)
+        :param target: species id of the steered creatures
+        :type target: int
+        :return: steering vector at every point
+        :rtype: numpy.ndarray(m, 3)
+        """
+        raise NotImplementedError("evaluate method not implemented yet")
+
+
+class PointSource(FieldSource):
+    """
+    A still object that pulls or pushes other species with potential kernels, e.g. food lying on the floor
+    """
+    center = None  # numpy.ndarray(3)
+    kernels = None  # dict<int, Kernel>, kernel used for every steered species
+
+    def __init__(self, center, kernels):
+        """
+        :param center: position of the source
+        :param kernels: potential kernel of every species reacting to this source, see PotentialField
+        :type kernels: dict<int, Kernel>
+        """
+        self.center = np.array(center, dtype=float)
+        self.kernels = dict(kernels)
+        self.targets = tuple(self.kernels)
+
+    def bounds(self):
+        reach = max([k.cutoff for k in self.kernels.values()], default=0.0)
+        return self.center - reach, self.center + reach
+
+    def evaluate(self, points, target):
+        kernel = self.kernels[target]
+        d = self.center - points
+        dist2 = np.einsum("ij,ij->i", d, d)
+        near = dist2 <= kernel.cutoff * kernel.cutoff
+        result = np.zeros_like(points)
+        result[near] = d[near] * kernel.weight(dist2[near])[:, None]
+        return result
+
+
+class UniformCurrent(FieldSource):
+    """
+    Water current with the same velocity everywhere inside a box
+    """
+    velocity = None  # numpy.ndarray(3)
+    lower = None  # numpy.ndarray(3)
+    upper = None  # numpy.ndarray(3)
+
+    def __init__(self, velocity, targets, lower=None, upper=None):
+        """
+        :param velocity: velocity added to creatures in the current
+        :param targets: species ids carried by the current
+        :type targets: tuple<int>
+        :param lower: lower corner of the current, None with upper None covers the whole tank
+        :param upper: upper corner of the current
+        """
+        self.velocity = np.array(velocity, dtype=float)
+        self.targets = tuple(targets)
+        self.lower = None if lower is None else np.array(lower, dtype=float)
+        self.upper = None if upper is None else np.array(upper, dtype=float)
+
+    def bounds(self):
+        if self.lower is None or self.upper is None:
+            return None
+        return self.lower, self.upper
+
+    def evaluate(self, points, target):
+        result = np.zeros_like(points)
+        inside = np.ones(len(points), dtype=bool)
+        if self.lower is not None and self.upper is not None:
+            inside = np.all((points >= self.lower) & (points <= self.upper), axis=1)
+        result[inside] = self.velocity
+        return result
+
+
+class EnvironmentField:
+    """
+    Grid of baked steering vectors over the tank, one grid per affected species.
+
+    Grid nodes lie on the tank walls and are at most resolution apart. Values between nodes are interpolated.
+    """
+    origin = None  # numpy.ndarray(3), lower corner of the tank
+    spacing = None  # numpy.ndarray(3), distance between neighboring nodes along every axis
+    dims = None  # numpy.ndarray(3), number of nodes along every axis
+    values = None  # dict<int, numpy.ndarray(nx, ny, nz, 3)>, baked vectors for every species
+    sources = None  # list<FieldSource>
+    baked_bounds = None  # dict<int, tuple>, node index range every source was baked into, keyed by id(source)
+
+    def __init__(self, tank_dimensions, resolution=0.1):
+        """
+        :param tank_dimensions: size of the tank along x, y and z. The tank is centered at origin
+        :type tank_dimensions: list
+        :param resolution: max distance between neighboring grid nodes
+        :type resolution: float
+        """
+        size = np.asarray(tank_dimensions, dtype=float)
+        self.origin = -size / 2
+        self.dims = np.maximum(2, np.ceil(size / resolution).astype(np.int64) + 1)
+        self.spacing = size / (self.dims - 1)
+        self.values = {}
+        self.sources = []
+        self.baked_bounds = {}
+
+    def addSource(self, source):
+        """
+        Bake a new source into the grids, only nodes inside its bounds are touched
+
+        :type source: FieldSource
+        :return: None
+        """
+        self.sources.append(source)
+        for target in source.targets:
+            if target not in self.values:
+                self.values[target] = np.zeros(tuple(self.dims) + (3,))
+        box = self._nodeRange(source.bounds())
+        self.baked_bounds[id(source)] = box
+        self._bake(source, box)
+
+    def removeSource(self, source):
+        """
+        Remove a source by subtracting its contribution from the nodes it was baked into
+
+        :type source: FieldSource
+        :return: None
+        """
+        self.sources.remove(source)
+        self._bake(source, self.baked_bounds.pop(id(source)), -1)
+
+    def updateSource(self, source, **changes):
+        """
+        Change attributes of a source, e.g. updateSource(food, center=position). Only nodes influenced by the source
+        before and after the change are touched.
+
+        :type source: FieldSource
+        :return: None
+        """
+        self.removeSource(source)
+        for name, value in changes.items():
+            setattr(source, name, value)
+        self.addSource(source)
+
+    def rebake(self):
+        """
+        Clear all grids and bake every source again, this removes rounding errors left by many removes
+        """
+        for grid in self.values.values():
+            grid[...] = 0
+        for source in self.sources:
+            self._bake(source, self.baked_bounds[id(source)])
+
+    def _nodeRange(self, bounds):
+        """
+        :param bounds: lower and upper corner in world space, None for the whole tank
+        :return: index ranges (start, stop) of nodes covering the box along x, y and z
+        """
+        if bounds is None:
+            return tuple((0, int(n)) for n in self.dims)
+        lower = np.floor((np.asarray(bounds[0]) - self.origin) / self.spacing).astype(np.int64)
+        upper = np.ceil((np.asarray(bounds[1]) - self.origin) / self.spacing).astype(np.int64) + 1
+        lower = np.clip(lower, 0, self.dims)
+        upper = np.clip(upper, 0, self.dims)
+        return tuple((int(lower[k]), int(upper[k])) for k in range(3))
+
+    def _nodePositions(self, box):
+        axes = [self.origin[k] + np.arange(box[k][0], box[k][1]) * self.spacing[k] for k in range(3)]
+        return np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1)
+
+    def _bake(self, source, box, sign=1):
+        """
+        Add (sign 1) or subtract (sign -1) contribution of one source to the nodes in box
+        """
+        if any(start >= stop for start, stop in box):
+            return
+        nodes = self._nodePositions(box)
+        shape = nodes.shape
+        region = tuple(slice(start, stop) for start, stop in box)
+        for target in source.targets:
+            self.values[target][region] += sign * source.evaluate(nodes.reshape(-1, 3), target).reshape(shape)
+
+    def sample(self, points, species):
+        """
+        Interpolate the baked vectors at all points, every point uses the grid of its species
+
+        :param points: positions of creatures
+        :type points: numpy.ndarray(n, 3)
+        :param species: species id of every creature
+        :type species: numpy.ndarray(n)
+        :return: steering vector of every creature, zero for species without a grid
+        :rtype: numpy.ndarray(n, 3)
+        """
+        result = np.zeros((len(points), 3))
+        for target, grid in self.values.items():
+            rows = np.flatnonzero(species == target)
+            if len(rows) > 0:
+                result[rows] = self._trilinear(grid, points[rows])
+        return result
+
+    def _trilinear(self, grid, points):
+        return trilinear(grid, self.origin, self.spacing, points)
+
+
+def trilinear(grid, origin, spacing, points):
+    """
+    Interpolate values stored at the nodes of a regular grid, points outside of the grid use its border values
+
+    :param grid: values at the nodes, any number of components per node
+    :type grid: numpy.ndarray(nx, ny, nz, c)
+    :param origin: position of node (0, 0, 0)
+    :param spacing: distance between neighboring nodes along every axis
+    :param points: positions to interpolate at
+    :type points: numpy.ndarray(n, 3)
+    :return: interpolated values
+    :rtype: numpy.ndarray(n, c)
+    """
+    dims = np.array(grid.shape[:3])
+    f = np.clip((points - origin) / spacing, 0, dims - 1)
+    base = np.clip(np.floor(f).astype(np.int64), 0, np.maximum(dims - 2, 0))
+    t = f - base
+    result = np.zeros((len(points),) + grid.shape[3:])
+    for corner in range(8):
+        offset = np.array([(corner >> 2) & 1, (corner >> 1) & 1, corner & 1])
+        weight = np.prod(np.where(offset, t, 1 - t), axis=1)
+        index = np.minimum(base + offset, dims - 1)
+        result += weight[:, None] * grid[index[:, 0], index[:, 1], index[:, 2]]
+    return result
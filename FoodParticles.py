@@ -0,0 +1,230 @@
+"""
+Define a particle system for food pellets. Instead of one Component with its own child, sphere and display list per
+pellet, positions and velocities of all pellets are rows of numpy arrays. Sinking and coming to rest on the tank floor
+are done on whole arrays, and "eaten by the first creature that touches it" is resolved with one batched query of a
+spatial hash grid over all pellets. Rendering draws all pellets at once, see DisplayableParticles.
+Thousands of pellets then cost a few array operations per tick instead of thousands of scene graph nodes.
+First version Created on 10/18/2026
+
+:author: Zack (Wanzhi Wang)
+:version: 2026.10.18
+"""
+import numpy as np
+
+from SpatialHashGrid import SpatialHashGrid
+from ContinuousCollision import sweptSpheres
+from BarnesHut import BarnesHutTree
+
+
+class FoodParticles:
+    """
+    Pellets of one species stored in packed rows, only the first count rows are in use. Eaten pellets are removed and
+    the remaining ones are packed again, so indices of other pellets may change.
+    """
+    tank_dimensions = None  # list<float>(3)
+    species = 0  # int, species id pellets have in the species interaction table
+    radius = 0.1  # float, bounding radius of every pellet
+    sink_speed = 0.006  # float, distance a pellet sinks every tick
+    count = 0  # int, number of pellets
+    capacity = 0  # int, number of rows allocated
+    version = 0  # int, raised whenever pellets were added, moved or removed, renderers redraw only if it changed
+    theta = 0.5  # float, opening angle of the Barnes-Hut tree creatures are attracted to pellets with
+    tree_tolerance = 0.1  # float, the tree is rebuilt once a pellet sank further than this since it was built
+    tree_eaten = 0.05  # float, the tree is rebuilt once this fraction of the pellets in it has been eaten
+
+    positions = None  # numpy.ndarray(capacity, 3)
+    velocities = None  # numpy.ndarray(capacity, 3)
+    resting = None  # numpy.ndarray(capacity), bool, pellets lying on the floor, they are not moved any more
+    eaters = None  # numpy.ndarray, index of the eater of every pellet eaten in the last call of eat
+    eaten = None  # int, number of pellets eaten in the last call of eat
+
+    def __init__(self, tank_dimensions, species=0, radius=0.1, sink_speed=0.006, capacity=256):
+        """
+        :param tank_dimensions: size of the tank along x, y and z. The tank is centered at origin
+        :type tank_dimensions: list
+        :param species: species id of pellets, decides which creatures eat them and are attracted to them
+        :type species: int
+        :param radius: bounding radius of every pellet
+        :type radius: float
+        :param sink_speed: distance a pellet sinks every tick
+        :type sink_speed: float
+        :param capacity: initial number of rows to allocate, arrays grow automatically
+        :type capacity: int
+        """
+        self.tank_dimensions = tank_dimensions
+        self.species = species
+        self.radius = radius
+        self.sink_speed = sink_speed
+        self.count = 0
+        self.capacity = 0
+        self.version = 0
+        self.eaters = np.zeros(0, dtype=np.int64)
+        self.eaten = 0
+        self._tree = None
+        self._tree_drift = 0.0
+        self._tree_removed = 0
+        self._allocate(max(1, capacity))
+
+    def _allocate(self, capacity):
+        n = self.count
+        positions = np.zeros((capacity, 3))
+        velocities = np.zeros((capacity, 3))
+        resting = np.zeros(capacity, dtype=bool)
+        if n > 0:
+            positions[:n] = self.positions[:n]
+            velocities[:n] = self.velocities[:n]
+            resting[:n] = self.resting[:n]
+        self.positions = positions
+        self.velocities = velocities
+        self.resting = resting
+        self.capacity = capacity
+
+    def spawn(self, points):
+        """
+        Add pellets that start sinking from the given points
+
+        :param points: start position of every new pellet
+        :type points: numpy.ndarray(m, 3)
+        :return: None
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        m = len(points)
+        if m == 0:
+            return
+        if self.count + m > self.capacity:
+            self._allocate(max(2 * self.capacity, self.count + m))
+        rows = slice(self.count, self.count + m)
+        self.positions[rows] = points
+        self.velocities[rows] = (0, -self.sink_speed, 0)
+        self.resting[rows] = False
+        self.count += m
+        self.version += 1
+        self._tree = None
+
+    def rain(self, count, height=1.8, rng=None):
+        """
+        Drop pellets at random spots of a horizontal plane near the tank top
+
+        :param count: number of pellets
+        :type count: int
+        :param height: height the pellets start from
+        :type height: float
+        :param rng: random generator, numpy default generator if not given
+        :type rng: numpy.random.Generator
+        :return: None
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        half = np.asarray(self.tank_dimensions, dtype=float) / 2 - self.radius
+        points = rng.uniform(-half, half, (count, 3))
+        points[:, 1] = min(height, half[1])
+        self.spawn(points)
+
+    def clear(self):
+        """
+        Remove all pellets
+        """
+        self.count = 0
+        self.version += 1
+        self._tree = None
+
+    def tree(self):
+        """
+        Attraction toward pellets does not need exact pellet positions, so like a neighbor list skin the tree is kept
+        while pellets sink and get eaten. It is rebuilt after pellets were added, once pellets sank further than
+        tree_tolerance, or once a tree_eaten fraction of its pellets is gone.
+
+        :return: Barnes-Hut octree over all pellets
+        :rtype: BarnesHutTree
+        """
+        if self._tree is not None and (self._tree_drift > self.tree_tolerance or
+                                       self._tree_removed > self.tree_eaten * len(self._tree.points)):
+            self._tree = None
+        if self._tree is None:
+            self._tree = BarnesHutTree(self.positions[:self.count])
+            self._tree_drift = 0.0
+            self._tree_removed = 0
+        return self._tree
+
+    def step(self, dt=1.0, geometry=None):
+        """
+        Let all pellets that are not resting sink, pellets reaching a wall stop moving along its axis and pellets
+        that stopped moving rest from then on
+
+        :param dt: length of the step in ticks
+        :param geometry: obstacles in the tank, pellets landing on one slide down along its surface
+        :type geometry: SignedDistanceField
+        :return: None
+        """
+        moving = np.flatnonzero(~self.resting[:self.count])
+        if len(moving) == 0:
+            return
+        limit = np.asarray(self.tank_dimensions, dtype=float) / 2 - self.radius
+        pos = self.positions[moving] + self.velocities[moving] * dt
+        vel = self.velocities[moving]
+        self._tree_drift += float(np.sqrt(np.max(np.einsum("ij,ij->i", vel, vel)))) * dt
+        outside = np.abs(pos) >= limit
+        vel[outside] = 0
+        pos = np.clip(pos, -limit, limit)
+        if geometry is not None and geometry.obstacles:
+            geometry.collide(pos, vel, np.full(len(moving), self.radius), np.zeros(len(moving), dtype=bool))
+        self.positions[moving] = pos
+        self.velocities[moving] = vel
+        self.resting[moving] = ~np.any(vel, axis=1)
+        self.version += 1
+
+    def eat(self, positions, motions, radii):
+        """
+        Remove every pellet touched by one of the given eaters during their motion of this step. A pellet touched by
+        several eaters goes to the one touching it first, ties go to the lower eater index.
+
+        :param positions: positions of eaters at the start of the step
+        :type positions: numpy.ndarray(m, 3)
+        :param motions: motion of every eater during the step
+        :type motions: numpy.ndarray(m, 3)
+        :param radii: bounding radius of every eater
+        :type radii: numpy.ndarray(m)
+        :return: index of the eater of every pellet that got eaten
+        :rtype: numpy.ndarray
+        """
+        self.eaters = np.zeros(0, dtype=np.int64)
+        self.eaten = 0
+        n = self.count
+        if n == 0 or len(positions) == 0:
+            return self.eaters
+        # pellets move slowly, their own motion is added to the reach instead of being swept
+        drift = self.sink_speed * float(not np.all(self.resting[:n]))
+        reach = float(np.max(radii)) + self.radius + drift + float(np.max(np.linalg.norm(motions, axis=1)))
+        grid = SpatialHashGrid(self.tank_dimensions, max(reach, 1e-6))
+        grid.build(self.positions[:n])
+        eater, pellet = grid.queryBatch(positions, reach)
+        if len(eater) == 0:
+            return self.eaters
+        d = self.positions[pellet] - positions[eater]
+        toi = sweptSpheres(d, -motions[eater], radii[eater] + self.radius + drift)
+        touching = np.isfinite(toi)
+        eater, pellet, toi = eater[touching], pellet[touching], toi[touching]
+        order = np.lexsort((eater, toi, pellet))
+        eater, pellet = eater[order], pellet[order]
+        first = np.ones(len(pellet), dtype=bool)
+        first[1:] = pellet[1:] != pellet[:-1]
+        self.eaters = eater[first]
+        self.eaten = len(self.eaters)
+        self._remove(pellet[first])
+        return self.eaters
+
+    def _remove(self, rows):
+        """
+        Remove pellets by rows and pack the remaining ones
+        """
+        if len(rows) == 0:
+            return
+        n = self.count
+        keep = np.ones(n, dtype=bool)
+        keep[rows] = False
+        m = int(np.count_nonzero(keep))
+        self.positions[:m] = self.positions[:n][keep]
+        self.velocities[:m] = self.velocities[:n][keep]
+        self.resting[:m] = self.resting[:n][keep]
+        self.count = m
+        self.version += 1
+        self._tree_removed += len(rows)
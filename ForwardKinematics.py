@@ -0,0 +1,246 @@
+"""
+Define a batched forward kinematics engine for Component trees. Component.update only builds the transform of a node
+inside the OpenGL matrix stack, so the position of a hand or a hook is never known to Python. Here the trees of all
+creatures are flattened into one array of nodes with the index of their parent, local transforms of all nodes are
+built from the same translation, rotations and scaling Component.applyTransform uses, and world transforms are
+chained level by level, all nodes of one depth at once.
+Matrices map points of a node frame into the frame the root lives in (the tank for creatures) as
+matrix @ (x, y, z, 1), they are the transpose of what OpenGL holds after the node's glMultMatrixf calls. Nodes are only
+recomputed once marked dirty, together with everything below them. The nodes of a tree get one block of slots from a
+BlockPool, so adding or removing a creature only writes its own nodes and node indices of other trees never change.
+First version Created on 10/18/2026
+
+:author: Zack (Wanzhi Wang)
+:version: 2026.10.18
+"""
+import numpy as np
+
+from EntityRegistry import BlockPool
+
+
+def rotationMatrices(axes, degrees):
+    """
+    Rotations about arbitrary axes like glRotated, counterclockwise when looking against the axis
+
+    :param axes: rotation axis of every matrix, need not be normalized
+    :type axes: numpy.ndarray(m, 3)
+    :param degrees: rotation angle of every matrix
+    :type degrees: numpy.ndarray(m)
+    :return: rotation matrices
+    :rtype: numpy.ndarray(m, 3, 3)
+    """
+    length = np.linalg.norm(axes, axis=1, keepdims=True)
+    k = np.divide(axes, length, out=np.zeros_like(axes, dtype=float), where=length > 0)
+    theta = np.radians(degrees)
+    c = np.cos(theta)[:, None, None]
+    s = np.sin(theta)[:, None, None]
+    cross = np.zeros((len(k), 3, 3))
+    cross[:, 0, 1], cross[:, 0, 2], cross[:, 1, 2] = -k[:, 2], k[:, 1], -k[:, 0]
+    cross[:, 1, 0], cross[:, 2, 0], cross[:, 2, 1] = k[:, 2], -k[:, 1], k[:, 0]
+    return c * np.identity(3) + s * cross + (1 - c) * k[:, :, None] * k[:, None, :]
+
+
+class ForwardKinematics:
+    """
+    Local and world transforms of every node of every added Component tree. Nodes of one tree are stored next to each
+    other with the root first and parents before their children. Free slots have no component and depth -1.
+    """
+    nodes = None  # list<Component>, component of every node, None in free slots
+    parents = None  # numpy.ndarray(capacity), node index of the parent of every node, -1 for roots
+    depths = None  # numpy.ndarray(capacity), number of ancestors of every node, -1 in free slots
+    tree_ids = None  # numpy.ndarray(capacity), id of the tree every node belongs to, -1 in free slots
+    local = None  # numpy.ndarray(capacity, 4, 4), transform from every node frame into its parent frame
+    world = None  # numpy.ndarray(capacity, 4, 4), transform from every node frame into the frame of its root's parent
+    dirty = None  # numpy.ndarray(capacity), bool, nodes whose local transform must be rebuilt in the next refresh
+    index = None  # dict<int, int>, node index keyed by id of its component
+    sizes = None  # dict<int, int>, number of nodes of every tree keyed by node index of its root
+    pool = None  # BlockPool, node slots of every tree
+    next_id = 0  # int
+    version = 0  # int, raised whenever world transforms were recomputed
+    layout = 0  # int, raised whenever trees were added or removed, slots of removed trees may be reused
+
+    def __init__(self, capacity=64):
+        """
+        :param capacity: number of nodes to allocate for up front
+        :type capacity: int
+        """
+        self.nodes = [None] * capacity
+        self.parents = np.full(capacity, -1, dtype=np.int64)
+        self.depths = np.full(capacity, -1, dtype=np.int64)
+        self.tree_ids = np.full(capacity, -1, dtype=np.int64)
+        self.local = np.tile(np.identity(4), (capacity, 1, 1))
+        self.world = np.tile(np.identity(4), (capacity, 1, 1))
+        self.dirty = np.zeros(capacity, dtype=bool)
+        self.index = {}
+        self.sizes = {}
+        self.pool = BlockPool()
+        self.next_id = 0
+        self.version = 0
+        self.layout = 0
+
+    def __len__(self):
+        return self.pool.used
+
+    def __contains__(self, component):
+        return id(component) in self.index
+
+    def add(self, root):
+        """
+        Flatten the tree below a component into nodes, all of them start dirty
+
+        :param root: root of the tree, e.g. a creature
+        :type root: Component
+        :return: node index of the root
+        :rtype: int
+        """
+        if root in self:
+            raise ValueError("component already has forward kinematics")
+        nodes = [root]
+        parents = [-1]
+        depths = [0]
+        k = 0
+        while k < len(nodes):
+            for c in nodes[k].children:
+                nodes.append(c)
+                parents.append(k)
+                depths.append(depths[k] + 1)
+            k += 1
+        m = len(nodes)
+        start = self.pool.allocate(m)
+        if start + m > len(self.nodes):
+            self._grow(start + m)
+        block = slice(start, start + m)
+        self.nodes[block] = nodes
+        self.parents[block] = parents
+        self.parents[start + 1:start + m] += start
+        self.depths[block] = depths
+        self.tree_ids[block] = self.next_id
+        self.local[block] = np.identity(4)
+        self.world[block] = np.identity(4)
+        self.dirty[block] = True
+        for k, c in enumerate(nodes):
+            self.index[id(c)] = start + k
+        self.sizes[start] = m
+        self.next_id += 1
+        self.layout += 1
+        return start
+
+    def remove(self, root):
+        """
+        Drop all nodes of the tree of a root added before
+
+        :param root: root of the tree
+        :type root: Component
+        :return: None
+        """
+        if root not in self:
+            raise ValueError("component has no forward kinematics")
+        start = self.index[id(root)]
+        if start not in self.sizes:
+            raise ValueError("component is not the root of its tree")
+        m = self.sizes.pop(start)
+        block = slice(start, start + m)
+        for c in self.nodes[block]:
+            del self.index[id(c)]
+        self.nodes[block] = [None] * m
+        self.parents[block] = -1
+        self.depths[block] = -1
+        self.tree_ids[block] = -1
+        self.dirty[block] = False
+        self.pool.release(start, m)
+        self.layout += 1
+
+    def markDirty(self, components):
+        """
+        Mark components whose translation, rotation or scaling changed, e.g. moving creatures or swinging joints.
+        Components without forward kinematics are ignored.
+
+        :param components: changed components
+        :type components: list<Component>
+        :return: None
+        """
+        rows = [self.index[id(c)] for c in components if id(c) in self.index]
+        self.dirty[rows] = True
+
+    def refresh(self):
+        """
+        Rebuild local transforms of dirty nodes and world transforms of dirty nodes and everything below them
+
+        :return: None
+        """
+        rows = np.flatnonzero(self.dirty)
+        if len(rows) == 0:
+            return
+        self.local[rows] = self._localTransforms([self.nodes[k] for k in rows.tolist()])
+        changed = self.dirty.copy()
+        self.dirty[:] = False
+        self.version += 1
+        for depth in range(int(self.depths.max()) + 1):
+            level = np.flatnonzero(self.depths == depth)
+            if depth > 0:
+                changed[level] |= changed[self.parents[level]]
+            level = level[changed[level]]
+            if len(level) == 0:
+                continue
+            if depth == 0:
+                self.world[level] = self.local[level]
+            else:
+                self.world[level] = self.world[self.parents[level]] @ self.local[level]
+
+    def worldMatrix(self, component):
+        """
+        :param component: component with forward kinematics, call refresh first
+        :return: transform from its frame into the frame of its root's parent
+        :rtype: numpy.ndarray(4, 4)
+        """
+        return self.world[self.index[id(component)]]
+
+    def worldPositions(self, components):
+        """
+        :param components: components with forward kinematics, call refresh first
+        :return: origin of every component frame in the frame of its root's parent
+        :rtype: numpy.ndarray(n, 3)
+        """
+        rows = [self.index[id(c)] for c in components]
+        return self.world[rows, :3, 3]
+
+    def _grow(self, size):
+        """
+        Double the capacity until size nodes fit
+        """
+        capacity = max(len(self.nodes), 1)
+        while capacity < size:
+            capacity *= 2
+        extra = capacity - len(self.nodes)
+        self.nodes.extend([None] * extra)
+        self.parents = np.concatenate((self.parents, np.full(extra, -1, dtype=np.int64)))
+        self.depths = np.concatenate((self.depths, np.full(extra, -1, dtype=np.int64)))
+        self.tree_ids = np.concatenate((self.tree_ids, np.full(extra, -1, dtype=np.int64)))
+        self.local = np.concatenate((self.local, np.tile(np.identity(4), (extra, 1, 1))))
+        self.world = np.concatenate((self.world, np.tile(np.identity(4), (extra, 1, 1))))
+        self.dirty = np.concatenate((self.dirty, np.zeros(extra, dtype=bool)))
+
+    @staticmethod
+    def _localTransforms(components):
+        """
+        Batched version of Component.applyTransform: translate, post rotation, rotations about u, v and w, scale and
+        pre rotation
+        """
+        m = len(components)
+        offsets = np.array([c.current_position.getCoords() for c in components], dtype=float).reshape(m, 3)
+        post = np.array([c.post_rotation_matrix for c in components], dtype=float).reshape(m, 4, 4)
+        pre = np.array([c.pre_rotation_matrix for c in components], dtype=float).reshape(m, 4, 4)
+        axes = np.array([(c.uAxis, c.vAxis, c.wAxis) for c in components], dtype=float).reshape(m, 3, 3)
+        angles = np.array([(c.uAngle, c.vAngle, c.wAngle) for c in components], dtype=float).reshape(m, 3)
+        scales = np.array([c.current_scale for c in components], dtype=float).reshape(m, 3)
+
+        result = np.tile(np.identity(4), (m, 1, 1))
+        result[:, :3, 3] = offsets
+        # OpenGL reads the row major numpy matrices given to glMultMatrixf as column major, i.e. transposed
+        result = result @ np.transpose(post, (0, 2, 1))
+        rotation = np.tile(np.identity(4), (m, 1, 1))
+        for k in range(3):
+            rotation[:, :3, :3] = rotationMatrices(axes[:, k], angles[:, k])
+            result = result @ rotation
+        result[:, :, :3] *= scales[:, None, :]
+        return result @ np.transpose(pre, (0, 2, 1))
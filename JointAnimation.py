@@ -0,0 +1,122 @@
+"""
+Define the joint animation engine of our creatures. Every animated joint swings around its u axis between two limits
+and turns around once it reaches one of them. Instead of rotating the joints of every creature one by one through
+Component.rotate, angles, speeds and limits of all joints of all creatures are kept in numpy arrays and advanced
+together in one vectorized step per tick. The new angles are then written back to the uAngle of every joint, where
+Component.update reads them as before.
+First version Created on 10/18/2026
+
+:author: Zack (Wanzhi Wang)
+:version: 2026.10.18
+"""
+import numpy as np
+
+from EntityRegistry import BlockPool
+
+
+class JointAnimator:
+    """
+    Angles, speeds and limits of all animated joints. Joints of one creature are kept next to each other in a block
+    from a BlockPool, the block of a removed creature is reused by the next one and the arrays double when they run
+    out, so adding or removing a creature only touches its own joints. Free slots hold no joint, never move and have
+    no limits.
+    """
+    angles = None  # numpy.ndarray(capacity), current u angle of every joint, in degrees
+    speeds = None  # numpy.ndarray(capacity), degrees added to the angle every tick, the sign flips at the limits
+    lower = None  # numpy.ndarray(capacity), lower limit of every joint
+    upper = None  # numpy.ndarray(capacity), upper limit of every joint
+    joints = None  # list<Component>, component of every joint, None in free slots
+    pool = None  # BlockPool, slots of the joints of every creature
+    blocks = None  # dict<int, tuple<int, int>>, first slot and number of joints keyed by joint_id of their creature
+    next_id = 0  # int
+
+    def __init__(self, capacity=64):
+        """
+        :param capacity: number of joints to allocate for up front
+        :type capacity: int
+        """
+        self.angles = np.zeros(capacity)
+        self.speeds = np.zeros(capacity)
+        self.lower = np.full(capacity, -np.inf)
+        self.upper = np.full(capacity, np.inf)
+        self.joints = [None] * capacity
+        self.pool = BlockPool()
+        self.blocks = {}
+        self.next_id = 0
+
+    def __len__(self):
+        return self.pool.used
+
+    def add(self, owner, joints, speeds):
+        """
+        Take over the joint animation of a creature. Its joints start from their current angles and limits.
+
+        :param owner: creature the joints belong to, it is bound to this animator
+        :param joints: components swinging around their u axis
+        :type joints: list<Component>
+        :param speeds: degrees every joint turns per tick
+        :type speeds: list<float>
+        :return: None
+        """
+        if owner.joint_animator is not None:
+            raise ValueError("joints of this object are already animated")
+        owner.joint_animator = self
+        owner.joint_id = self.next_id
+        self.next_id += 1
+        m = len(joints)
+        start = self.pool.allocate(m)
+        if start + m > len(self.joints):
+            self._grow(start + m)
+        block = slice(start, start + m)
+        self.angles[block] = [comp.uAngle for comp in joints]
+        self.speeds[block] = speeds
+        self.lower[block] = [comp.uRange[0] for comp in joints]
+        self.upper[block] = [comp.uRange[1] for comp in joints]
+        self.joints[block] = joints
+        self.blocks[owner.joint_id] = (start, m)
+
+    def remove(self, owner):
+        """
+        Stop animating the joints of a creature, they keep their last angles
+
+        :param owner: creature added before
+        :return: None
+        """
+        if owner.joint_animator is not self:
+            raise ValueError("joints of this object are not animated here")
+        start, m = self.blocks.pop(owner.joint_id)
+        block = slice(start, start + m)
+        self.speeds[block] = 0
+        self.lower[block] = -np.inf
+        self.upper[block] = np.inf
+        self.joints[block] = [None] * m
+        self.pool.release(start, m)
+        owner.joint_animator = None
+        owner.joint_id = -1
+
+    def _grow(self, size):
+        """
+        Double the capacity until size joints fit
+        """
+        capacity = max(len(self.joints), 1)
+        while capacity < size:
+            capacity *= 2
+        extra = capacity - len(self.joints)
+        self.angles = np.concatenate((self.angles, np.zeros(extra)))
+        self.speeds = np.concatenate((self.speeds, np.zeros(extra)))
+        self.lower = np.concatenate((self.lower, np.full(extra, -np.inf)))
+        self.upper = np.concatenate((self.upper, np.full(extra, np.inf)))
+        self.joints.extend([None] * extra)
+
+    def step(self):
+        """
+        Turn every joint by its speed, clamp it to its limits and let joints that reached a limit swing back
+
+        :return: None
+        """
+        self.angles = np.clip(self.angles + self.speeds, self.lower, self.upper)
+        turned = (self.angles == self.lower) | (self.angles == self.upper)
+        self.speeds[turned] *= -1
+        for comp, angle in zip(self.joints, self.angles.tolist()):
+            if comp is not None:
+                comp.uAngle = angle
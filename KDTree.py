@@ -0,0 +1,222 @@
+"""
+Define a KD-tree used for nearest target queries, e.g. predators looking for the prey closest to them.
+Points are split at the median of the widest axis of their bounding box until a node holds no more than leaf_size
+points. Every node keeps the tight bounding box of its points, so whole subtrees are skipped once they are further
+away than the current k-th nearest point. All queries walk down the tree together with numpy arrays instead of one
+Python loop per query, like the Barnes-Hut tree does.
+Run this file directly to benchmark it against brute force.
+First version Created on 10/18/2026
+
+:author: Zack (Wanzhi Wang)
+:version: 2026.10.18
+"""
+import time
+import numpy as np
+
+from SpatialHashGrid import expandRanges
+
+
+class KDTree:
+    """
+    KD-tree over a set of points. Node 0 is the root. Indices returned by queries are indices into the points given to
+    the constructor.
+    """
+    leaf_size = 16  # int, nodes with no more points than this are not split
+    points = None  # numpy.ndarray(n, 3), points sorted so that points of every node are contiguous
+    index = None  # numpy.ndarray(n), original index of every sorted point
+
+    node_lower = None  # numpy.ndarray(m, 3), lower corner of the bounding box of every node
+    node_upper = None  # numpy.ndarray(m, 3), upper corner of the bounding box of every node
+    node_start = None  # numpy.ndarray(m), first point of every node in points
+    node_count = None  # numpy.ndarray(m), number of points under every node
+    node_left = None  # numpy.ndarray(m), left child of every node, -1 for leaves
+    node_right = None  # numpy.ndarray(m), right child of every node, -1 for leaves
+
+    def __init__(self, points, leaf_size=16):
+        """
+        :param points: points to store
+        :type points: numpy.ndarray(n, 3)
+        :param leaf_size: nodes with no more points than this are not split
+        :type leaf_size: int
+        """
+        self.leaf_size = max(1, leaf_size)
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        self.points = points.copy()
+        self.index = np.arange(len(points))
+        lowers = []
+        uppers = []
+        starts = []
+        counts = []
+        lefts = []
+        rights = []
+
+        # (node index, first point, end point)
+        stack = [(0, 0, len(points))]
+        for values in (lowers, uppers, starts, counts, lefts, rights):
+            values.append(None)
+        while stack:
+            node, start, end = stack.pop()
+            chunk = self.points[start:end]
+            lower = np.min(chunk, axis=0) if end > start else np.zeros(3)
+            upper = np.max(chunk, axis=0) if end > start else np.zeros(3)
+            lowers[node], uppers[node], starts[node], counts[node] = lower, upper, start, end - start
+            lefts[node] = rights[node] = -1
+            if end - start <= self.leaf_size:
+                continue
+            axis = int(np.argmax(upper - lower))
+            middle = (end - start) // 2
+            order = np.argpartition(chunk[:, axis], middle)
+            self.points[start:end] = chunk[order]
+            self.index[start:end] = self.index[start:end][order]
+            for values in (lowers, uppers, starts, counts, lefts, rights):
+                values += [None, None]
+            lefts[node] = len(starts) - 2
+            rights[node] = len(starts) - 1
+            stack.append((lefts[node], start, start + middle))
+            stack.append((rights[node], start + middle, end))
+
+        self.node_lower = np.array(lowers).reshape(-1, 3)
+        self.node_upper = np.array(uppers).reshape(-1, 3)
+        self.node_start = np.array(starts, dtype=np.int64)
+        self.node_count = np.array(counts, dtype=np.int64)
+        self.node_left = np.array(lefts, dtype=np.int64)
+        self.node_right = np.array(rights, dtype=np.int64)
+
+    def _boxDistance2(self, node, points):
+        """
+        Squared distance from every point to the bounding box of its node
+        """
+        gap = np.clip(self.node_lower[node] - points, 0, None) + np.clip(points - self.node_upper[node], 0, None)
+        return np.einsum("ij,ij->i", gap, gap)
+
+    def query(self, points, k=1, max_distance=np.inf):
+        """
+        Find the k nearest stored points of every query point
+
+        :param points: query points
+        :type points: numpy.ndarray(m, 3)
+        :param k: number of neighbors
+        :type k: int
+        :param max_distance: stored points further away than this are never returned
+        :type max_distance: float
+        :return: indices (m, k) of neighbors sorted by distance, -1 where fewer than k points are in reach, and their
+            squared distances (m, k), inf where there is no neighbor
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        m = len(points)
+        best = np.full((m, k), -1, dtype=np.int64)
+        best_dist2 = np.full((m, k), np.inf)
+        if m == 0 or k <= 0 or len(self.points) == 0:
+            return best, best_dist2
+        limit = np.full(m, float(max_distance) ** 2)
+
+        # descend to the leaf of every query first, its points give a good bound for pruning the rest of the tree
+        q = np.arange(m)
+        node = np.zeros(m, dtype=np.int64)
+        inner = np.flatnonzero(self.node_left[node] >= 0)
+        while len(inner) > 0:
+            left = self.node_left[node[inner]]
+            right = self.node_right[node[inner]]
+            go_left = self._boxDistance2(left, points[inner]) <= self._boxDistance2(right, points[inner])
+            node[inner] = np.where(go_left, left, right)
+            inner = inner[self.node_left[node[inner]] >= 0]
+        best, best_dist2 = self._merge(best, best_dist2, q, node, points, limit)
+        visited = node
+
+        # then visit all nodes closer than the current k-th neighbor, level by level
+        node = np.zeros(m, dtype=np.int64)
+        while len(q) > 0:
+            bound = np.minimum(best_dist2[q, -1], limit[q])
+            near = self._boxDistance2(node, points[q]) <= bound
+            q, node = q[near], node[near]
+            leaf = self.node_left[node] < 0
+            fresh = leaf & (node != visited[q])
+            best, best_dist2 = self._merge(best, best_dist2, q[fresh], node[fresh], points, limit)
+            opened = ~leaf
+            q = np.repeat(q[opened], 2)
+            node = np.stack((self.node_left[node[opened]], self.node_right[node[opened]]), axis=1).reshape(-1)
+        return best, best_dist2
+
+    def _merge(self, best, best_dist2, q, node, points, limit):
+        """
+        Merge points of leaves into the k nearest neighbors found so far of their queries
+        """
+        if len(q) == 0:
+            return best, best_dist2
+        m, k = best.shape
+        owner, position = expandRanges(q, self.node_start[node], self.node_count[node])
+        d = self.points[position] - points[owner]
+        dist2 = np.einsum("ij,ij->i", d, d)
+        keep = dist2 <= limit[owner]
+        owner, position, dist2 = owner[keep], position[keep], dist2[keep]
+
+        known = np.flatnonzero(best[:, 0] >= 0)
+        known_rows, known_slots = np.nonzero(best[known] >= 0)
+        owner = np.concatenate((known[known_rows], owner))
+        found = np.concatenate((best[known][known_rows, known_slots], self.index[position]))
+        dist2 = np.concatenate((best_dist2[known][known_rows, known_slots], dist2))
+        order = np.lexsort((dist2, owner))
+        owner, found, dist2 = owner[order], found[order], dist2[order]
+        group_start = np.searchsorted(owner, owner)
+        rank = np.arange(len(owner)) - group_start
+        top = rank < k
+        best = np.full((m, k), -1, dtype=np.int64)
+        best_dist2 = np.full((m, k), np.inf)
+        best[owner[top], rank[top]] = found[top]
+        best_dist2[owner[top], rank[top]] = dist2[top]
+        return best, best_dist2
+
+    def queryBatch(self, points, radius):
+        """
+        Find all stored points within radius of every query point
+
+        :param points: query points
+        :type points: numpy.ndarray(m, 3)
+        :param radius: query radius
+        :type radius: float
+        :return: two arrays, index of the query point and index of the stored point of every match
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        if len(points) == 0 or len(self.points) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        radius2 = radius * radius
+        q = np.arange(len(points))
+        node = np.zeros(len(points), dtype=np.int64)
+        owners = []
+        found = []
+        while len(q) > 0:
+            near = self._boxDistance2(node, points[q]) <= radius2
+            q, node = q[near], node[near]
+            leaf = self.node_left[node] < 0
+            owner, position = expandRanges(q[leaf], self.node_start[node[leaf]], self.node_count[node[leaf]])
+            d = self.points[position] - points[owner]
+            inside = np.einsum("ij,ij->i", d, d) <= radius2
+            owners.append(owner[inside])
+            found.append(self.index[position[inside]])
+            opened = ~leaf
+            q = np.repeat(q[opened], 2)
+            node = np.stack((self.node_left[node[opened]], self.node_right[node[opened]]), axis=1).reshape(-1)
+        return np.concatenate(owners), np.concatenate(found)
+
+
+if __name__ == "__main__":
+    # Benchmark: nearest prey of many predators, KD-tree against brute force
+    rng = np.random.default_rng(0)
+    prey = rng.uniform(-20, 20, (20000, 3))
+    predators = rng.uniform(-20, 20, (500, 3))
+    k = 8
+
+    t1 = time.time()
+    d2 = np.einsum("ijk,ijk->ij", prey[None] - predators[:, None], prey[None] - predators[:, None])
+    exact = np.sort(d2, axis=1)[:, :k]
+    t2 = time.time()
+    tree = KDTree(prey)
+    t3 = time.time()
+    _, found = tree.query(predators, k)
+    t4 = time.time()
+    print("brute force %.3fs, build %.3fs, query %.3fs, max error %g" % (t2 - t1, t3 - t2, t4 - t3,
+                                                                         np.max(np.abs(found - exact))))
+    t5 = time.time()
+    q, i = tree.queryBatch(predators, 2.0)
+    t6 = time.time()
+    print("radius query %.3fs, %d pairs, brute force %d pairs" % (t6 - t5, len(q), np.count_nonzero(d2 <= 4.0)))
@@ -0,0 +1,96 @@
+"""
+Define the lifecycle event queue of our Vivarium here. Objects being eaten, spawned or despawned during a tick are not
+added to or removed from the scene right away. Their events are recorded and applied together at the end of the tick,
+so the scene graph is changed in one batch and refreshed once, no matter how many objects came and went.
+First version Created on 10/18/2026
+
+:author: Zack (Wanzhi Wang)
+:version: 2026.10.18
+"""
+
+# event kinds
+EATEN = "eaten"
+SPAWNED = "spawned"
+DESPAWNED = "despawned"
+
+
+class LifecycleEvent:
+    """
+    One recorded change of the set of objects in the scene
+    """
+    kind = None  # str, EATEN, SPAWNED or DESPAWNED
+    obj = None  # object the event is about
+    cause = None  # object that caused the event, e.g. the eater of an EATEN event, or None
+
+    def __init__(self, kind, obj, cause=None):
+        self.kind = kind
+        self.obj = obj
+        self.cause = cause
+
+
+class LifecycleQueue:
+    """
+    Events recorded in the current tick, in the order they happened
+    """
+    events = None  # list<LifecycleEvent>
+
+    def __init__(self):
+        self.events = []
+
+    def push(self, kind, obj, cause=None):
+        """
+        Record an event, it takes effect when the queue is flushed
+
+        :param kind: EATEN, SPAWNED or DESPAWNED
+        :type kind: str
+        :param obj: object the event is about
+        :param cause: object that caused the event
+        :return: None
+        """
+        self.events.append(LifecycleEvent(kind, obj, cause))
+
+    def eaten(self, obj, eater=None):
+        self.push(EATEN, obj, eater)
+
+    def spawned(self, obj):
+        self.push(SPAWNED, obj)
+
+    def despawned(self, obj):
+        self.push(DESPAWNED, obj)
+
+    def __len__(self):
+        return len(self.events)
+
+    def flush(self, spawn, despawn):
+        """
+        Apply all recorded events in order and empty the queue. An object is removed at most once, even if it was
+        both eaten and despawned in the same tick.
+
+        :param spawn: called with every spawned object to add it to the scene
+        :type spawn: function
+        :param despawn: called with every eaten or despawned object to remove it from the scene
+        :type despawn: function
+        :return: events that were applied
+        :rtype: list<LifecycleEvent>
+        """
+        events = self.events
+        self.events = []
+        applied = []
+        alive = set()
+        removed = set()
+        for event in events:
+            key = id(event.obj)
+            if event.kind == SPAWNED:
+                if key in alive:
+                    continue
+                alive.add(key)
+                removed.discard(key)
+                spawn(event.obj)
+            else:
+                if key in removed:
+                    continue
+                removed.add(key)
+                alive.discard(key)
+                despawn(event.obj)
+            applied.append(event)
+        return applied
@@ -6,7 +6,7 @@ First version at 09/28/2021
 :version: 2021.11.09
 """
 import random
-import math
+import numpy as np
 
 from Component import Component
 from Point import Point
@@ -14,11 +14,12 @@ import ColorType as Ct
 from Displayable import Displayable
 from Animation import Animation
 from EnvironmentObject import EnvironmentObject
-from Vivarium import Tank
+from WorldState import WorldRowView
 from DisplayableSphere import DisplayableSphere
 from DisplayableHalfRoundCylinder import DisplayableHalfRoundCylinder
 from DisplayableCylinder import DisplayableCylinder
 from DisplayableRoundCylinder import DisplayableRoundCylinder
+from DisplayableParticles import DisplayableParticles
 
 try:
     import OpenGL
@@ -353,17 +354,24 @@ class DisplayableCube(Displayable):
         gl.glPopMatrix()
         gl.glEndList()
 
-class Predator(Component, Animation, EnvironmentObject):
+    def localBound(self):
+        # the cube sits on z = 0 and grows along z, a box fits a stretched cube much tighter than scaling a sphere
+        scale = np.asarray(self.scale, dtype=float)
+        half = np.abs(scale) * self.edgeLength / 2
+        return scale * np.array([0, 0, self.edgeLength / 2]), float(np.linalg.norm(half))
+
+
+class Predator(WorldRowView, Component, Animation, EnvironmentObject):
     """
     Define a predator object (hook)
     """
     components = None
     rotation_speed = None
-    translation_speed = None
+    joint_animator = None  # JointAnimator, if given it swings the joints of all creatures together
+    joint_id = -1  # int, id of this creature in joint_animator
+    pose_atlas = None  # PoseAtlas, if given the model is drawn from display lists cached per pose
+    pose_archetype = None  # tuple, creatures with the same archetype look the same in the same pose
     up_vector = Point((0, 1, 0))
-    local_n_vector = None
-    local_v_vector = None
-    local_u_vector = None
 
     def __init__(self, parent, position):
         super(Predator, self).__init__(position)
@@ -382,79 +390,44 @@ class Predator(Component, Animation, EnvironmentObject):
             self.rotation_speed.append([1, 0, 0])
 
         self.translation_speed = Point([0, 0, 0])
+        self.cruise_speed = 0.01
         self.bound_center = Point((0, 0, 0))
         self.bound_radius = 0.2
         self.species_id = 2
+        self.pose_archetype = ("Predator",)
         self.initialize()
 
-    def animationUpdate(self):
-        # create period animation for creature joints
-        for i, comp in enumerate(self.components):
-            comp.rotate(self.rotation_speed[i][0], comp.uAxis)
-            if comp.uAngle in comp.uRange:  # rotation reached the limit
-                self.rotation_speed[i][0] *= -1
-
-        for item in self.env_obj_list:
-            # Collision detection (tank)
-            if isinstance(item, Tank):
-                if not (item.tank_dimensions[0] / 2 - self.bound_radius) > (
-                        self.current_position[0] + self.translation_speed[0]) > (
-                               -item.tank_dimensions[0] / 2 + self.bound_radius):
-                    self.translation_speed.coords[0] *= -1
-                if not (item.tank_dimensions[1] / 2 - self.bound_radius > self.current_position[1] +
-                        self.translation_speed[1] > -item.tank_dimensions[1] / 2 + self.bound_radius):
-                    self.translation_speed.coords[1] *= -1
-                if not (item.tank_dimensions[2] / 2 - self.bound_radius > self.current_position[2] +
-                        self.translation_speed[2] > -item.tank_dimensions[2] / 2 + self.bound_radius):
-                    self.translation_speed.coords[2] *= -1
-
-            # Moving direction
-            elif isinstance(item, EnvironmentObject):
-                if item.species_id == 1:
-                    # Apply Gaussian potential
-                    self.translation_speed += (item.current_position - self.current_position) * math.exp(
-                        -1*pow((item.current_position - self.current_position).norm(), 2))
-                elif item.species_id == 0:
-                    self.translation_speed += (item.current_position - self.current_position) * math.exp(
-                        -1*pow((item.current_position - self.current_position).norm(), 2))
-
-            # Collision detection (creature)
-            if isinstance(item, EnvironmentObject):
-                # If item is a predator, bounce back.
-                if item.species_id == 2 and item != self:
-                    if (item.current_position - self.current_position).norm() <= (
-                            item.bound_radius + self.bound_radius):
-                        self.translation_speed.reflect = self.translation_speed.reflect(
-                            item.current_position - self.current_position)
-
-        self.local_n_vector = self.translation_speed.normalize()
-        self.local_v_vector = self.local_n_vector.cross3d(self.up_vector).normalize()
-        self.local_u_vector = self.local_n_vector.cross3d(self.local_v_vector).normalize()
-        # Use rotation_matrix to keep object's facing direction the same with its moving direction
-        self.pre_rotation_matrix = [
-            [self.local_n_vector.coords[0], self.local_n_vector.coords[1], self.local_n_vector[2], 0],
-            [self.local_v_vector.coords[0], self.local_v_vector.coords[1], self.local_v_vector[2], 0],
-            [self.local_u_vector.coords[0], self.local_u_vector.coords[1], self.local_u_vector[2], 0],
-            [0, 0, 0, 1]
-        ]
+    def update(self):
+        # in a pose atlas only the root transform is compiled, around the cached list of the current pose
+        if self.pose_atlas is None:
+            super(Predator, self).update()
+        else:
+            self.pose_atlas.update(self)
 
-        self.translation_speed = self.translation_speed.normalize() * 0.01
-        self.current_position = self.current_position + self.translation_speed
+    def animationUpdate(self):
+        # create period animation for creature joints, unless a joint animator advances them with all other creatures
+        if self.joint_animator is None:
+            for i, comp in enumerate(self.components):
+                comp.rotate(self.rotation_speed[i][0], comp.uAxis)
+                if comp.uAngle in comp.uRange:  # rotation reached the limit
+                    self.rotation_speed[i][0] *= -1
+
+        # Moving direction, collision detection and facing direction of all creatures are updated together
+        # in WorldState.step, here we only need to refresh the model with the new state
         self.update()
 
 
-class Prey(Component, Animation, EnvironmentObject):
+class Prey(WorldRowView, Component, Animation, EnvironmentObject):
     """
     Define a prey object (An Android)
     """
     components = None
     rotation_speed = None
-    translation_speed = None
+    joint_animator = None  # JointAnimator, if given it swings the joints of all creatures together
+    joint_id = -1  # int, id of this creature in joint_animator
+    pose_atlas = None  # PoseAtlas, if given the model is drawn from display lists cached per pose
+    pose_archetype = None  # tuple, creatures with the same archetype look the same in the same pose
     up_vector = Point((0, 1, 0))
-    local_x_vector = None
-    local_y_vector = None
-    local_z_vector = None
-    vanish_flag = False
 
     def __init__(self, parent, position, color):
         super(Prey, self).__init__(position)
@@ -472,7 +445,8 @@ class Prey(Component, Animation, EnvironmentObject):
         body.addChild(rightLeg)
         body.addChild(leftLeg)
 
-        self.components = body.components + rightArm.components + leftArm.components + leftLeg.components + rightLeg.components
+        self.components = (body.components + rightArm.components + leftArm.components + leftLeg.components +
+                           rightLeg.components)
         self.addChild(body)
         self.rotation_speed = []
 
@@ -484,89 +458,42 @@ class Prey(Component, Animation, EnvironmentObject):
                 self.rotation_speed.append([-2, 0, 0])
 
         self.translation_speed = Point([random.random() - 0.5 for _ in range(3)]).normalize() * 0.02
+        self.cruise_speed = 0.02
 
         self.bound_center = Point((0, 0, 0))
         self.bound_radius = 0.2
         self.species_id = 1
+        # the android is modeled facing along its local z axis
+        self.forward_axis = 2
+        self.pose_archetype = ("Prey", color.getRGB())
 
         self.initialize()
 
-    def animationUpdate(self):
-        # create period animation for creature joints
-        for i, comp in enumerate(self.components):
-            comp.rotate(self.rotation_speed[i][0], comp.uAxis)
-            if comp.uAngle in comp.uRange:  # rotation reached the limit
-                self.rotation_speed[i][0] *= -1
-
-        for item in self.env_obj_list:
-            # Collision detection (tank)
-            if isinstance(item, Tank):
-                if not (item.tank_dimensions[0] / 2 - self.bound_radius) > (
-                        self.current_position[0] + self.translation_speed[0]) > (
-                               -item.tank_dimensions[0] / 2 + self.bound_radius):
-                    self.translation_speed.coords[0] *= -1
-                    break
-                if not (item.tank_dimensions[1] / 2 - self.bound_radius > self.current_position[1] +
-                        self.translation_speed[1] > -item.tank_dimensions[1] / 2 + self.bound_radius):
-                    self.translation_speed.coords[1] *= -1
-                    break
-                if not (item.tank_dimensions[2] / 2 - self.bound_radius > self.current_position[2] +
-                        self.translation_speed[2] > -item.tank_dimensions[2] / 2 + self.bound_radius):
-                    self.translation_speed.coords[2] *= -1
-                    break
-
-            elif isinstance(item, EnvironmentObject):
-                # If item is a predator.
-                if item.species_id == 2:
-                    # If collide, remove prey.
-                    if (item.current_position - self.current_position).norm() <= (
-                            item.bound_radius + self.bound_radius):
-                        self.vanish_flag = True
-                # If item is a prey.
-                elif item.species_id == 1 and item != self:
-                    # If collide, bounce back.
-                    if (item.current_position - self.current_position).norm() <= (
-                            item.bound_radius + self.bound_radius):
-                        self.translation_speed = self.translation_speed.reflect(
-                            item.current_position - self.current_position)
-                        item.translation_speed = self.translation_speed.reflect(
-                            item.current_position - self.current_position)
-                        break
-                # If item is a food.
-                if item.species_id == 0:
-                    # Change moving direction toward the food
-                    self.translation_speed += (item.current_position - self.current_position) * math.exp(
-                        -1*pow((item.current_position - self.current_position).norm(), 2))
-
-        self.translation_speed = self.translation_speed.normalize() * 0.02
-        self.bound_center += self.translation_speed
-
-        self.local_z_vector = self.translation_speed.normalize()
-        self.local_x_vector = self.local_z_vector.cross3d(self.up_vector).normalize()
-        self.local_y_vector = self.local_z_vector.cross3d(self.local_x_vector).normalize()
-
-        # Use rotation_matrix to keep object's facing direction the same with its moving direction
-        self.pre_rotation_matrix = [
-            [self.local_x_vector.coords[0], self.local_x_vector.coords[1], self.local_x_vector[2], 0],
-            [self.local_y_vector.coords[0], self.local_y_vector.coords[1], self.local_y_vector[2], 0],
-            [self.local_z_vector.coords[0], self.local_z_vector.coords[1], self.local_z_vector[2], 0],
-            [0, 0, 0, 1]
-        ]
+    def update(self):
+        # in a pose atlas only the root transform is compiled, around the cached list of the current pose
+        if self.pose_atlas is None:
+            super(Prey, self).update()
+        else:
+            self.pose_atlas.update(self)
 
-        self.current_position = self.current_position + self.translation_speed
+    def animationUpdate(self):
+        # create period animation for creature joints, unless a joint animator advances them with all other creatures
+        if self.joint_animator is None:
+            for i, comp in enumerate(self.components):
+                comp.rotate(self.rotation_speed[i][0], comp.uAxis)
+                if comp.uAngle in comp.uRange:  # rotation reached the limit
+                    self.rotation_speed[i][0] *= -1
+
+        # Moving direction, flocking (see Flocking.py), collision detection and facing direction of all creatures
+        # are updated together in WorldState.step, here we only need to refresh the model with the new state
         self.update()
 
 
-class Food(Component, Animation, EnvironmentObject):
+class Food(WorldRowView, Component, Animation, EnvironmentObject):
     """
     Defines a food object.
     """
     components = None
-    translation_speed = None
-    local_n_vector = None
-    local_v_vector = None
-    local_u_vector = None
-    vanish_flag = False
 
     def __init__(self, parent, position):
         super(Food, self).__init__(position)
@@ -577,35 +504,14 @@ class Food(Component, Animation, EnvironmentObject):
         self.addChild(food)
         self.initialize()
 
+        # Food has no cruise speed, it keeps sinking until it reaches the tank floor
         self.translation_speed = Point([0, -0.006, 0])
         self.bound_center = Point((0, 0, 0))
         self.bound_radius = 0.1
         self.species_id = 0
 
     def animationUpdate(self):
-
-        for item in self.env_obj_list:
-            # Collision detection (tank)
-            if isinstance(item, Tank):
-                if not (item.tank_dimensions[0] / 2 - self.bound_radius) > (
-                        self.current_position[0] + self.translation_speed[0]) > (
-                               -item.tank_dimensions[0] / 2 + self.bound_radius):
-                    self.translation_speed.coords[0] = 0
-                if not (item.tank_dimensions[1] / 2 - self.bound_radius > self.current_position[1] +
-                        self.translation_speed[1] > -item.tank_dimensions[1] / 2 + self.bound_radius):
-                    self.translation_speed.coords[1] = 0
-                if not (item.tank_dimensions[2] / 2 - self.bound_radius > self.current_position[2] +
-                        self.translation_speed[2] > -item.tank_dimensions[2] / 2 + self.bound_radius):
-                    self.translation_speed.coords[2] = 0
-
-            # Collision detection (creature), if collide, the object vanishes.
-            elif isinstance(item, EnvironmentObject):
-                if item.species_id > self.species_id:
-                    if (item.current_position - self.current_position).norm() <= (
-                            item.bound_radius + self.bound_radius):
-                        self.vanish_flag = True
-
-        self.current_position = self.current_position + self.translation_speed
+        # Sinking and being eaten are handled in WorldState.step
         self.update()
 
         ##### TODO 3: Interact with the environment
@@ -629,8 +535,38 @@ class Food(Component, Animation, EnvironmentObject):
         #   direction in which it swims. Remember that we require your creatures to be movable in 3 dimensions,
         #   so they should be able to face any direction in 3D space.
 
-        ##### BONUS 6: Group behaviors
-        # Requirements:
-        #   1. Add at least 5 creatures to the vivarium and make it possible for creatures to engage in group behaviors,
-        #   for instance flocking together. This can be achieved by implementing the
-        #   [Boids animation algorithms](http://www.red3d.com/cwr/boids/) of Craig Reynolds.
+
+class Rock(Component, EnvironmentObject):
+    """
+    A round rock lying in the tank. It never moves, creatures are kept out of it by the SphereObstacle it models,
+    see SignedDistanceField
+    """
+    obstacle = None  # SphereObstacle
+
+    def __init__(self, parent, obstacle):
+        super(Rock, self).__init__(Point(obstacle.center), DisplayableSphere(parent, obstacle.radius))
+        self.setDefaultColor(Ct.SILVER)
+        self.obstacle = obstacle
+        self.species_id = -1
+        self.initialize()
+
+
+class FoodParticleCloud(Component, Animation):
+    """
+    Draws all pellets of a FoodParticles system. Simulation and eating of the pellets are handled in WorldState.step
+    """
+    particles = None  # FoodParticles
+    drawn_version = -1  # int, version of the particles compiled into the display list
+
+    def __init__(self, parent, particles):
+        super(FoodParticleCloud, self).__init__(Point((0, 0, 0)), DisplayableParticles(parent, particles))
+        self.setDefaultColor(Ct.DARKGREEN)
+        self.particles = particles
+        self.drawn_version = -1
+        self.initialize()
+
+    def animationUpdate(self):
+        # pellets resting on the floor do not change, so the display list is only compiled again after a change
+        if self.particles.version != self.drawn_version:
+            self.drawn_version = self.particles.version
+            self.update()
@@ -0,0 +1,230 @@
+"""
+Define cached navigation flow fields. The tank is voxelized from its signed distance field, voxels too close to a wall
+or obstacle are blocked, and a wavefront pass spreads the path length to the closest goal voxel (food, safe zones)
+through the free voxels. Every voxel then points to the next voxel of its shortest path, so following the field leads
+around obstacles instead of getting stuck in local minima of potential functions.
+A field only depends on its set of goal voxels and the obstacles, so it is cached under that key and shared by all
+creatures heading for the same goals. It is only computed again when the goal voxels or the obstacles change.
+First version Created on 10/18/2026
+
+:author: Zack (Wanzhi Wang)
+:version: 2026.10.18
+"""
+from collections import OrderedDict
+import numpy as np
+
+# offsets to the 26 neighbors of a voxel
+_OFFSETS = np.array([(x, y, z) for x in (-1, 0, 1) for y in (-1, 0, 1) for z in (-1, 0, 1) if (x, y, z) != (0, 0, 0)])
+
+
+class FlowField:
+    """
+    Path length to the closest goal and direction toward it of every voxel
+    """
+    distance = None  # numpy.ndarray(nx, ny, nz), path length to the closest goal, inf if unreachable
+    directions = None  # numpy.ndarray(nx, ny, nz, 3), unit direction to follow, zero at goals and unreachable voxels
+
+    def __init__(self, distance, directions):
+        self.distance = distance
+        self.directions = directions
+
+
+class NavigationRule:
+    """
+    Where one species wants to go
+    """
+    goal_species = ()  # tuple<int>, objects of these species are goals, e.g. food
+    zones = ()  # tuple<tuple>, (lower, upper) corners of fixed goal boxes, e.g. safe zones
+    strength = 0.01  # float, length of the steering added in the flow direction
+
+    def __init__(self, goal_species=(), zones=(), strength=0.01):
+        self.goal_species = tuple(goal_species)
+        self.zones = tuple(zones)
+        self.strength = strength
+
+
+class Navigation:
+    """
+    Voxel grid over the tank with a cache of flow fields keyed by goal voxels
+    """
+    geometry = None  # SignedDistanceField, walls and obstacles
+    clearance = 0.2  # float, voxels closer than this to a surface are blocked
+    origin = None  # numpy.ndarray(3), center of voxel (0, 0, 0)
+    spacing = None  # numpy.ndarray(3), size of a voxel
+    dims = None  # numpy.ndarray(3), number of voxels along every axis
+    blocked = None  # numpy.ndarray(nx, ny, nz), bool
+    blocked_version = -1  # int, geometry version blocked was computed from
+    rules = None  # dict<int, NavigationRule>
+    cache = None  # OrderedDict<bytes, FlowField>, most recently used last
+    cache_size = 8  # int, number of flow fields kept
+    computed = 0  # int, number of flow fields computed so far
+
+    def __init__(self, geometry, resolution=0.2, clearance=0.2, cache_size=8):
+        """
+        :param geometry: signed distance field of the tank walls and obstacles
+        :type geometry: SignedDistanceField
+        :param resolution: max size of a voxel
+        :type resolution: float
+        :param clearance: voxels whose center is closer than this to a surface are blocked
+        :type clearance: float
+        :param cache_size: number of flow fields kept
+        :type cache_size: int
+        """
+        self.geometry = geometry
+        self.clearance = clearance
+        size = 2 * np.asarray(geometry.half, dtype=float)
+        self.dims = np.maximum(1, np.ceil(size / resolution).astype(np.int64))
+        self.spacing = size / self.dims
+        self.origin = -size / 2 + self.spacing / 2
+        self.rules = {}
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.computed = 0
+        self.blocked_version = -1
+
+    def setRule(self, species, rule):
+        """
+        :param species: species id that navigates
+        :param rule: its goals, None stops it from navigating
+        :type rule: NavigationRule
+        :return: None
+        """
+        if rule is None:
+            self.rules.pop(species, None)
+        else:
+            self.rules[species] = rule
+
+    def _voxelize(self):
+        """
+        Block voxels near walls and obstacles, and drop all cached fields if the obstacles changed
+        """
+        if self.blocked_version == self.geometry.version:
+            return
+        axes = [self.origin[k] + np.arange(self.dims[k]) * self.spacing[k] for k in range(3)]
+        centers = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, 3)
+        self.blocked = (self.geometry.distance(centers) < self.clearance).reshape(tuple(self.dims))
+        self.blocked_version = self.geometry.version
+        self.cache.clear()
+
+    def voxels(self, points):
+        """
+        :param points: positions
+        :type points: numpy.ndarray(n, 3)
+        :return: voxel coordinates of every point
+        :rtype: numpy.ndarray(n, 3)
+        """
+        return np.clip(np.round((points - self.origin) / self.spacing).astype(np.int64), 0, self.dims - 1)
+
+    def goalVoxels(self, points=None, zones=()):
+        """
+        :param points: positions of goal objects
+        :param zones: (lower, upper) corners of goal boxes
+        :return: sorted flat indices of all goal voxels. Goals may lie in blocked voxels, e.g. food on the floor, the
+            path then ends in the free voxel next to them
+        :rtype: numpy.ndarray
+        """
+        self._voxelize()
+        cells = [np.zeros(0, dtype=np.int64)]
+        if points is not None and len(points) > 0:
+            cells.append(np.ravel_multi_index(self.voxels(points).T, tuple(self.dims)))
+        for lower, upper in zones:
+            low = self.voxels(np.asarray(lower, dtype=float)[None])[0]
+            high = self.voxels(np.asarray(upper, dtype=float)[None])[0]
+            box = np.stack(np.meshgrid(*[np.arange(low[k], high[k] + 1) for k in range(3)], indexing="ij"), axis=-1)
+            cells.append(np.ravel_multi_index(box.reshape(-1, 3).T, tuple(self.dims)))
+        return np.unique(np.concatenate(cells))
+
+    def flowField(self, goals):
+        """
+        :param goals: sorted flat indices of goal voxels, see goalVoxels
+        :return: cached flow field toward the goals, computed if it is not in the cache
+        :rtype: FlowField
+        """
+        self._voxelize()
+        key = goals.tobytes()
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        field = self._compute(goals)
+        self.cache[key] = field
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        self.computed += 1
+        return field
+
+    def _compute(self, goals):
+        """
+        Spread path lengths from the goals through free voxels, one wavefront of changed voxels at a time
+        """
+        # voxels are padded with a blocked border, so neighbors never leave the array
+        padded = tuple(self.dims + 2)
+        free = np.zeros(padded, dtype=bool)
+        free[1:-1, 1:-1, 1:-1] = ~self.blocked
+        free = free.reshape(-1)
+        strides = np.array([padded[1] * padded[2], padded[2], 1])
+        neighbors = _OFFSETS @ strides
+        steps = np.linalg.norm(_OFFSETS * self.spacing, axis=1)
+        distance = np.full(len(free), np.inf)
+        goal_coords = np.stack(np.unravel_index(goals, tuple(self.dims)), axis=1) + 1
+        front = goal_coords @ strides
+        distance[front] = 0
+        while len(front) > 0:
+            cells = (front[:, None] + neighbors).reshape(-1)
+            length = (distance[front][:, None] + steps).reshape(-1)
+            better = free[cells] & (length < distance[cells])
+            cells, length = cells[better], length[better]
+            np.minimum.at(distance, cells, length)
+            front = np.unique(cells)
+
+        # every voxel points to the next voxel on its shortest path, blocked voxels next to free ones point out of
+        # the obstacle. Goals and unreachable voxels have no direction
+        inside = np.zeros(padded, dtype=bool)
+        inside[1:-1, 1:-1, 1:-1] = True
+        inner = np.flatnonzero(inside.reshape(-1) & (distance != 0))
+        around = distance[inner[:, None] + neighbors] + steps
+        best = np.argmin(around, axis=1)
+        reachable = np.isfinite(around[np.arange(len(inner)), best])
+        inner, best = inner[reachable], best[reachable]
+        directions = np.zeros((len(free), 3))
+        directions[inner] = _OFFSETS[best] * self.spacing / steps[best, None]
+        region = (slice(1, -1),) * 3
+        return FlowField(distance.reshape(padded)[region].copy(), directions.reshape(padded + (3,))[region].copy())
+
+    def sample(self, field, points):
+        """
+        :param field: flow field to follow
+        :type field: FlowField
+        :param points: positions
+        :return: direction to follow at every point
+        :rtype: numpy.ndarray(n, 3)
+        """
+        v = self.voxels(points)
+        return field.directions[v[:, 0], v[:, 1], v[:, 2]]
+
+    def steer(self, positions, species, goal_positions, active=None):
+        """
+        Steer every navigating creature along the flow field toward the goals of its species
+
+        :param positions: position of every object
+        :type positions: numpy.ndarray(n, 3)
+        :param species: species id of every object
+        :type species: numpy.ndarray(n)
+        :param goal_positions: function giving positions of all goal objects of a tuple of species ids
+        :type goal_positions: function
+        :param active: bool mask of creatures that steer in this call, by default all of them
+        :return: velocity change of every object
+        :rtype: numpy.ndarray(n, 3)
+        """
+        total = np.zeros((len(positions), 3))
+        for target, rule in sorted(self.rules.items()):
+            rows = species == target
+            if active is not None:
+                rows &= active
+            rows = np.flatnonzero(rows)
+            if len(rows) == 0:
+                continue
+            goals = self.goalVoxels(goal_positions(rule.goal_species) if rule.goal_species else None, rule.zones)
+            if len(goals) == 0:
+                continue
+            total[rows] += rule.strength * self.sample(self.flowField(goals), positions[rows])
+        return total
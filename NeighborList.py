@@ -0,0 +1,182 @@
+"""
+Define a Verlet neighbor list which is shared by all per-tick behaviors of the Vivarium.
+Pairs of objects that may interact are collected with an extra skin distance added to their interaction range.
+As long as no object moved further than half of the skin since the list was built, no pair outside the list can come
+into range, so the list is reused and only rebuilt once some object moved far enough.
+Displacement and squared distance of all listed pairs are computed once per tick, and every behavior (potential
+steering, bouncing, eating) picks the pairs it needs from them with a mask.
+For swept collision tests, velocities can be given as well: the list then also stays valid for positions at the end
+of the tick, and the extra distance grows with the speed of the fastest object if it moves more than half of the skin
+in one tick.
+A rebuild can be spread over several ticks with a staged builder: it starts from the positions of one tick while the
+old list is still valid, does a part of the work in every following tick, and the new list replaces the old one when
+it is done, before the old list runs out.
+First version Created on 10/18/2026
+
+:author: Zack (Wanzhi Wang)
+:version: 2026.10.18
+"""
+import numpy as np
+
+
+class NeighborList:
+    """
+    Cache of interacting pairs with a skin radius.
+
+    The pair builder is a function taking the skin and returning two arrays of row indices (i, j) of all pairs that
+    are within their interaction range plus skin, every pair reported once. The staged builder takes the skin and a
+    number of parts and returns a generator doing one part of the same work per next(), yielding None for all parts
+    but the last one, which yields the pairs for the positions at the first part.
+    """
+    skin = 0.0  # float, extra distance added to interaction ranges when building
+    extra = 0.0  # float, extra distance used by the last build, at least skin
+    builder = None  # function(skin) -> (numpy.ndarray, numpy.ndarray)
+    dirty = True  # bool, rows changed since last build so the list must be rebuilt
+    builds = 0  # int, how many times the list has been built
+    stager = None  # function(skin, parts) -> generator, staged builder, None to always build at once
+    stages = 1  # int, number of ticks a staged rebuild is spread over
+
+    staged = None  # generator, staged rebuild in progress, None if there is none
+    staged_extra = 0.0  # float, extra distance of the staged rebuild
+    staged_reference = None  # numpy.ndarray(n, 3), positions the staged rebuild started from
+
+    pair_i = None  # numpy.ndarray, rows of first objects of all listed pairs
+    pair_j = None  # numpy.ndarray, rows of second objects of all listed pairs
+    reference = None  # numpy.ndarray(n, 3), positions when the list was built
+
+    d = None  # numpy.ndarray(pairs, 3), positions[pair_j] - positions[pair_i] of the current tick
+    dist2 = None  # numpy.ndarray(pairs), squared length of d
+
+    def __init__(self, builder, skin=0.0, stager=None, stages=1):
+        """
+        :param builder: function that collects candidate pairs for a given skin
+        :type builder: function
+        :param skin: extra distance added to interaction ranges. 0 rebuilds the list whenever something moved
+        :type skin: float
+        :param stager: function that collects the same pairs in parts, see NeighborList
+        :type stager: function
+        :param stages: number of ticks a rebuild is spread over if there is a stager. Rebuilds are started earlier
+            the more stages there are, so it should stay well below the number of ticks the skin lasts
+        :type stages: int
+        """
+        self.builder = builder
+        self.skin = skin
+        self.stager = stager
+        self.stages = stages
+        self.staged = None
+        self.dirty = True
+        self.builds = 0
+        self.extra = 0.0
+        self.pair_i = np.zeros(0, dtype=np.int64)
+        self.pair_j = np.zeros(0, dtype=np.int64)
+        self.reference = np.zeros((0, 3))
+        self.d = np.zeros((0, 3))
+        self.dist2 = np.zeros(0)
+
+    def invalidate(self):
+        """
+        Force a rebuild in the next update, this should be called when objects are added or removed
+        """
+        self.dirty = True
+        self.staged = None
+
+    def needsRebuild(self, positions, velocities=None):
+        """
+        :param positions: current positions of all rows
+        :param velocities: if given, positions at the end of the tick must be covered by the list as well
+        :rtype: bool
+        """
+        if self.dirty or len(positions) != len(self.reference):
+            return True
+        return self._moved(positions, velocities) > self.extra / 2
+
+    def _moved(self, positions, velocities=None):
+        """
+        :return: largest distance of any row from its position when the list was built, at the start of the tick and,
+            if velocities are given, at its end
+        :rtype: float
+        """
+        moved = positions - self.reference
+        largest = float(np.max(np.einsum("ij,ij->i", moved, moved), initial=0.0))
+        if velocities is not None:
+            moved += velocities
+            largest = max(largest, float(np.max(np.einsum("ij,ij->i", moved, moved), initial=0.0)))
+        return np.sqrt(largest)
+
+    def update(self, positions, velocities=None):
+        """
+        Rebuild the list if needed, then compute displacement and distance of all listed pairs for this tick
+
+        :param positions: current positions of all rows
+        :type positions: numpy.ndarray(n, 3)
+        :param velocities: motion of all rows during this tick, see needsRebuild
+        :type velocities: numpy.ndarray(n, 3)
+        :return: rows of first and second objects of all listed pairs
+        """
+        if self.stager is not None and self.stages > 1 and not self.dirty and len(positions) == len(self.reference):
+            self._stage(positions, velocities)
+        if self.needsRebuild(positions, velocities):
+            self._build(positions, velocities)
+        # take is much faster than fancy indexing for gathering rows
+        self.d = np.take(positions, self.pair_j, axis=0) - np.take(positions, self.pair_i, axis=0)
+        self.dist2 = np.einsum("ij,ij->i", self.d, self.d)
+        return self.pair_i, self.pair_j
+
+    def sweep(self, positions, velocities):
+        """
+        Make sure that all pairs which can come into range while moving by velocities are listed. The list is only
+        rebuilt, and d and dist2 recomputed, if velocities changed too much since update.
+
+        :param positions: positions of all rows given to update in this tick
+        :param velocities: final motion of all rows during this tick
+        :return: rows of first and second objects of all listed pairs
+        """
+        if self.needsRebuild(positions, velocities):
+            self.update(positions, velocities)
+        return self.pair_i, self.pair_j
+
+    def _stage(self, positions, velocities):
+        """
+        Run the next part of the staged rebuild, start one if the list runs out within the next stages ticks, and
+        replace the list once the rebuild is done
+        """
+        if self.staged is None:
+            # the old list must stay valid until the last part ran, with every row moving at most its current speed
+            if self._moved(positions, velocities) + self.stages * _speed(velocities) <= self.extra / 2:
+                return
+            self.staged_extra = _extra(self.skin, velocities)
+            self.staged_reference = positions.copy()
+            self.staged = self.stager(self.staged_extra, self.stages)
+        pairs = next(self.staged)
+        if pairs is None:
+            return
+        self.pair_i, self.pair_j = pairs
+        self.extra = self.staged_extra
+        self.reference = self.staged_reference
+        self.staged = None
+        self.builds += 1
+
+    def _build(self, positions, velocities):
+        self.extra = _extra(self.skin, velocities)
+        self.pair_i, self.pair_j = self.builder(self.extra)
+        self.reference = positions.copy()
+        self.dirty = False
+        self.staged = None
+        self.builds += 1
+
+
+def _speed(velocities):
+    """
+    Length of the longest motion in velocities, 0 if not given
+    """
+    if velocities is None or len(velocities) == 0:
+        return 0.0
+    return float(np.sqrt(np.max(np.einsum("ij,ij->i", velocities, velocities))))
+
+
+def _extra(skin, velocities):
+    """
+    Extra distance of a build: the skin, or more if the fastest row would cross half of it in one tick
+    """
+    # a little slack, so that final velocities of the tick which only differ by rounding still fit
+    return max(skin, 2.02 * _speed(velocities))
@@ -0,0 +1,94 @@
+"""
+Define a pose atlas of our creatures. Joints of a creature swing periodically between their limits, so a creature
+only ever takes a few dozen distinct poses. Instead of compiling the whole component tree of every creature into new
+display lists every tick, the atlas compiles every pose of a creature archetype once, keyed by the archetype and the
+angles of its animated joints. Refreshing a creature then only compiles its root transform around a call of the
+cached list of its current pose.
+Poses are told apart by joint angles only, so all creatures of one archetype must share the same colors, scales and
+fixed angles.
+First version Created on 10/18/2026
+
+:author: Zack (Wanzhi Wang)
+:version: 2026.10.18
+"""
+try:
+    import OpenGL
+
+    try:
+        import OpenGL.GL as gl
+        import OpenGL.GLU as glu
+    except ImportError:
+        from ctypes import util
+
+        orig_util_find_library = util.find_library
+
+
+        def new_util_find_library(name):
+            res = orig_util_find_library(name)
+            if res:
+                return res
+            return '/System/Library/Frameworks/' + name + '.framework/' + name
+
+
+        util.find_library = new_util_find_library
+        import OpenGL.GL as gl
+        import OpenGL.GLU as glu
+except ImportError:
+    raise ImportError("Required dependency PyOpenGL not present")
+
+
+class PoseAtlas:
+    """
+    Display lists of the children of creatures in every pose seen so far
+    """
+    lists = None  # dict<tuple, int>, display list of every pose keyed by archetype and joint angles
+    decimals = 3  # int, joint angles are rounded to this many decimals to tell poses apart
+    compiled = 0  # int, number of poses compiled so far
+
+    def __init__(self, decimals=3):
+        self.lists = {}
+        self.decimals = decimals
+        self.compiled = 0
+
+    def poseKey(self, creature):
+        """
+        :param creature: creature with a pose_archetype and its animated joints in components
+        :return: key of the current pose of the creature
+        :rtype: tuple
+        """
+        return creature.pose_archetype, tuple(round(comp.uAngle, self.decimals) for comp in creature.components)
+
+    def poseList(self, creature):
+        """
+        :param creature: creature with a pose_archetype and its animated joints in components
+        :return: display list drawing all children of the creature in its current pose, compiled on first use
+        :rtype: int
+        """
+        key = self.poseKey(creature)
+        handle = self.lists.get(key)
+        if handle is None:
+            handle = gl.glGenLists(1)
+            gl.glNewList(handle, gl.GL_COMPILE)
+            for c in creature.children:
+                c.emit()
+            gl.glEndList()
+            self.lists[key] = handle
+            self.compiled += 1
+        return handle
+
+    def update(self, creature):
+        """
+        Compile the display list of a creature from its root transform and the cached list of its pose
+
+        :param creature: creature with a pose_archetype and its animated joints in components
+        :type creature: Component
+        :return: None
+        """
+        pose = self.poseList(creature)
+        gl.glNewList(creature.callListHandle, gl.GL_COMPILE)
+        gl.glPushMatrix()
+        creature.applyTransform()
+        creature.drawDisplayable()
+        gl.glCallList(pose)
+        gl.glPopMatrix()
+        gl.glEndList()
@@ -0,0 +1,191 @@
+"""
+Define potential functions used by creatures to steer toward or away from other species.
+A kernel turns the squared distance of a pair into a weight w, and the steering force on the pulled object is
+w * d, where d points from it to the other object. Positive strength attracts, negative strength repels.
+PotentialField keeps one kernel per (pulled species, source species) pair and evaluates all pairs of a neighbor list
+in a few array operations, pairs further than the kernel's cutoff are skipped.
+For large populations, an opening angle theta can be set to approximate the sums with Barnes-Hut octrees instead.
+First version Created on 10/18/2026
+
+:author: Zack (Wanzhi Wang)
+:version: 2026.10.18
+"""
+import numpy as np
+
+from BarnesHut import BarnesHutTree
+
+
+class Kernel:
+    """
+    Interface of a potential kernel. Subclasses implement weight.
+    """
+    strength = 1.0  # float, positive attracts and negative repels
+    cutoff = 3.0  # float, pairs further than this are ignored
+
+    def __init__(self, strength=1.0, cutoff=3.0):
+        self.strength = strength
+        self.cutoff = cutoff
+
+    def weight(self, dist2):
+        """
+        :param dist2: squared distance of every pair
+        :type dist2: numpy.ndarray
+        :return: force of every pair divided by its displacement vector
+        :rtype: numpy.ndarray
+        """
+        raise NotImplementedError("weight method not implemented yet")
+
+
+class GaussianKernel(Kernel):
+    """
+    force = strength * d * exp(-|d|^2 / width^2)
+    """
+    width = 1.0  # float
+
+    def __init__(self, strength=1.0, cutoff=3.0, width=1.0):
+        super().__init__(strength, cutoff)
+        self.width = width
+
+    def weight(self, dist2):
+        return self.strength * np.exp(-dist2 / (self.width * self.width))
+
+
+class InverseSquareKernel(Kernel):
+    """
+    force = strength * d / |d|^3, its length falls off with the square of distance.
+    softening is added to the squared distance so that the force stays finite for touching objects.
+    """
+    softening = 0.01  # float
+
+    def __init__(self, strength=1.0, cutoff=3.0, softening=0.01):
+        super().__init__(strength, cutoff)
+        self.softening = softening
+
+    def weight(self, dist2):
+        soft = dist2 + self.softening
+        return self.strength / (soft * np.sqrt(soft))
+
+
+class LinearKernel(Kernel):
+    """
+    Length of the force falls from strength at distance 0 to 0 at the cutoff distance
+    """
+
+    def weight(self, dist2):
+        dist = np.sqrt(dist2)
+        falloff = np.clip(1 - dist / self.cutoff, 0, None)
+        return self.strength * np.divide(falloff, dist, out=np.zeros_like(dist), where=dist > 0)
+
+
+class PotentialField:
+    """
+    Table of kernels keyed by (pulled species, source species)
+    """
+    kernels = None  # dict<tuple<int, int>, Kernel>
+    theta = None  # float, opening angle of Barnes-Hut mode, None evaluates exact pairs
+
+    def __init__(self, theta=None):
+        """
+        :param theta: if given, forces are approximated with Barnes-Hut octrees using this opening angle
+        :type theta: float
+        """
+        self.kernels = {}
+        self.theta = theta
+
+    def setKernel(self, target_species, source_species, kernel):
+        """
+        Let objects of target_species be pulled (or pushed) by objects of source_species
+
+        :param target_species: species id of the object being steered
+        :param source_species: species id of the object it reacts to
+        :param kernel: potential kernel, None removes the interaction
+        :type kernel: Kernel
+        :return: None
+        """
+        if kernel is None:
+            self.kernels.pop((target_species, source_species), None)
+        else:
+            self.kernels[(target_species, source_species)] = kernel
+
+    def sources(self, target_species):
+        """
+        :return: species ids that target_species reacts to
+        :rtype: list<int>
+        """
+        return [s for (t, s) in self.kernels if t == target_species]
+
+    def targets(self):
+        """
+        :return: species ids that react to some other species
+        :rtype: list<int>
+        """
+        return sorted({t for (t, s) in self.kernels})
+
+    def cutoff(self, target_species=None):
+        """
+        :param target_species: only consider kernels of this species, None for all kernels
+        :return: largest cutoff among kernels
+        :rtype: float
+        """
+        return max([k.cutoff for (t, s), k in self.kernels.items()
+                    if target_species is None or t == target_species], default=0.0)
+
+    def forces(self, count, i, j, d, dist2, species, baked=None):
+        """
+        Sum steering forces of all pairs in one pass. Every pair is evaluated in both directions.
+
+        :param count: number of objects
+        :type count: int
+        :param i: indices of first objects of pairs
+        :param j: indices of second objects of pairs
+        :param d: positions[j] - positions[i] of every pair
+        :param dist2: squared length of d
+        :param species: species id of every object
+        :param baked: bool mask of objects whose influence is baked into an EnvironmentField, they are not used as
+            sources here
+        :return: steering force of every object
+        :rtype: numpy.ndarray(count, 3)
+        """
+        total = np.zeros((count, 3))
+        si = species[i]
+        sj = species[j]
+        if baked is not None:
+            # a baked object can still be pulled, it just no longer pulls others
+            si = np.where(baked[i], -1, si)
+            sj = np.where(baked[j], -1, sj)
+        for (target, source), kernel in self.kernels.items():
+            near = dist2 <= kernel.cutoff * kernel.cutoff
+            # i pulled toward j along d, j pulled toward i along -d
+            for mask, rows, sign in (((species[i] == target) & (sj == source) & near, i, 1),
+                                     ((species[j] == target) & (si == source) & near, j, -1)):
+                if not np.any(mask):
+                    continue
+                force = d[mask] * (sign * kernel.weight(dist2[mask]))[:, None]
+                for axis in range(3):
+                    total[:, axis] += np.bincount(rows[mask], weights=force[:, axis], minlength=count)
+        return total
+
+    def forcesBarnesHut(self, positions, species, baked=None):
+        """
+        Approximate steering forces of all objects with one Barnes-Hut octree per source species.
+        This does not need any pair list.
+
+        :param positions: position of every object
+        :type positions: numpy.ndarray(n, 3)
+        :param species: species id of every object
+        :type species: numpy.ndarray(n)
+        :param baked: bool mask of objects that are not used as sources, see forces
+        :return: steering force of every object
+        :rtype: numpy.ndarray(n, 3)
+        """
+        total = np.zeros((len(positions), 3))
+        source_species = species if baked is None else np.where(baked, -1, species)
+        trees = {}
+        for (target, source), kernel in self.kernels.items():
+            targets = np.flatnonzero(species == target)
+            if len(targets) == 0:
+                continue
+            if source not in trees:
+                trees[source] = BarnesHutTree(positions[source_species == source])
+            total[targets] += trees[source].forces(positions[targets], kernel, self.theta)
+        return total
@@ -0,0 +1,119 @@
+"""
+Define the pursuit engine of predators. Instead of summing the attraction of every prey in the tank, every pursuing
+species picks an explicit set of targets: its k nearest prey, or all prey within its perception radius, found with
+one KD-tree built per tick over the positions of the hunted species and queried for all pursuers at once.
+Pursuers then steer only toward their targets, so pursuit costs O(P log N) instead of O(P * N), and the chosen
+targets are kept so that they can be inspected.
+First version Created on 10/18/2026
+
+:author: Zack (Wanzhi Wang)
+:version: 2026.10.18
+"""
+import numpy as np
+
+from KDTree import KDTree
+from PotentialField import GaussianKernel
+
+
+class PursuitRule:
+    """
+    How one species chases its prey
+    """
+    prey = ()  # tuple<int>, species ids that are chased
+    k = 4  # int, number of nearest prey steered toward, used when perception is None
+    perception = None  # float, if given all prey within this distance are steered toward instead of the k nearest
+    kernel = None  # Kernel, weight of every target by its distance, prey beyond its cutoff are never targets
+
+    def __init__(self, prey, k=4, perception=None, kernel=None):
+        self.prey = tuple(prey)
+        self.k = k
+        self.perception = perception
+        self.kernel = GaussianKernel(cutoff=3.0) if kernel is None else kernel
+
+
+class Pursuit:
+    """
+    Table of pursuit rules keyed by species id
+    """
+    rules = None  # dict<int, PursuitRule>
+    pursuers = None  # numpy.ndarray, rows of pursuers of every target pair chosen in the last steer
+    targets = None  # numpy.ndarray, rows of chosen targets, targets[k] is chased by pursuers[k]
+
+    def __init__(self):
+        self.rules = {}
+        self.pursuers = np.zeros(0, dtype=np.int64)
+        self.targets = np.zeros(0, dtype=np.int64)
+
+    def setRule(self, species, rule):
+        """
+        :param species: species id that chases prey
+        :param rule: how it chases, None stops it from chasing
+        :type rule: PursuitRule
+        :return: None
+        """
+        if rule is None:
+            self.rules.pop(species, None)
+        else:
+            self.rules[species] = rule
+
+    def targetsOf(self, row):
+        """
+        :param row: row of a pursuer
+        :return: rows of the targets it chose in the last steer
+        :rtype: numpy.ndarray
+        """
+        return self.targets[self.pursuers == row]
+
+    def steer(self, positions, species, hidden=None, active=None):
+        """
+        Choose the targets of all pursuers and sum their steering toward them
+
+        :param positions: position of every object
+        :type positions: numpy.ndarray(n, 3)
+        :param species: species id of every object
+        :type species: numpy.ndarray(n)
+        :param hidden: bool mask of objects that cannot be chosen as targets, e.g. eaten ones
+        :param active: bool mask of pursuers that choose targets in this steer, by default all of them
+        :return: velocity change of every object
+        :rtype: numpy.ndarray(n, 3)
+        """
+        total = np.zeros((len(positions), 3))
+        pursuers = []
+        targets = []
+        trees = {}
+        for hunter, rule in sorted(self.rules.items()):
+            rows = species == hunter
+            if active is not None:
+                rows &= active
+            rows = np.flatnonzero(rows)
+            if len(rows) == 0:
+                continue
+            # one tree per set of hunted species, shared by all pursuing species hunting the same
+            if rule.prey not in trees:
+                usable = np.isin(species, rule.prey)
+                if hidden is not None:
+                    usable &= ~hidden
+                prey = np.flatnonzero(usable)
+                trees[rule.prey] = (prey, KDTree(positions[prey]))
+            prey, tree = trees[rule.prey]
+            if len(prey) == 0:
+                continue
+            if rule.perception is None:
+                found, _ = tree.query(positions[rows], rule.k, rule.kernel.cutoff)
+                owner, slot = np.nonzero(found >= 0)
+                chosen = found[owner, slot]
+            else:
+                owner, chosen = tree.queryBatch(positions[rows], min(rule.perception, rule.kernel.cutoff))
+            hunters = rows[owner]
+            chosen = prey[chosen]
+            keep = hunters != chosen
+            hunters, chosen = hunters[keep], chosen[keep]
+            d = positions[chosen] - positions[hunters]
+            force = d * rule.kernel.weight(np.einsum("ij,ij->i", d, d))[:, None]
+            for axis in range(3):
+                total[:, axis] += np.bincount(hunters, weights=force[:, axis], minlength=len(positions))
+            pursuers.append(hunters)
+            targets.append(chosen)
+        self.pursuers = np.concatenate(pursuers) if pursuers else np.zeros(0, dtype=np.int64)
+        self.targets = np.concatenate(targets) if targets else np.zeros(0, dtype=np.int64)
+        return total
@@ -0,0 +1,242 @@
+"""
+Define the static geometry of our Vivarium: the inside of the tank and any number of obstacles like rocks or plants,
+baked into one signed distance field on a regular grid. Every node stores the distance to the closest solid surface,
+positive in open water and negative inside walls or obstacles, together with the gradient of that distance, which
+points away from the closest surface. Creatures look up distance and surface normal of all their positions with one
+interpolation, so the cost of a tick does not depend on how many obstacles there are.
+The grid is only baked again when obstacles are added or removed.
+First version Created on 10/18/2026
+
+:author: Zack (Wanzhi Wang)
+:version: 2026.10.18
+"""
+import numpy as np
+
+from EnvironmentField import FieldSource, trilinear
+
+
+class Obstacle:
+    """
+    Interface of a solid obstacle. Subclasses implement distance.
+    """
+
+    def distance(self, points):
+        """
+        :param points: positions
+        :type points: numpy.ndarray(m, 3)
+        :return: signed distance of every point to the surface of the obstacle, negative inside
+        :rtype: numpy.ndarray(m)
+        """
+        raise NotImplementedError("distance method not implemented yet")
+
+
+class SphereObstacle(Obstacle):
+    """
+    A round rock
+    """
+    center = None  # numpy.ndarray(3)
+    radius = 1.0  # float
+
+    def __init__(self, center, radius):
+        self.center = np.array(center, dtype=float)
+        self.radius = radius
+
+    def distance(self, points):
+        return np.linalg.norm(points - self.center, axis=1) - self.radius
+
+
+class BoxObstacle(Obstacle):
+    """
+    An axis aligned block
+    """
+    lower = None  # numpy.ndarray(3), lower corner
+    upper = None  # numpy.ndarray(3), upper corner
+
+    def __init__(self, lower, upper):
+        self.lower = np.array(lower, dtype=float)
+        self.upper = np.array(upper, dtype=float)
+
+    def distance(self, points):
+        center = (self.lower + self.upper) / 2
+        q = np.abs(points - center) - (self.upper - self.lower) / 2
+        outside = np.linalg.norm(np.clip(q, 0, None), axis=1)
+        inside = np.minimum(np.max(q, axis=1), 0)
+        return outside + inside
+
+
+class CylinderObstacle(Obstacle):
+    """
+    A vertical column standing on the tank floor, e.g. the stem of a plant
+    """
+    center = None  # numpy.ndarray(2), x and z of the axis
+    radius = 0.1  # float
+    bottom = 0.0  # float, lowest y
+    top = 1.0  # float, highest y
+
+    def __init__(self, center, radius, bottom, top):
+        """
+        :param center: x and z of the axis
+        :param radius: radius of the column
+        :param bottom: lowest y of the column
+        :param top: highest y of the column
+        """
+        self.center = np.array(center, dtype=float)
+        self.radius = radius
+        self.bottom = bottom
+        self.top = top
+
+    def distance(self, points):
+        radial = np.linalg.norm(points[:, [0, 2]] - self.center, axis=1) - self.radius
+        height = np.abs(points[:, 1] - (self.bottom + self.top) / 2) - (self.top - self.bottom) / 2
+        q = np.stack((radial, height), axis=1)
+        return np.linalg.norm(np.clip(q, 0, None), axis=1) + np.minimum(np.max(q, axis=1), 0)
+
+
+class SignedDistanceField:
+    """
+    Distance to the closest solid surface, tank walls included, on a grid with nodes on the tank walls
+    """
+    half = None  # numpy.ndarray(3), half size of the tank
+    origin = None  # numpy.ndarray(3), lower corner of the tank
+    spacing = None  # numpy.ndarray(3), distance between neighboring nodes along every axis
+    dims = None  # numpy.ndarray(3), number of nodes along every axis
+    obstacles = None  # list<Obstacle>
+    values = None  # numpy.ndarray(nx, ny, nz, 4), signed distance and its gradient at every node
+    version = 0  # int, raised whenever obstacles changed
+
+    def __init__(self, tank_dimensions, resolution=0.1):
+        """
+        :param tank_dimensions: size of the tank along x, y and z. The tank is centered at origin
+        :type tank_dimensions: list
+        :param resolution: max distance between neighboring grid nodes
+        :type resolution: float
+        """
+        size = np.asarray(tank_dimensions, dtype=float)
+        self.half = size / 2
+        self.origin = -self.half
+        self.dims = np.maximum(2, np.ceil(size / resolution).astype(np.int64) + 1)
+        self.spacing = size / (self.dims - 1)
+        self.obstacles = []
+        self.version = 0
+        self.bake()
+
+    def addObstacle(self, obstacle):
+        """
+        :type obstacle: Obstacle
+        :return: None
+        """
+        self.obstacles.append(obstacle)
+        self.bake()
+
+    def removeObstacle(self, obstacle):
+        """
+        :type obstacle: Obstacle
+        :return: None
+        """
+        self.obstacles.remove(obstacle)
+        self.bake()
+
+    def nodePositions(self):
+        """
+        :return: position of every grid node
+        :rtype: numpy.ndarray(nx, ny, nz, 3)
+        """
+        axes = [self.origin[k] + np.arange(self.dims[k]) * self.spacing[k] for k in range(3)]
+        return np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1)
+
+    def distance(self, points):
+        """
+        Exact signed distance of points to the closest wall or obstacle, without the grid
+
+        :param points: positions
+        :type points: numpy.ndarray(m, 3)
+        :rtype: numpy.ndarray(m)
+        """
+        result = np.min(self.half - np.abs(points), axis=1)
+        for obstacle in self.obstacles:
+            result = np.minimum(result, obstacle.distance(points))
+        return result
+
+    def bake(self):
+        """
+        Compute distance and gradient at every node, this is the only place where obstacles are visited one by one
+        """
+        nodes = self.nodePositions()
+        distance = self.distance(nodes.reshape(-1, 3)).reshape(tuple(self.dims))
+        gradient = np.gradient(distance, *self.spacing)
+        self.values = np.stack([distance] + list(gradient), axis=-1)
+        self.version += 1
+
+    def sample(self, points):
+        """
+        Look up distance and surface normal of all points with one interpolation
+
+        :param points: positions
+        :type points: numpy.ndarray(n, 3)
+        :return: signed distance of every point to the closest solid surface, and unit normal pointing away from it
+        """
+        values = trilinear(self.values, self.origin, self.spacing, np.asarray(points, dtype=float).reshape(-1, 3))
+        gradient = values[:, 1:]
+        length = np.linalg.norm(gradient, axis=1, keepdims=True)
+        normal = np.divide(gradient, length, out=np.zeros_like(gradient), where=length > 0)
+        return values[:, 0], normal
+
+    def collide(self, positions, velocities, radii, bouncing, landing=0.7):
+        """
+        Push spheres that reach into walls or obstacles back out along the surface normal. Bouncing spheres reflect
+        their velocity about the surface. The others stop once they land on a surface facing against their motion,
+        and keep their velocity otherwise, so that being pushed out every step makes them slide along the surface.
+
+        :param positions: center of every sphere, changed in place
+        :type positions: numpy.ndarray(n, 3)
+        :param velocities: velocity of every sphere, changed in place
+        :type velocities: numpy.ndarray(n, 3)
+        :param radii: radius of every sphere
+        :type radii: numpy.ndarray(n)
+        :param bouncing: bool mask of spheres that bounce off surfaces
+        :type bouncing: numpy.ndarray(n)
+        :param landing: cosine between surface normal and reversed motion above which a sphere that does not bounce
+            lands and stops
+        :type landing: float
+        :return: rows that touched a surface
+        :rtype: numpy.ndarray
+        """
+        distance, normal = self.sample(positions)
+        rows = np.flatnonzero(distance < radii)
+        if len(rows) == 0:
+            return rows
+        normal = normal[rows]
+        positions[rows] += (radii[rows] - distance[rows])[:, None] * normal
+        into = np.einsum("ij,ij->i", velocities[rows], normal)
+        bounce = bouncing[rows] & (into < 0)
+        velocities[rows[bounce]] -= (2 * into[bounce])[:, None] * normal[bounce]
+        speed = np.linalg.norm(velocities[rows], axis=1)
+        land = ~bouncing[rows] & (-into > landing * speed) & (speed > 0)
+        velocities[rows[land]] = 0
+        return rows
+
+
+class ObstacleRepulsion(FieldSource):
+    """
+    Push creatures away from walls and obstacles once they get closer than reach to one of them, read from a signed
+    distance field. The push grows linearly from 0 at reach to strength at the surface.
+    """
+    geometry = None  # SignedDistanceField
+    strength = 0.01  # float
+    reach = 0.5  # float
+
+    def __init__(self, geometry, targets, strength=0.01, reach=0.5):
+        """
+        :param geometry: static geometry to stay away from
+        :type geometry: SignedDistanceField
+        :param targets: species ids pushed away
+        :type targets: tuple<int>
+        """
+        self.geometry = geometry
+        self.targets = tuple(targets)
+        self.strength = strength
+        self.reach = reach
+
+    def evaluate(self, points, target):
+        distance, normal = self.geometry.sample(points)
+        return (self.strength * np.clip(1 - distance / self.reach, 0, 1))[:, None] * normal
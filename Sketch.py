@@ -205,6 +205,9 @@ class Sketch(CanvasBase):
             self.update()
         elif chr(keycode) in "fF":
             self.vivarium.add_food()
+        elif chr(keycode) in "gG":
+            # food rain
+            self.vivarium.rain_food(1000)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,245 @@
+"""
+Define a uniform spatial hash grid used for neighbor queries between creatures.
+Space of the tank is divided into cubic cells, every point is hashed into the cell it falls in and points are sorted
+by their cell key, so a radius query only needs to look at the few cells around it instead of scanning every object.
+First version Created on 10/18/2026
+
+:author: Zack (Wanzhi Wang)
+:version: 2026.10.18
+"""
+import math
+import numpy as np
+
+
+class SpatialHashGrid:
+    """
+    A uniform grid over the tank, rebuilt from an array of positions once per tick.
+
+    Points outside of the tank are clamped into the border cells, so they can still be found.
+    All indices returned by queries are row indices into the positions given to build.
+    """
+    cell_size = 1.0  # float, edge length of a cubic cell
+    origin = None  # numpy.ndarray(3), lower corner of the grid
+    dims = None  # numpy.ndarray(3), number of cells along every axis
+
+    positions = None  # numpy.ndarray(n, 3), positions the grid was built with
+    columns = None  # numpy.ndarray(3, n), x, y and z of all positions, see squaredDistances
+    order = None  # numpy.ndarray(n), indices of positions sorted by cell key
+    rank = None  # numpy.ndarray(n), place of every position in order
+    cell_keys = None  # numpy.ndarray(m), sorted keys of non-empty cells
+    cell_start = None  # numpy.ndarray(m), start of every cell in order
+    cell_count = None  # numpy.ndarray(m), number of points in every cell
+    cell_slot = None  # numpy.ndarray, index into cell_keys of every cell key, -1 for empty cells. None if too large
+    max_dense_cells = 1 << 22  # int, grids with more cells look up keys with binary search instead of cell_slot
+
+    def __init__(self, tank_dimensions, cell_size):
+        """
+        :param tank_dimensions: size of the tank along x, y and z. The tank is centered at origin
+        :type tank_dimensions: list
+        :param cell_size: edge length of a cell
+        :type cell_size: float
+        """
+        half = np.asarray(tank_dimensions, dtype=float) / 2
+        self.origin = -half
+        self.cell_size = float(cell_size)
+        self.dims = np.maximum(1, np.ceil(2 * half / self.cell_size)).astype(np.int64)
+        self.build(np.zeros((0, 3)))
+
+    @staticmethod
+    def cellSizeFor(tank_dimensions, radii, max_cells=64):
+        """
+        Pick a cell size for contact queries: a cell should hold the largest bounding sphere, so touching spheres are
+        always in neighboring cells, and the grid should not be finer than max_cells along the longest tank side.
+
+        :param tank_dimensions: size of the tank along x, y and z
+        :param radii: bounding radius of every object
+        :param max_cells: max number of cells along one axis
+        :rtype: float
+        """
+        largest = float(np.max(radii)) if len(radii) > 0 else 0.0
+        return max(2 * largest, max(tank_dimensions) / max_cells, 1e-6)
+
+    def _cellCoords(self, points):
+        coords = np.floor((points - self.origin) / self.cell_size).astype(np.int64)
+        return np.clip(coords, 0, self.dims - 1)
+
+    def _cellKeys(self, coords):
+        return (coords[..., 0] * self.dims[1] + coords[..., 1]) * self.dims[2] + coords[..., 2]
+
+    def build(self, positions):
+        """
+        Hash all positions into the grid, this replaces whatever the grid held before.
+
+        :param positions: points to store
+        :type positions: numpy.ndarray(n, 3)
+        :return: None
+        """
+        self.positions = np.array(positions, dtype=float).reshape(-1, 3)
+        self.columns = np.ascontiguousarray(self.positions.T)
+        keys = self._cellKeys(self._cellCoords(self.positions))
+        self.order = np.argsort(keys, kind="stable")
+        self.rank = np.empty(len(keys), dtype=np.int64)
+        self.rank[self.order] = np.arange(len(keys))
+        keys = np.take(keys, self.order)
+        first = np.ones(len(keys), dtype=bool)
+        first[1:] = keys[1:] != keys[:-1]
+        self.cell_start = np.flatnonzero(first)
+        self.cell_keys = np.take(keys, self.cell_start)
+        self.cell_count = np.diff(np.append(self.cell_start, len(keys)))
+        total = int(np.prod(self.dims))
+        if total <= self.max_dense_cells:
+            self.cell_slot = np.full(total, -1, dtype=np.int64)
+            self.cell_slot[self.cell_keys] = np.arange(len(self.cell_keys))
+        else:
+            self.cell_slot = None
+
+    def _candidates(self, points, radius, half=False, rows=None):
+        """
+        Collect all stored points in cells touched by spheres of given radius around the query points
+
+        :param half: the query points are the stored points, only visit half of the neighbor cells and report every
+            pair of points once
+        :param rows: with half, only the stored points of these indices are query points. Every pair is still found
+            from one of its points only, so disjoint rows find disjoint pairs
+        :return: query indices and item indices of candidate pairs
+        """
+        if rows is not None:
+            points = np.take(points, rows, axis=0)
+        if len(points) == 0 or len(self.cell_keys) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        reach = max(1, int(math.ceil(radius / self.cell_size)))
+        coords = self._cellCoords(points)
+        steps = np.arange(-reach, reach + 1)
+        offsets = np.stack(np.meshgrid(steps, steps, steps, indexing="ij"), axis=-1).reshape(-1, 3)
+        if half:
+            # a cell and the cells after it in lexicographic order, the other half sees the same pairs reversed
+            offsets = offsets[len(offsets) // 2:]
+        # all neighbor cells of all query points at once, one row per query point and one column per offset. Keys are
+        # linear in the cell coordinates, so the key of a neighbor cell is the key of the cell plus that of the offset
+        inside = np.ones((len(coords), len(offsets)), dtype=bool)
+        for axis in range(3):
+            neighbor = coords[:, axis, None] + offsets[None, :, axis]
+            inside &= (neighbor >= 0) & (neighbor < self.dims[axis])
+        flat = np.flatnonzero(inside)
+        owner, offset = np.divmod(flat, len(offsets))
+        keys = np.take(self._cellKeys(coords), owner) + np.take(self._cellKeys(offsets), offset)
+        if self.cell_slot is not None:
+            slot = self.cell_slot[keys]
+            found = slot >= 0
+        else:
+            slot = np.minimum(np.searchsorted(self.cell_keys, keys), len(self.cell_keys) - 1)
+            found = self.cell_keys[slot] == keys
+        found = np.flatnonzero(found)
+        owner, offset, slot = np.take(owner, found), np.take(offset, found), np.take(slot, found)
+        start = np.take(self.cell_start, slot)
+        count = np.take(self.cell_count, slot)
+        if half:
+            # points sharing a cell would see each other from both sides, so in its own cell, which is the first
+            # offset, a point only sees the points after it in order
+            own = np.flatnonzero(offset == 0)
+            stored = np.take(owner, own) if rows is None else np.take(rows, np.take(owner, own))
+            end = np.take(start, own) + np.take(count, own)
+            start[own] = np.take(self.rank, stored) + 1
+            count[own] = end - start[own]
+        queries, position = expandRanges(owner, start, count)
+        if rows is not None:
+            queries = np.take(rows, queries)
+        return queries, np.take(self.order, position)
+
+    def queryBatch(self, points, radius):
+        """
+        Find all stored points within radius of every query point
+
+        :param points: query points
+        :type points: numpy.ndarray(m, 3)
+        :param radius: query radius
+        :type radius: float
+        :return: two arrays, index of the query point and index of the stored point of every match
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        q, item = self._candidates(points, radius)
+        distance2 = squaredDistances(self.columns, item, np.ascontiguousarray(points.T), q)
+        keep = np.flatnonzero(distance2 <= radius * radius)
+        return np.take(q, keep), np.take(item, keep)
+
+    def queryRadius(self, point, radius):
+        """
+        Find all stored points within radius of one point
+
+        :param point: query point
+        :param radius: query radius
+        :type radius: float
+        :return: indices of stored points
+        :rtype: numpy.ndarray
+        """
+        return self.queryBatch(np.asarray(point, dtype=float)[None, :], radius)[1]
+
+    def pairsWithin(self, radius, rows=None):
+        """
+        Find all pairs (i, j) of stored points closer than radius, every pair is reported once
+
+        :param radius: query radius
+        :type radius: float
+        :param rows: only find the part of the pairs searched from these stored points, all pairs by default
+        :type rows: numpy.ndarray
+        :return: two arrays of indices
+        """
+        i, j = self._candidates(self.positions, radius, half=True, rows=rows)
+        keep = np.flatnonzero(squaredDistances(self.columns, i, self.columns, j) <= radius * radius)
+        return np.take(i, keep), np.take(j, keep)
+
+    def selfPairs(self, radii, rows=None):
+        """
+        Find all pairs (i, j), i < j, of stored points whose bounding spheres overlap
+
+        :param radii: bounding radius of every stored point
+        :type radii: numpy.ndarray(n)
+        :param rows: only find the part of the pairs searched from these stored points, see pairsWithin
+        :type rows: numpy.ndarray
+        :return: two arrays of indices
+        """
+        radii = np.asarray(radii, dtype=float)
+        if len(radii) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        i, j = self._candidates(self.positions, 2 * float(np.max(radii)), half=True, rows=rows)
+        reach = np.take(radii, i) + np.take(radii, j)
+        hit = np.flatnonzero(squaredDistances(self.columns, i, self.columns, j) <= reach * reach)
+        i, j = np.take(i, hit), np.take(j, hit)
+        return np.minimum(i, j), np.maximum(i, j)
+
+
+def expandRanges(owner, start, count):
+    """
+    Expand ranges [start, start + count) into flat positions, every position is tagged with the owner of its range
+    """
+    total = int(np.sum(count))
+    if total == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    tagged = np.repeat(owner, count)
+    shift = np.repeat(start - (np.cumsum(count) - count), count)
+    return tagged, shift + np.arange(total)
+
+
+def squaredDistances(a, i, b, j):
+    """
+    Squared distance of every pair of points a[i] and b[j], with a and b given as coordinate rows (3, n). Gathering
+    one coordinate at a time is much faster than gathering whole points for the long candidate lists of the grid
+    """
+    total = np.zeros(len(i))
+    for axis in range(3):
+        d = np.take(a[axis], i)
+        d -= np.take(b[axis], j)
+        d *= d
+        total += d
+    return total
+
+
+def uniqueSorted(values):
+    """
+    Sorted distinct values of an integer array like numpy.unique, but by sorting instead of hashing, which is much
+    faster for the large key arrays of pair lists
+    """
+    values = np.sort(values)
+    first = np.ones(len(values), dtype=bool)
+    first[1:] = values[1:] != values[:-1]
+    return values[first]
@@ -0,0 +1,132 @@
+"""
+Define the species interaction table of our Vivarium here. Instead of branching on species ids inside every creature,
+how two species interact is declared once: who eats whom, who bounces off whom, and who is attracted to or repelled
+by whom with which potential kernel. The table is turned into boolean matrices indexed by species ids, so a contact pass
+finds the outcome of all pairs with one lookup of species[i], species[j] instead of Python branches per pair.
+A new species only needs new rows in this table.
+First version Created on 10/18/2026
+
+:author: Zack (Wanzhi Wang)
+:version: 2026.10.18
+"""
+import numpy as np
+
+from PotentialField import PotentialField, GaussianKernel
+
+
+class SpeciesInteractions:
+    """
+    Table of interactions keyed by species id pairs
+    """
+    eats = None  # set<tuple<int, int>>, (eater, eaten) pairs
+    bounces = None  # set<tuple<int, int>>, pairs bouncing off each other, stored with the smaller id first
+    kernels = None  # dict<tuple<int, int>, Kernel>, potential kernel of (steered species, source species)
+
+    def __init__(self):
+        self.eats = set()
+        self.bounces = set()
+        self.kernels = {}
+
+    def setEats(self, eater, eaten, enabled=True):
+        """
+        Let creatures of species eater eat objects of species eaten as soon as they touch
+        """
+        if enabled:
+            self.eats.add((eater, eaten))
+        else:
+            self.eats.discard((eater, eaten))
+
+    def setBounces(self, a, b, enabled=True):
+        """
+        Let two species (or one species with itself) bounce apart when they touch
+        """
+        pair = (min(a, b), max(a, b))
+        if enabled:
+            self.bounces.add(pair)
+        else:
+            self.bounces.discard(pair)
+
+    def setAttraction(self, target, source, kernel):
+        """
+        Let creatures of species target steer toward objects of species source
+
+        :param kernel: potential kernel, its strength is made positive. None removes the interaction
+        :type kernel: Kernel
+        """
+        if kernel is not None:
+            kernel.strength = abs(kernel.strength)
+        self._setKernel(target, source, kernel)
+
+    def setRepulsion(self, target, source, kernel):
+        """
+        Let creatures of species target steer away from objects of species source
+
+        :param kernel: potential kernel, its strength is made negative. None removes the interaction
+        :type kernel: Kernel
+        """
+        if kernel is not None:
+            kernel.strength = -abs(kernel.strength)
+        self._setKernel(target, source, kernel)
+
+    def _setKernel(self, target, source, kernel):
+        if kernel is None:
+            self.kernels.pop((target, source), None)
+        else:
+            self.kernels[(target, source)] = kernel
+
+    def speciesCount(self):
+        """
+        :return: size of the interaction matrices, one more than the largest species id in the table
+        :rtype: int
+        """
+        ids = [s for pair in list(self.eats) + list(self.bounces) + list(self.kernels) for s in pair]
+        return max(ids, default=-1) + 1
+
+    def eatMatrix(self, size=None):
+        """
+        :param size: number of species ids to cover, by default all species in the table
+        :return: matrix whose entry [a, b] tells if species a eats species b
+        :rtype: numpy.ndarray(size, size), bool
+        """
+        matrix = np.zeros((size or self.speciesCount(),) * 2, dtype=bool)
+        for eater, eaten in self.eats:
+            matrix[eater, eaten] = True
+        return matrix
+
+    def bounceMatrix(self, size=None):
+        """
+        :param size: number of species ids to cover, by default all species in the table
+        :return: symmetric matrix whose entry [a, b] tells if species a and b bounce apart
+        :rtype: numpy.ndarray(size, size), bool
+        """
+        matrix = np.zeros((size or self.speciesCount(),) * 2, dtype=bool)
+        for a, b in self.bounces:
+            matrix[a, b] = matrix[b, a] = True
+        return matrix
+
+    def potentialField(self, theta=None):
+        """
+        :param theta: opening angle of Barnes-Hut mode, see PotentialField
+        :return: potential field with all attractions and repulsions of the table
+        :rtype: PotentialField
+        """
+        field = PotentialField(theta)
+        for (target, source), kernel in self.kernels.items():
+            field.setKernel(target, source, kernel)
+        return field
+
+
+def defaultInteractions(food=0, prey=1, predator=2):
+    """
+    Food chain of our Vivarium: predators eat prey and food, prey eat food, creatures of one species bounce apart,
+    and every creature is attracted to what it eats with a Gaussian potential cut off at distance 3
+
+    :rtype: SpeciesInteractions
+    """
+    table = SpeciesInteractions()
+    for eater, eaten in ((predator, prey), (predator, food), (prey, food)):
+        table.setEats(eater, eaten)
+        table.setAttraction(eater, eaten, GaussianKernel(cutoff=3.0))
+    table.setBounces(prey, prey)
+    table.setBounces(predator, predator)
+    return table
@@ -0,0 +1,270 @@
+"""
+Define per part bounding volumes of our creatures for the narrow phase of collision detection. One bounding sphere per
+creature catches a prey long before the hooks of a predator get anywhere near it. Here every Displayable of a
+creature reports a local bounding sphere, which is carried into the frame of the tank by the world transform of its
+Component from forward kinematics, so the spheres follow the current joint pose. The part spheres of a creature are
+gathered under one root sphere that encloses all of them, giving a two level sphere tree per creature.
+Pairs that passed the coarse test on bounding radii are tested against the root spheres first, and only pairs that
+still touch compare their part spheres, so most pairs are rejected early. Parts of an object take one block of slots
+from a BlockPool and objects are swap-removed like in an EntityPool, so adding or removing an object only touches its
+own parts.
+First version Created on 10/18/2026
+
+:author: Zack (Wanzhi Wang)
+:version: 2026.10.18
+"""
+import numpy as np
+
+from EntityRegistry import BlockPool
+from SpatialHashGrid import expandRanges
+from ContinuousCollision import sweptSpheres
+
+
+class SphereTree:
+    """
+    Part spheres of every added object, parts of one object are kept next to each other. Free part slots have no
+    component and belong to no object. Objects must leave the sphere tree before they leave the forward kinematics.
+    """
+    kinematics = None  # ForwardKinematics, world transforms of all parts
+    owners = None  # list<Component>, root of every object with parts
+    slots = None  # dict<int, int>, index in owners keyed by id of the root
+    part_start = None  # numpy.ndarray(capacity), first part of every object
+    part_count = None  # numpy.ndarray(capacity), number of parts of every object
+    root_nodes = None  # numpy.ndarray(capacity), node index of every root in kinematics
+    pool = None  # BlockPool, part slots of every object
+    parts = None  # list<Component>, component of every part sphere, None in free slots
+    part_owner = None  # numpy.ndarray(p), index in owners of every part, -1 in free slots
+    part_centers = None  # numpy.ndarray(p, 3), center of every part sphere in the frame of its component
+    part_radii = None  # numpy.ndarray(p), radius of every part sphere in the frame of its component
+    part_nodes = None  # numpy.ndarray(p), node index of every part in kinematics
+
+    offsets = None  # numpy.ndarray(p, 3), center of every part sphere relative to the root of its object
+    radii = None  # numpy.ndarray(p), radius of every part sphere in the frame of the tank
+    root_offsets = None  # numpy.ndarray(o, 3), center of the root sphere of every object relative to its root
+    root_radii = None  # numpy.ndarray(o), radius of the root sphere of every object
+    version = -1  # int, forward kinematics version the spheres were computed from
+
+    tested = 0  # int, pairs given to the last narrow phase
+    rejected = 0  # int, pairs of the last narrow phase whose root spheres did not touch
+
+    def __init__(self, kinematics, capacity=64):
+        """
+        :param kinematics: forward kinematics the roots of all objects are added to
+        :type kinematics: ForwardKinematics
+        :param capacity: number of objects and of part spheres to allocate for up front
+        :type capacity: int
+        """
+        self.kinematics = kinematics
+        self.owners = []
+        self.slots = {}
+        self.part_start = np.zeros(capacity, dtype=np.int64)
+        self.part_count = np.zeros(capacity, dtype=np.int64)
+        self.root_nodes = np.zeros(capacity, dtype=np.int64)
+        self.pool = BlockPool()
+        self.parts = [None] * capacity
+        self.part_owner = np.full(capacity, -1, dtype=np.int64)
+        self.part_centers = np.zeros((capacity, 3))
+        self.part_radii = np.zeros(capacity)
+        self.part_nodes = np.zeros(capacity, dtype=np.int64)
+        self.version = -1
+
+    def __contains__(self, root):
+        return id(root) in self.slots
+
+    def add(self, root):
+        """
+        Collect the bounding spheres of all displayables in the tree below a root
+
+        :param root: root of an object added to kinematics, e.g. a creature
+        :type root: Component
+        :return: None
+        """
+        if root in self:
+            raise ValueError("object already has part spheres")
+        if root not in self.kinematics:
+            raise ValueError("object has no forward kinematics")
+        parts = []
+        centers = []
+        radii = []
+        stack = [root]
+        while stack:
+            c = stack.pop()
+            stack.extend(c.children)
+            bound = c.display_obj.boundingSphere() if c.display_obj is not None else None
+            if bound is not None:
+                parts.append(c)
+                centers.append(bound[0])
+                radii.append(bound[1])
+        m = len(parts)
+        start = self.pool.allocate(m)
+        if start + m > len(self.parts):
+            self._growParts(start + m)
+        slot = len(self.owners)
+        if slot >= len(self.part_start):
+            self._growOwners()
+        block = slice(start, start + m)
+        self.parts[block] = parts
+        self.part_owner[block] = slot
+        self.part_centers[block] = np.array(centers, dtype=float).reshape(-1, 3)
+        self.part_radii[block] = radii
+        self.part_nodes[block] = [self.kinematics.index[id(c)] for c in parts]
+        self.part_start[slot] = start
+        self.part_count[slot] = m
+        self.root_nodes[slot] = self.kinematics.index[id(root)]
+        self.slots[id(root)] = slot
+        self.owners.append(root)
+        self.version = -1
+
+    def remove(self, root):
+        """
+        Drop the part spheres of a root added before, the last object takes its slot
+
+        :param root: root of the object
+        :type root: Component
+        :return: None
+        """
+        if root not in self:
+            raise ValueError("object has no part spheres")
+        slot = self.slots.pop(id(root))
+        start = int(self.part_start[slot])
+        m = int(self.part_count[slot])
+        block = slice(start, start + m)
+        self.parts[block] = [None] * m
+        self.part_owner[block] = -1
+        self.part_radii[block] = 0
+        self.pool.release(start, m)
+
+        last = self.owners.pop()
+        if last is not root:
+            moved = len(self.owners)
+            self.owners[slot] = last
+            self.slots[id(last)] = slot
+            self.part_start[slot] = self.part_start[moved]
+            self.part_count[slot] = self.part_count[moved]
+            self.root_nodes[slot] = self.root_nodes[moved]
+            self.part_owner[self.part_start[slot]:self.part_start[slot] + self.part_count[slot]] = slot
+        self.version = -1
+
+    def _growParts(self, size):
+        """
+        Double the part capacity until size parts fit
+        """
+        capacity = max(len(self.parts), 1)
+        while capacity < size:
+            capacity *= 2
+        extra = capacity - len(self.parts)
+        self.parts.extend([None] * extra)
+        self.part_owner = np.concatenate((self.part_owner, np.full(extra, -1, dtype=np.int64)))
+        self.part_centers = np.concatenate((self.part_centers, np.zeros((extra, 3))))
+        self.part_radii = np.concatenate((self.part_radii, np.zeros(extra)))
+        self.part_nodes = np.concatenate((self.part_nodes, np.zeros(extra, dtype=np.int64)))
+
+    def _growOwners(self):
+        """
+        Double the capacity of the per object arrays
+        """
+        self.part_start = np.concatenate((self.part_start, np.zeros_like(self.part_start)))
+        self.part_count = np.concatenate((self.part_count, np.zeros_like(self.part_count)))
+        self.root_nodes = np.concatenate((self.root_nodes, np.zeros_like(self.root_nodes)))
+
+    def refresh(self):
+        """
+        Carry all part spheres into the current pose and fit the root spheres around them, skipped if the forward
+        kinematics did not change since the last refresh
+
+        :return: None
+        """
+        kinematics = self.kinematics
+        kinematics.refresh()
+        if self.version == kinematics.version:
+            return
+        live = np.flatnonzero(self.part_owner >= 0)
+        owner = self.part_owner[live]
+        world = kinematics.world[self.part_nodes[live]]
+        centers = np.einsum("pij,pj->pi", world[:, :3, :3], self.part_centers[live]) + world[:, :3, 3]
+        self.offsets = np.zeros((len(self.parts), 3))
+        self.radii = np.zeros(len(self.parts))
+        offsets = centers - kinematics.world[self.root_nodes[owner], :3, 3]
+        # scaling may stretch a sphere along one axis, the largest stretch still encloses it
+        radii = self.part_radii[live] * np.linalg.norm(world[:, :3, :3], ord=2, axis=(1, 2))
+        self.offsets[live] = offsets
+        self.radii[live] = radii
+
+        o = len(self.owners)
+        lower = np.full((o, 3), np.inf)
+        upper = np.full((o, 3), -np.inf)
+        np.minimum.at(lower, owner, offsets - radii[:, None])
+        np.maximum.at(upper, owner, offsets + radii[:, None])
+        empty = self.part_count[:o] == 0
+        lower[empty] = upper[empty] = 0
+        self.root_offsets = (lower + upper) / 2
+        reach = np.linalg.norm(offsets - self.root_offsets[owner], axis=1) + radii
+        self.root_radii = np.zeros(o)
+        np.maximum.at(self.root_radii, owner, reach)
+        self.version = kinematics.version
+
+    def narrowPhase(self, world, i, j, d, dv, toi):
+        """
+        Test pairs that passed the coarse test on bounding radii against the sphere trees of their objects. Objects
+        without part spheres are tested with their bounding sphere.
+
+        :param world: world state the rows belong to
+        :type world: WorldState
+        :param i: rows of first objects of pairs
+        :param j: rows of second objects of pairs
+        :param d: positions[j] - positions[i] of every pair
+        :param dv: relative motion of every pair during the step
+        :param toi: time of impact of the bounding spheres of every pair
+        :return: bool mask of pairs whose volumes touch during the step, and the time of impact of every pair
+        """
+        self.tested = len(i)
+        self.rejected = 0
+        rows = np.unique(np.concatenate((i, j)))
+        slot = np.full(world.count, -1, dtype=np.int64)
+        slot[rows] = [self.slots.get(id(world.owners[r]), -1) for r in rows.tolist()]
+        si = slot[i]
+        sj = slot[j]
+        detailed = np.flatnonzero((si >= 0) | (sj >= 0))
+        touching = np.ones(len(i), dtype=bool)
+        toi = toi.copy()
+        if len(detailed) == 0:
+            return touching, toi
+        self.refresh()
+
+        # spheres of all objects in the pairs: part spheres, followed by one bounding sphere for every row without
+        # parts. Roots of rows without parts are their bounding spheres
+        plain = rows[slot[rows] < 0]
+        plain_index = np.full(world.count, -1, dtype=np.int64)
+        plain_index[plain] = len(self.parts) + np.arange(len(plain))
+        offsets = np.concatenate((self.offsets, np.zeros((len(plain), 3))))
+        radii = np.concatenate((self.radii, world.radii[plain]))
+
+        def spheres(row, owner):
+            parted = owner >= 0
+            start = np.where(parted, self.part_start[np.maximum(owner, 0)], plain_index[row])
+            count = np.where(parted, self.part_count[np.maximum(owner, 0)], 1)
+            root_offset = np.where(parted[:, None], self.root_offsets[np.maximum(owner, 0)], 0)
+            root_radius = np.where(parted, self.root_radii[np.maximum(owner, 0)], world.radii[row])
+            return start, count, root_offset, root_radius
+
+        pi, pj, pd, pdv = i[detailed], j[detailed], d[detailed], dv[detailed]
+        start_i, count_i, root_i, reach_i = spheres(pi, si[detailed])
+        start_j, count_j, root_j, reach_j = spheres(pj, sj[detailed])
+
+        # root spheres first
+        near = np.isfinite(sweptSpheres(pd + root_j - root_i, pdv, reach_i + reach_j))
+        touching[detailed[~near]] = False
+        self.rejected = int(np.count_nonzero(~near))
+        detailed, pd, pdv = detailed[near], pd[near], pdv[near]
+        start_i, count_i, start_j, count_j = start_i[near], count_i[near], start_j[near], count_j[near]
+
+        # then every part of one object against every part of the other
+        pair, a = expandRanges(np.arange(len(detailed)), start_i, count_i)
+        side, b = expandRanges(np.arange(len(pair)), start_j[pair], count_j[pair])
+        pair, a = pair[side], a[side]
+        part_toi = sweptSpheres(pd[pair] + offsets[b] - offsets[a], pdv[pair], radii[a] + radii[b])
+        first = np.full(len(detailed), np.inf)
+        np.minimum.at(first, pair, part_toi)
+        touching[detailed] = np.isfinite(first)
+        toi[detailed] = first
+        return touching, toi
@@ -0,0 +1,184 @@
+"""
+Define an incremental sweep and prune broadphase here.
+Every bounding sphere is wrapped in an axis aligned box, and the min/max endpoints of all boxes are kept sorted along
+x, y and z. Creatures only move a tiny bit every tick, so the lists are almost sorted already and an insertion sort
+repairs them with a few swaps. Every swap between a min and a max endpoint tells us that two boxes started or stopped
+overlapping, which is how the set of overlapping pairs is maintained. Point queries bisect the sorted x endpoints, only
+boxes starting at most one box width before the query are tested.
+First version Created on 10/18/2026
+
+:author: Zack (Wanzhi Wang)
+:version: 2026.10.18
+"""
+import bisect
+import numpy as np
+
+from Broadphase import Broadphase
+
+
+class SweepAndPrune(Broadphase):
+    """
+    Sweep and prune over three axes. An endpoint is encoded as handle * 2 + is_max.
+    """
+    margin = 0.0  # float, extra space around every sphere
+    lower = None  # numpy.ndarray(capacity, 3), lower corner of every box
+    upper = None  # numpy.ndarray(capacity, 3), upper corner of every box
+    active = None  # numpy.ndarray(capacity), bool
+    free_handles = None  # list<int>
+    handle_count = 0  # int, number of handles ever given out
+
+    endpoints = None  # list<list<int>>(3), sorted endpoints along every axis
+    values = None  # list<list<float>>(3), position of every endpoint in endpoints
+
+    partners = None  # dict<int, set<int>>, boxes overlapping with a box
+    max_extent = 0.0  # float, widest box seen along x, bounds how far before a query a box can start
+    _pair_cache = None  # tuple of two numpy.ndarray, cached result of candidatePairs
+
+    def __init__(self, margin=0.0):
+        """
+        :param margin: extra space around every sphere
+        :type margin: float
+        """
+        self.margin = margin
+        self.lower = np.zeros((16, 3))
+        self.upper = np.zeros((16, 3))
+        self.active = np.zeros(16, dtype=bool)
+        self.free_handles = []
+        self.handle_count = 0
+        self.endpoints = [[], [], []]
+        self.values = [[], [], []]
+        self.partners = {}
+        self.max_extent = 0.0
+        self._pair_cache = None
+
+    ################# Start of Broadphase interface
+    def insert(self, center, radius):
+        handle = self._allocateHandle()
+        reach = radius + self.margin
+        self.lower[handle] = np.asarray(center, dtype=float) - reach
+        self.upper[handle] = np.asarray(center, dtype=float) + reach
+        self.max_extent = max(self.max_extent, 2 * reach)
+        for axis in range(3):
+            for is_max, value in ((0, self.lower[handle, axis]), (1, self.upper[handle, axis])):
+                k = bisect.bisect_right(self.values[axis], value)
+                self.values[axis].insert(k, float(value))
+                self.endpoints[axis].insert(k, handle * 2 + is_max)
+
+        # find initial partners with one vectorized box test against all other boxes
+        others = np.flatnonzero(self.active)
+        hit = np.all((self.lower[others] <= self.upper[handle]) & (self.lower[handle] <= self.upper[others]), axis=1)
+        self.partners[handle] = set()
+        self.active[handle] = True
+        for other in others[hit]:
+            self._addPair(handle, int(other))
+        return handle
+
+    def remove(self, handle):
+        for axis in range(3):
+            for is_max, value in ((0, self.lower[handle, axis]), (1, self.upper[handle, axis])):
+                code = handle * 2 + is_max
+                k = bisect.bisect_left(self.values[axis], value)
+                while self.endpoints[axis][k] != code:
+                    k += 1
+                del self.values[axis][k]
+                del self.endpoints[axis][k]
+        for other in list(self.partners[handle]):
+            self._removePair(handle, other)
+        del self.partners[handle]
+        self.active[handle] = False
+        self.free_handles.append(handle)
+
+    def refit(self, handles, centers, radii):
+        handles = np.asarray(handles, dtype=np.int64)
+        reach = np.asarray(radii, dtype=float)[:, None] + self.margin
+        self.lower[handles] = centers - reach
+        self.upper[handles] = centers + reach
+        if len(handles) > 0:
+            self.max_extent = max(self.max_extent, 2 * float(reach.max()))
+        lower = self.lower.tolist()
+        upper = self.upper.tolist()
+        for axis in range(3):
+            codes = np.array(self.endpoints[axis], dtype=np.int64)
+            self.values[axis] = np.where(codes & 1, self.upper[codes >> 1, axis],
+                                         self.lower[codes >> 1, axis]).tolist()
+            self._sortAxis(axis, lower, upper)
+
+    def candidatePairs(self):
+        if self._pair_cache is None:
+            first = []
+            second = []
+            for a, others in self.partners.items():
+                for b in others:
+                    if a < b:
+                        first.append(a)
+                        second.append(b)
+            self._pair_cache = (np.array(first, dtype=np.int64), np.array(second, dtype=np.int64))
+        return self._pair_cache
+
+    def query(self, lower, upper):
+        lower = np.asarray(lower, dtype=float)
+        upper = np.asarray(upper, dtype=float)
+        start = bisect.bisect_left(self.values[0], lower[0] - self.max_extent)
+        stop = bisect.bisect_right(self.values[0], upper[0])
+        codes = np.array(self.endpoints[0][start:stop], dtype=np.int64)
+        others = codes[codes & 1 == 0] >> 1
+        hit = np.all((self.lower[others] <= upper) & (lower <= self.upper[others]), axis=1)
+        return others[hit].tolist()
+    ################# End of Broadphase interface
+
+    def _sortAxis(self, axis, lower, upper):
+        """
+        Insertion sort of endpoints along one axis, every swap between a min and a max endpoint updates pairs
+
+        :param lower: lower corners of all boxes as python lists, faster to read than numpy scalars
+        :param upper: upper corners of all boxes as python lists
+        """
+        endpoints = self.endpoints[axis]
+        values = self.values[axis]
+        for k in range(1, len(endpoints)):
+            code = endpoints[k]
+            value = values[k]
+            j = k - 1
+            while j >= 0 and values[j] > value:
+                other = endpoints[j]
+                if not code & 1 and other & 1:
+                    # min of one box moves before max of another: they might start overlapping
+                    a = code >> 1
+                    b = other >> 1
+                    la, ua, lb, ub = lower[a], upper[a], lower[b], upper[b]
+                    if (la[0] <= ub[0] and lb[0] <= ua[0] and la[1] <= ub[1] and lb[1] <= ua[1] and
+                            la[2] <= ub[2] and lb[2] <= ua[2]):
+                        self._addPair(a, b)
+                elif code & 1 and not other & 1:
+                    # max of one box moves before min of another: they stop overlapping
+                    self._removePair(code >> 1, other >> 1)
+                endpoints[j + 1] = other
+                values[j + 1] = values[j]
+                j -= 1
+            endpoints[j + 1] = code
+            values[j + 1] = value
+
+    def _addPair(self, a, b):
+        if b in self.partners[a]:
+            return
+        self.partners[a].add(b)
+        self.partners[b].add(a)
+        self._pair_cache = None
+
+    def _removePair(self, a, b):
+        if b not in self.partners[a]:
+            return
+        self.partners[a].discard(b)
+        self.partners[b].discard(a)
+        self._pair_cache = None
+
+    def _allocateHandle(self):
+        if self.free_handles:
+            return self.free_handles.pop()
+        handle = self.handle_count
+        self.handle_count += 1
+        if handle >= len(self.active):
+            self.lower = np.concatenate((self.lower, np.zeros_like(self.lower)))
+            self.upper = np.concatenate((self.upper, np.zeros_like(self.upper)))
+            self.active = np.concatenate((self.active, np.zeros_like(self.active)))
+        return handle
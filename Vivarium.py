@@ -6,25 +6,56 @@ Created on 20181028
 :version: 2021.11.09
 """
 import random
+import numpy as np
 
 import ColorType
 from Point import Point
 from Component import Component
 from Animation import Animation
 from ModelTank import Tank
-from ModelLinkage import Predator, Prey, Food
+from ModelLinkage import Predator, Prey, Food, FoodParticleCloud, Rock
 from EnvironmentObject import EnvironmentObject
+from WorldState import WorldState, WorldRowView, FOOD, PREY, PREDATOR
+from EnvironmentField import EnvironmentField, UniformCurrent
+from Flocking import Flocking, FlockRule
+from SweepAndPrune import SweepAndPrune
+from EntityRegistry import EntityRegistry, EntityPool
+from LifecycleEvents import LifecycleQueue
+from FoodParticles import FoodParticles
+from SpeciesInteractions import defaultInteractions
+from Pursuit import Pursuit, PursuitRule
+from SignedDistanceField import SignedDistanceField, SphereObstacle, ObstacleRepulsion
+from Navigation import Navigation, NavigationRule
+from BehaviorScheduler import BehaviorScheduler, BehaviorRate
+from JointAnimation import JointAnimator
+from PoseAtlas import PoseAtlas
+from ForwardKinematics import ForwardKinematics
+from SphereTree import SphereTree
 
 
 class Vivarium(Component, Animation):
     """
     The Vivarium for our animation
     """
-    components = None  # List
+    components = None  # EntityPool, every object in the vivarium
     parent = None  # class that have current context
     tank = None
     tank_dimensions = None
-    creatures = None  # Keep track of the creatures in Tank
+    registry = None  # EntityRegistry, objects in the vivarium by type with stable ids
+    creatures = None  # EntityPool, keep track of the creatures in Tank
+    food = None  # EntityPool, food in Tank
+    world = None  # WorldState, positions and velocities of all creatures in numpy arrays
+    lifecycle = None  # LifecycleQueue, objects eaten, spawned or despawned in the current tick
+    food_particles = None  # FoodParticles, pellets of food rain, simulated in arrays instead of as components
+    food_cloud = None  # FoodParticleCloud, draws all pellets of food_particles at once
+    geometry = None  # SignedDistanceField, tank walls and rocks
+    obstacle_repulsion = None  # ObstacleRepulsion, baked into the environment field, pushes creatures off rocks
+    water_current = None  # UniformCurrent, baked into the environment field, carries creatures along
+    current_velocity = (0.0, 0.0, 0.0)  # tuple, velocity of the water current the vivarium starts with, still water
+    joint_animator = None  # JointAnimator, swings the joints of all creatures together
+    pose_atlas = None  # PoseAtlas, display lists of every creature pose compiled so far
+    kinematics = None  # ForwardKinematics, world transforms of every part of every creature, refreshed on demand
+    sphere_tree = None  # SphereTree, bounding spheres of the parts of every creature in their current pose
 
     ##### BONUS 5(TODO 5 for CS680 Students): Feed your creature
     # Requirements:
@@ -44,10 +75,64 @@ class Vivarium(Component, Animation):
         # Build relationship
         self.addChild(tank)
         self.tank = tank
+        # Children of the tank come and go all the time, so they are kept in a pool with O(1) removal
+        tank.children = EntityPool(tank.children)
+        # Creatures move only a tiny bit every tick, sweep and prune repairs its sorted lists with very few swaps.
+        # BoundingVolumeHierarchy is also a Broadphase and can be used here instead.
+        # Interacting pairs are kept in a neighbor list with a 0.2 skin, which is rebuilt only after a creature moved
+        # 0.1, so the broadphase margin is half of the skin
+        # Walls, rocks and food lying on the floor never move, so their influence is baked into an environment field.
+        # Walls and rocks are kept in one signed distance field, creatures steer away from it and are pushed out of
+        # rocks after moving
+        self.geometry = SignedDistanceField(self.tank_dimensions, resolution=0.1)
+        environment = EnvironmentField(self.tank_dimensions, resolution=0.2)
+        self.obstacle_repulsion = ObstacleRepulsion(self.geometry, (PREY, PREDATOR))
+        environment.addSource(self.obstacle_repulsion)
+        # Water flows through the whole tank with one velocity, still by default, see set_current
+        self.water_current = UniformCurrent(self.current_velocity, (PREY, PREDATOR))
+        environment.addSource(self.water_current)
+        # Preys flock together and flee from predators (BONUS 6)
+        flocking = Flocking()
+        flocking.setRule(PREY, FlockRule(separation_radius=0.5, predators=(PREDATOR,)))
+        # Predators chase only their few nearest preys, found with a KD-tree, instead of summing the pull of all
+        # preys, so their potential toward preys is taken out of the interaction table
+        interactions = defaultInteractions(FOOD, PREY, PREDATOR)
+        pursuit = Pursuit()
+        pursuit.setRule(PREDATOR, PursuitRule((PREY,), k=3, kernel=interactions.kernels[(PREDATOR, PREY)]))
+        interactions.setAttraction(PREDATOR, PREY, None)
+        # Potentials toward food get stuck behind rocks, so creatures also follow a flow field around them to the
+        # closest food. All creatures of the tank head for the same food and share one cached field
+        navigation = Navigation(self.geometry, resolution=0.2, clearance=0.2)
+        navigation.setRule(PREY, NavigationRule((FOOD,), strength=0.005))
+        navigation.setRule(PREDATOR, NavigationRule((FOOD,), strength=0.005))
+        # Preys and predators decide their steering every third and every second tick, spread over the ticks so that
+        # the cost of a tick stays flat. A prey with a predator close by decides every tick to flee in time
+        behavior = BehaviorScheduler()
+        behavior.setRate(PREY, BehaviorRate(period=3, threats=(PREDATOR,), threat_radius=1.5))
+        behavior.setRate(PREDATOR, BehaviorRate(period=2))
+        # Food rain can drop thousands of pellets, they are kept in a particle system instead of the scene graph
+        self.food_particles = FoodParticles(self.tank_dimensions, species=FOOD)
+        # Where every hand and hook of a creature is, computed for all of them together whenever someone asks.
+        # A predator only catches a prey once one of its hooks touches one of its parts
+        self.kinematics = ForwardKinematics()
+        self.sphere_tree = SphereTree(self.kinematics)
+        self.world = WorldState(self.tank_dimensions, broadphase=SweepAndPrune(margin=0.1), neighbor_skin=0.2,
+                                environment=environment, flocking=flocking, particles=self.food_particles,
+                                interactions=interactions, pursuit=pursuit, geometry=self.geometry,
+                                navigation=navigation, behavior=behavior, narrowphase=self.sphere_tree)
 
-        # Store all components in one list, for us to access them later
-        self.components = [tank]
-        self.creatures = []
+        # Store all components in one registry, for us to access them later
+        self.registry = EntityRegistry(("static", "creatures", "food"))
+        self.registry.add(tank, "static")
+        self.components = self.registry.everything
+        self.creatures = self.registry.pool("creatures")
+        self.food = self.registry.pool("food")
+        self.lifecycle = LifecycleQueue()
+        self.food_cloud = FoodParticleCloud(parent, self.food_particles)
+        # joints of all creatures swing together in one vectorized step, and every pose is compiled only once
+        self.joint_animator = JointAnimator()
+        self.pose_atlas = PoseAtlas()
+        self.addNewObjInTank(self.food_cloud)
         # Add five preys and  one predator
         self.addNewObjInTank(Prey(parent, Point(
             (-1.7+random.random()*3.4, -1.7+random.random()*3.4, -1.7+random.random()*3.4)), ColorType.BLUE))
@@ -55,64 +140,118 @@ class Vivarium(Component, Animation):
             (-1.7+random.random()*3.4, -1.7+random.random()*3.4, -1.7+random.random()*3.4)), ColorType.GREEN))
         self.addNewObjInTank(Prey(parent, Point(
             (-1.7+random.random()*3.4, -1.7+random.random()*3.4, -1.7+random.random()*3.4)), ColorType.PINK))
-        self.addNewObjInTank(Predator(parent, Point((-1.7 + random.random() * 3.4, -1.7 + random.random() * 3.4, -1.7 + random.random() * 3.4))))
+        self.addNewObjInTank(Predator(parent, Point(
+            (-1.7 + random.random() * 3.4, -1.7 + random.random() * 3.4, -1.7 + random.random() * 3.4))))
 
     # This function resets the vivarium
     def reset(self):
-        for c in self.creatures:
-            self.delObj(c)
-        self.creatures = []
-        self.addNewObjInTank(Prey(self.parent, Point(
+        for c in list(self.creatures) + list(self.food):
+            self.lifecycle.despawned(c)
+        self.food_particles.clear()
+        self.lifecycle.spawned(Prey(self.parent, Point(
             (-1.7 + random.random() * 3.4, -1.7 + random.random() * 3.4, -1.7 + random.random() * 3.4)),
                                   ColorType.BLUE))
-        self.addNewObjInTank(Prey(self.parent, Point(
+        self.lifecycle.spawned(Prey(self.parent, Point(
             (-1.7 + random.random() * 3.4, -1.7 + random.random() * 3.4, -1.7 + random.random() * 3.4)),
                                   ColorType.GREEN))
-        self.addNewObjInTank(Prey(self.parent, Point(
+        self.lifecycle.spawned(Prey(self.parent, Point(
             (-1.7 + random.random() * 3.4, -1.7 + random.random() * 3.4, -1.7 + random.random() * 3.4)),
                                   ColorType.PINK))
-        self.addNewObjInTank(Predator(self.parent, Point(
+        self.lifecycle.spawned(Predator(self.parent, Point(
             (-1.7 + random.random() * 3.4, -1.7 + random.random() * 3.4, -1.7 + random.random() * 3.4))))
-        self.update()
+        # reset happens between ticks, so the new scene is built right away
+        self.applyLifecycleEvents()
 
-    # This function adds a food to the vivarium
+    # This function adds a food to the vivarium, it shows up at the end of the next tick
     def add_food(self):
-        self.addNewObjInTank(Food(self.parent, Point((-1.8+random.random()*3.8, 1.8, -1.8+random.random()*3.8))))
+        self.lifecycle.spawned(Food(self.parent, Point((-1.8+random.random()*3.8, 1.8, -1.8+random.random()*3.8))))
+
+    # This function drops many food pellets at once, they are drawn together by food_cloud
+    def rain_food(self, count=1000):
+        self.food_particles.rain(count)
+
+    # This function changes the velocity of the water current, only the environment field is baked again
+    def set_current(self, velocity):
+        self.world.environment.updateSource(self.water_current, velocity=np.array(velocity, dtype=float))
+
+    # This function puts a rock into the vivarium
+    def add_rock(self, center, radius):
+        rock = Rock(self.parent, SphereObstacle(center, radius))
+        self.geometry.addObstacle(rock.obstacle)
+        self.world.environment.updateSource(self.obstacle_repulsion)
+        self.addNewObjInTank(rock)
         self.update()
+        return rock
 
     def animationUpdate(self):
         """
         Update all creatures in vivarium
         """
-        for c in self.components[::-1]:
-            if isinstance(c, EnvironmentObject):
-                if c.species_id == 1 or c.species_id == 0:
-                    if (c.vanish_flag):
-                        self.delObjInTank(c)
-                        self.update()
-            if isinstance(c, Animation):
-                c.animationUpdate()
+        # Move every creature in one vectorized step: steer all of them, resolve every touching pair once in the
+        # contact solver stage (bounce, eat) and write the outcomes back in bulk, then move them.
+        # Afterwards swing the joints of all creatures together and let each of them refresh its model
+        self.world.steer()
+        self.world.solveContacts()
+        self.world.integrate()
+        self.joint_animator.step()
+        self.kinematics.markDirty(self.joint_animator.joints)
+        self.kinematics.markDirty(self.creatures)
+        # whatever got eaten is removed at the end of the tick, who eats whom is decided by the species interaction
+        # table of the world
+        owners = self.world.owners
+        for eater, eaten in zip(self.world.solver.eaters.tolist(), self.world.solver.eaten.tolist()):
+            self.lifecycle.eaten(owners[eaten], owners[eater])
+        for c in self.world.vanishedOwners():
+            self.lifecycle.despawned(c)
+        # sleeping objects (e.g. food lying on the floor) keep their compiled model until something wakes them
+        for c in self.world.awakeOwners():
+            c.animationUpdate()
+        self.food_cloud.animationUpdate()
+        self.applyLifecycleEvents()
 
-    def delObjInTank(self, obj):
-        if isinstance(obj, Component):
-            self.tank.children.remove(obj)
-            self.components.remove(obj)
-            self.creatures.remove(obj)
-            del obj
+    def applyLifecycleEvents(self):
+        """
+        Add and remove all objects spawned, despawned or eaten since the last call, then refresh the scene once
+
+        :return: None
+        """
+        if len(self.lifecycle) == 0:
+            return
+        self.lifecycle.flush(self.addNewObjInTank, self.delObjInTank)
+        self.update()
 
-    # A delete function specifically called in reset()
-    def delObj(self, obj):
-        if isinstance(obj, Component):
+    def delObjInTank(self, obj):
+        if obj in self.tank.children:
             self.tank.children.remove(obj)
-            self.components.remove(obj)
-            del obj
+        self.registry.remove(obj)
+        if isinstance(obj, WorldRowView) and obj.world is self.world:
+            self.world.remove(obj)
+        if getattr(obj, "joint_animator", None) is self.joint_animator:
+            self.joint_animator.remove(obj)
+        if obj in self.sphere_tree:
+            self.sphere_tree.remove(obj)
+        if obj in self.kinematics:
+            self.kinematics.remove(obj)
+        del obj
 
     def addNewObjInTank(self, newComponent):
         if isinstance(newComponent, Component):
             self.tank.addChild(newComponent)
-            self.components.append(newComponent)
+        if isinstance(newComponent, Food):
+            self.registry.add(newComponent, "food")
+        elif isinstance(newComponent, EnvironmentObject) and newComponent.species_id >= 0:
+            self.registry.add(newComponent, "creatures")
+        else:
+            self.registry.add(newComponent, "static")
         if isinstance(newComponent, EnvironmentObject):
-            if newComponent.species_id >= 0:
-                self.creatures.append(newComponent)
+            if newComponent.species_id >= 0 and isinstance(newComponent, WorldRowView):
+                self.world.add(newComponent)
+            if getattr(newComponent, "rotation_speed", None) is not None:
+                self.joint_animator.add(newComponent, newComponent.components,
+                                        [speed[0] for speed in newComponent.rotation_speed])
+            if getattr(newComponent, "pose_archetype", None) is not None:
+                newComponent.pose_atlas = self.pose_atlas
+                self.kinematics.add(newComponent)
+                self.sphere_tree.add(newComponent)
             # add environment components list reference to this new object's
             newComponent.env_obj_list = self.components
@@ -0,0 +1,939 @@
+"""
+Define the world state of our Vivarium here. Positions, velocities, bounding radii and species ids of every creature
+in the tank are stored as rows of contiguous numpy arrays (structure of arrays), so that one call of step advances
+all creatures together instead of running a Python loop inside each creature's animationUpdate.
+Predator, Prey and Food only keep a row index into these arrays, WorldRowView turns that row back into the familiar
+Point attributes so that rendering code keeps working.
+First version Created on 10/18/2026
+
+:author: Zack (Wanzhi Wang)
+:version: 2026.10.18
+"""
+import numpy as np
+
+from Point import Point
+from SpatialHashGrid import SpatialHashGrid, uniqueSorted
+from NeighborList import NeighborList
+from SpeciesInteractions import defaultInteractions
+from EnvironmentField import PointSource
+from ContinuousCollision import sweptSpheres, sweptWalls
+from ContactSolver import ContactSolver
+
+# species id used by our food chain, see defaultInteractions for how they interact
+FOOD = 0
+PREY = 1
+PREDATOR = 2
+
+
+class WorldState:
+    """
+    Keep the state of all creatures in numpy arrays and advance them in one vectorized step.
+
+    Only the first count rows of every array are in use. Rows are packed, removing a creature moves the last row into
+    the freed one, so indices of other creatures may change after a remove. Use the creature's world_index to find
+    its row.
+    """
+    count = 0  # int, number of rows in use
+    capacity = 0  # int, number of rows allocated
+    tank_dimensions = None  # list<float>(3)
+    up_vector = None  # numpy.ndarray(3)
+    interactions = None  # SpeciesInteractions, who eats, bounces off, is attracted to or repelled by whom
+    potentials = None  # PotentialField, steering kernels between species
+    flocking = None  # Flocking, Boids rules of flocking species
+    pursuit = None  # Pursuit, species chasing their nearest prey found with a KD-tree
+    geometry = None  # SignedDistanceField, obstacles inside the tank
+    navigation = None  # Navigation, flow fields leading species around obstacles to their goals
+    behavior = None  # BehaviorScheduler, if given creatures decide their steering in time slices
+    narrowphase = None  # SphereTree, if given pairs touching by bounding radius are tested part by part
+    scheduler = None  # CollisionScheduler, if given collisions are handled as predicted events instead of sweeps
+    solver = None  # ContactSolver, decides bounce and eat outcomes of touching pairs
+    wall_hits = None  # tuple, wall hit times and axes reported by the scheduler for the current step
+    grid = None  # SpatialHashGrid, contact grid built in the last step
+    broadphase = None  # Broadphase, if given it replaces the contact grid
+    handle_rows = None  # numpy.ndarray, row index of every broadphase handle
+    neighbors = None  # NeighborList, interacting pairs shared by all behaviors in step
+    environment = None  # EnvironmentField, baked influences of walls, currents and food resting on the floor
+    baked_sources = None  # dict<int, PointSource>, field source of every baked row keyed by its stable id
+    sleeping = True  # bool, objects without cruise speed that came to rest fall asleep
+    particles = None  # FoodParticles, pellets simulated outside of the rows, eaten by and attracting creatures
+    particle_eaters = None  # numpy.ndarray, rows of creatures that ate a pellet in the last step, one entry per pellet
+
+    positions = None  # numpy.ndarray(capacity, 3)
+    velocities = None  # numpy.ndarray(capacity, 3)
+    radii = None  # numpy.ndarray(capacity)
+    species = None  # numpy.ndarray(capacity), int
+    cruise_speeds = None  # numpy.ndarray(capacity), 0 means speed is not normalized (e.g. food sinking)
+    vanished = None  # numpy.ndarray(capacity), bool
+    baked = None  # numpy.ndarray(capacity), bool, rows whose potential is baked into the environment field
+    asleep = None  # numpy.ndarray(capacity), bool, resting rows skipped by steering and integration until woken
+    decisions = None  # numpy.ndarray(capacity, 3), steering of the last decision, used between decisions
+    undecided = None  # numpy.ndarray(capacity), bool, rows that never decided yet
+    orientations = None  # numpy.ndarray(capacity, 4, 4), facing direction of creatures as pre-rotation matrices
+    forward_axes = None  # numpy.ndarray(capacity), int, row of the orientation matrix holding the forward direction
+    proxies = None  # numpy.ndarray(capacity), broadphase handle of every row
+    ids = None  # numpy.ndarray(capacity), stable id of every row, ids are never reused
+    next_id = 0  # int
+
+    contacts = None  # set<tuple<int, int>>, ids of pairs whose bounding spheres touched after the last step
+    contact_began = None  # tuple of two numpy.ndarray, rows of pairs that started touching in the last step
+    contact_ended = None  # list<tuple<int, int>>, ids of pairs that stopped touching in the last step
+    owners = None  # list<WorldRowView>, owner object of every row
+
+    def __init__(self, tank_dimensions, capacity=64, broadphase=None, neighbor_skin=0.0, potentials=None,
+                 environment=None, flocking=None, scheduler=None, solver=None, interactions=None, sleeping=True,
+                 particles=None, pursuit=None, geometry=None, navigation=None, behavior=None,
+                 narrowphase=None, neighbor_stages=1):
+        """
+        :param tank_dimensions: size of the tank along x, y and z. The tank is centered at origin
+        :type tank_dimensions: list
+        :param capacity: initial number of rows to allocate, arrays grow automatically
+        :type capacity: int
+        :param broadphase: structure used to find colliding pairs. If not given, a spatial hash grid is rebuilt
+            whenever the neighbor list is built. Its margin should be at least half of neighbor_skin
+        :type broadphase: Broadphase
+        :param neighbor_skin: skin of the neighbor list, the list is rebuilt once a creature moved half of it
+        :type neighbor_skin: float
+        :param potentials: steering kernels between species, by default the attractions and repulsions of
+            interactions
+        :type potentials: PotentialField
+        :param environment: precomputed field sampled by all creatures every step. If given, food that came to rest
+            is baked into it instead of being paired with every creature around it
+        :type environment: EnvironmentField
+        :param flocking: Boids rules, their neighbors are collected into the shared neighbor list
+        :type flocking: Flocking
+        :param scheduler: event queue of predicted collisions. Good for sparse tanks where most ticks have no contact,
+            since only objects whose velocity changed are predicted again
+        :type scheduler: CollisionScheduler
+        :param solver: contact solver deciding the outcome of touching pairs
+        :type solver: ContactSolver
+        :param interactions: species interaction table, by default the food chain of defaultInteractions
+        :type interactions: SpeciesInteractions
+        :param sleeping: let objects without cruise speed fall asleep once they rested for a whole tick. Sleeping
+            objects are not moved until something moving comes within contact range
+        :type sleeping: bool
+        :param particles: food pellets kept as a particle system. Creatures steer toward them with the kernels of
+            their species and eat them like objects of that species
+        :type particles: FoodParticles
+        :param pursuit: pursuit rules, chasing species steer toward explicitly chosen nearest prey. Pairs chased this
+            way should not also have a potential kernel in interactions
+        :type pursuit: Pursuit
+        :param geometry: signed distance field of static obstacles. Objects reaching into an obstacle are pushed out
+            after moving, creatures bounce off it and other objects slide along it
+        :type geometry: SignedDistanceField
+        :param navigation: navigation rules, their goal objects are looked up in the rows and the particles
+        :type navigation: Navigation
+        :param behavior: update rates of species. Creatures only decide their steering in their time slice and keep
+            steering with their last decision in between, positions still move every step
+        :type behavior: BehaviorScheduler
+        :param narrowphase: per part bounding volumes. Pairs whose bounding spheres touch only bounce or eat once
+            their parts touch. Used when collisions are swept, i.e. without a scheduler
+        :type narrowphase: SphereTree
+        :param neighbor_stages: number of ticks a rebuild of the neighbor list is spread over, so that no single tick
+            pays for a whole rebuild. Rebuilds start that many ticks before the list runs out
+        :type neighbor_stages: int
+        """
+        self.tank_dimensions = tank_dimensions
+        self.broadphase = broadphase
+        self.neighbors = NeighborList(self._interactionPairs, neighbor_skin, self._pairStages, neighbor_stages)
+        self.interactions = defaultInteractions(FOOD, PREY, PREDATOR) if interactions is None else interactions
+        self.potentials = self.interactions.potentialField() if potentials is None else potentials
+        self.environment = environment
+        self.flocking = flocking
+        self.scheduler = scheduler
+        self.solver = ContactSolver() if solver is None else solver
+        self.wall_hits = (None, None)
+        self.baked_sources = {}
+        self.sleeping = sleeping
+        self.particles = particles
+        self.pursuit = pursuit
+        self.geometry = geometry
+        self.navigation = navigation
+        self.behavior = behavior
+        self.narrowphase = narrowphase
+        self.particle_eaters = np.zeros(0, dtype=np.int64)
+        self.handle_rows = np.zeros(0, dtype=np.int64)
+        self.next_id = 0
+        self.contacts = set()
+        self.contact_began = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        self.contact_ended = []
+        self.up_vector = np.array([0.0, 1.0, 0.0])
+        self.count = 0
+        self.capacity = 0
+        self.owners = []
+        self._allocate(max(1, capacity))
+
+    def _allocate(self, capacity):
+        """
+        Allocate arrays with the given capacity and copy rows in use into them
+        """
+        n = self.count
+        positions = np.zeros((capacity, 3))
+        velocities = np.zeros((capacity, 3))
+        radii = np.zeros(capacity)
+        species = np.zeros(capacity, dtype=np.int64)
+        cruise_speeds = np.zeros(capacity)
+        vanished = np.zeros(capacity, dtype=bool)
+        baked = np.zeros(capacity, dtype=bool)
+        asleep = np.zeros(capacity, dtype=bool)
+        decisions = np.zeros((capacity, 3))
+        undecided = np.zeros(capacity, dtype=bool)
+        orientations = np.tile(np.identity(4), (capacity, 1, 1))
+        forward_axes = np.zeros(capacity, dtype=np.int64)
+        proxies = np.full(capacity, -1, dtype=np.int64)
+        ids = np.full(capacity, -1, dtype=np.int64)
+        if n > 0:
+            positions[:n] = self.positions[:n]
+            velocities[:n] = self.velocities[:n]
+            radii[:n] = self.radii[:n]
+            species[:n] = self.species[:n]
+            cruise_speeds[:n] = self.cruise_speeds[:n]
+            vanished[:n] = self.vanished[:n]
+            baked[:n] = self.baked[:n]
+            asleep[:n] = self.asleep[:n]
+            decisions[:n] = self.decisions[:n]
+            undecided[:n] = self.undecided[:n]
+            orientations[:n] = self.orientations[:n]
+            forward_axes[:n] = self.forward_axes[:n]
+            proxies[:n] = self.proxies[:n]
+            ids[:n] = self.ids[:n]
+        self.positions = positions
+        self.velocities = velocities
+        self.radii = radii
+        self.species = species
+        self.cruise_speeds = cruise_speeds
+        self.vanished = vanished
+        self.baked = baked
+        self.asleep = asleep
+        self.decisions = decisions
+        self.undecided = undecided
+        self.orientations = orientations
+        self.forward_axes = forward_axes
+        self.proxies = proxies
+        self.ids = ids
+        self.capacity = capacity
+
+    def add(self, obj):
+        """
+        Move the state of an object into a new row and bind the object to that row.
+
+        :param obj: object to add, its local position, speed, radius, species id and cruise speed are copied
+        :type obj: WorldRowView
+        :return: row index of the object
+        :rtype: int
+        """
+        if obj.world is not None:
+            raise ValueError("object already lives in a world state")
+        if self.count == self.capacity:
+            self._allocate(self.capacity * 2)
+        i = self.count
+        self.positions[i] = obj.current_position.coords
+        self.velocities[i] = obj.translation_speed.coords
+        self.radii[i] = obj.bound_radius
+        self.species[i] = obj.species_id
+        self.cruise_speeds[i] = obj.cruise_speed
+        self.vanished[i] = obj.vanish_flag
+        self.baked[i] = False
+        self.asleep[i] = False
+        self.decisions[i] = 0
+        self.undecided[i] = True
+        self.orientations[i] = obj.pre_rotation_matrix
+        self.forward_axes[i] = obj.forward_axis
+        self.ids[i] = self.next_id
+        self.next_id += 1
+        if self.broadphase is not None:
+            self.proxies[i] = self.broadphase.insert(self.positions[i], self.radii[i])
+            self._setHandleRow(self.proxies[i], i)
+        self.owners.append(obj)
+        self.count += 1
+        self.neighbors.invalidate()
+        obj.bindWorldRow(self, i)
+        return i
+
+    def remove(self, obj):
+        """
+        Remove the row of an object. The last row is moved into the freed one to keep rows packed.
+        The object keeps a local copy of its last state.
+
+        :param obj: object to remove
+        :type obj: WorldRowView
+        :return: None
+        """
+        if obj.world is not self:
+            raise ValueError("object does not live in this world state")
+        i = obj.world_index
+        obj.unbindWorldRow()
+        if self.broadphase is not None:
+            self.broadphase.remove(int(self.proxies[i]))
+        if self.baked[i]:
+            self.environment.removeSource(self.baked_sources.pop(int(self.ids[i])))
+        removed = int(self.ids[i])
+        self.contacts = {pair for pair in self.contacts if removed not in pair}
+        last = self.count - 1
+        if i != last:
+            self.positions[i] = self.positions[last]
+            self.velocities[i] = self.velocities[last]
+            self.radii[i] = self.radii[last]
+            self.species[i] = self.species[last]
+            self.cruise_speeds[i] = self.cruise_speeds[last]
+            self.vanished[i] = self.vanished[last]
+            self.baked[i] = self.baked[last]
+            self.asleep[i] = self.asleep[last]
+            self.decisions[i] = self.decisions[last]
+            self.undecided[i] = self.undecided[last]
+            self.orientations[i] = self.orientations[last]
+            self.forward_axes[i] = self.forward_axes[last]
+            self.proxies[i] = self.proxies[last]
+            self.ids[i] = self.ids[last]
+            if self.broadphase is not None:
+                self._setHandleRow(self.proxies[i], i)
+            self.owners[i] = self.owners[last]
+            self.owners[i].world_index = i
+        self.owners.pop()
+        self.count -= 1
+        self.grid = None
+        self.neighbors.invalidate()
+
+    def vanishedOwners(self):
+        """
+        :return: objects whose vanish flag is set, e.g. eaten in the last step
+        :rtype: list<WorldRowView>
+        """
+        return [self.owners[i] for i in np.flatnonzero(self.vanished[:self.count])]
+
+    def awakeOwners(self):
+        """
+        :return: objects that are neither asleep nor vanished, only these need their model refreshed
+        :rtype: list<WorldRowView>
+        """
+        n = self.count
+        return [self.owners[i] for i in np.flatnonzero(~self.asleep[:n] & ~self.vanished[:n])]
+
+    def _setHandleRow(self, handle, row):
+        if handle >= len(self.handle_rows):
+            grown = np.full(max(2 * len(self.handle_rows), handle + 1), -1, dtype=np.int64)
+            grown[:len(self.handle_rows)] = self.handle_rows
+            self.handle_rows = grown
+        self.handle_rows[handle] = row
+
+    def step(self, dt=1.0):
+        """
+        Advance all creatures by one tick: steer, solveContacts and integrate, all done on whole arrays.
+
+        :param dt: length of the step in ticks. Steering is applied once per step, motion is velocity * dt.
+            Collisions are swept over the whole motion, so larger steps do not miss eats or bounces
+        :type dt: float
+        :return: None
+        """
+        self.steer(dt)
+        self.solveContacts(dt)
+        self.integrate(dt)
+
+    def steer(self, dt=1.0):
+        """
+        First stage of a tick: potential steering, environment field, flocking and speed normalization
+
+        :param dt: length of the step in ticks
+        :return: None
+        """
+        n = self.count
+        if n == 0:
+            return
+        pos = self.positions[:n]
+        vel = self.velocities[:n]
+        species = self.species[:n]
+        cruise = self.cruise_speeds[:n]
+        baked = self.baked[:n]
+
+        # All behaviors below pick their pairs from the shared neighbor list. Steering rarely changes the speed of
+        # an object, so the list is built to cover the motion at the speed it will have after normalization
+        i, j = self.neighbors.update(pos, vel * (_cruiseScale(vel, cruise) * dt)[:, None])
+        d = self.neighbors.d
+        dist2 = self.neighbors.dist2
+
+        # With a behavior scheduler only creatures in their time slice decide. Pairs without any of them are dropped,
+        # the others steer with their last decision
+        active = None
+        decide = slice(None)
+        steering = vel
+        if self.behavior is not None:
+            active = self.behavior.select(self.ids[:n], species, pos) | self.undecided[:n]
+            keep = active[i] | active[j]
+            i, j, d, dist2 = i[keep], j[keep], d[keep], dist2[keep]
+            decide = np.flatnonzero(active)
+            steering = np.zeros((n, 3))
+
+        # Potential functions: creatures steer toward or away from other species
+        if self.potentials.theta is None:
+            steering += self.potentials.forces(n, i, j, d, dist2, species, baked)
+        else:
+            steering[decide] += self.potentials.forcesBarnesHut(pos, species, baked)[decide]
+        if self.particles is not None and self.particles.count > 0:
+            for (target, source), kernel in self.potentials.kernels.items():
+                targets = species == target
+                if active is not None:
+                    targets &= active
+                targets = np.flatnonzero(targets)
+                if source == self.particles.species and len(targets) > 0:
+                    steering[targets] += self.particles.tree().forces(pos[targets], kernel, self.particles.theta)
+        if self.environment is not None:
+            steering[decide] += self.environment.sample(pos[decide], species[decide])
+        if self.flocking is not None:
+            steering += self.flocking.steer(n, i, j, d, dist2, species, vel)
+        if self.pursuit is not None:
+            steering += self.pursuit.steer(pos, species, self.vanished[:n], active)
+        if self.navigation is not None:
+            steering += self.navigation.steer(pos, species, self._goalPositions, active)
+        if active is not None:
+            self.decisions[decide] = steering[decide]
+            self.undecided[:n] = False
+            vel += self.decisions[:n]
+
+        # Creatures swim with a fixed speed, objects without cruise speed keep their own speed
+        vel *= _cruiseScale(vel, cruise)[:, None]
+        vel[self.asleep[:n]] = 0
+
+    def _goalPositions(self, goal_species):
+        """
+        :param goal_species: species ids of goal objects
+        :type goal_species: tuple<int>
+        :return: positions of all objects and pellets of these species that have not vanished
+        :rtype: numpy.ndarray(m, 3)
+        """
+        n = self.count
+        points = [self.positions[:n][np.isin(self.species[:n], goal_species) & ~self.vanished[:n]]]
+        if self.particles is not None and self.particles.species in goal_species:
+            points.append(self.particles.positions[:self.particles.count])
+        return np.concatenate(points)
+
+    def solveContacts(self, dt=1.0):
+        """
+        Second stage of a tick: collect all pairs touching during the motion of this step once, by sweeping every
+        listed pair or from due events if there is a scheduler, then let the contact solver resolve them
+
+        :param dt: length of the step in ticks
+        :return: None
+        """
+        n = self.count
+        self.solver.clear()
+        self.wall_hits = (None, None)
+        self.particle_eaters = np.zeros(0, dtype=np.int64)
+        if n == 0:
+            return
+        pos = self.positions[:n]
+        vel = self.velocities[:n]
+        i, j = self.neighbors.sweep(pos, vel * dt)
+        self._wake(i, j, dt)
+        if self.scheduler is None:
+            # the list reaches far beyond touching distance for steering, so pairs that cannot close the gap even
+            # with the two largest spheres moving at the top speed are dropped before the exact sweep
+            radii = self.radii[:n]
+            reach = 2 * (float(radii.max()) + float(np.sqrt(np.max(np.einsum("ij,ij->i", vel, vel)))) * dt)
+            near = np.flatnonzero(self.neighbors.dist2 <= reach * reach)
+            i, j = np.take(i, near), np.take(j, near)
+            d = np.take(self.neighbors.d, near, axis=0)
+            dv = (np.take(vel, j, axis=0) - np.take(vel, i, axis=0)) * dt
+            toi = sweptSpheres(d, dv, radii[i] + radii[j])
+            touching = np.isfinite(toi)
+            i, j, d, dv, toi = i[touching], j[touching], d[touching], dv[touching], toi[touching]
+            if self.narrowphase is not None:
+                touching, toi = self.narrowphase.narrowPhase(self, i, j, d, dv, toi)
+                i, j, d, dv, toi = i[touching], j[touching], d[touching], dv[touching], toi[touching]
+            began = self._trackContacts(i, j)
+        else:
+            half = np.asarray(self.tank_dimensions, dtype=float) / 2
+            (i, j, toi), ended, self.wall_hits = self.scheduler.collect(self.neighbors, pos, vel, self.radii[:n],
+                                                                        half, dt)
+            d = pos[j] - pos[i]
+            dv = (vel[j] - vel[i]) * dt
+            began = self._applyContactEvents(i, j, *ended)
+        self.solver.solve(self, i, j, d, dv, toi, began)
+        if self.particles is not None:
+            self._eatParticles(dt)
+
+    def _eatParticles(self, dt):
+        """
+        Let every creature that eats the species of the pellets eat the pellets it touches during this step
+        """
+        n = self.count
+        food = self.particles.species
+        size = max(self.interactions.speciesCount(), int(np.max(self.species[:n])) + 1, food + 1)
+        eats = self.interactions.eatMatrix(size)[:, food]
+        rows = np.flatnonzero(eats[self.species[:n]] & ~self.vanished[:n])
+        eaters = self.particles.eat(self.positions[rows], self.velocities[rows] * dt, self.radii[rows])
+        self.particle_eaters = rows[eaters]
+
+    def integrate(self, dt=1.0):
+        """
+        Last stage of a tick: move everything, with bounces decided by the contact solver and tank walls resolved at
+        their time of impact, then update facing directions
+
+        :param dt: length of the step in ticks
+        :return: None
+        """
+        n = self.count
+        if n == 0:
+            return
+        solver = self.solver
+        cruising = self.cruise_speeds[:n] > 0
+        resting = ~cruising & ~np.any(self.velocities[:n], axis=1)
+        self._advance(solver.bounce_i, solver.bounce_j, solver.bounce_d, solver.bounce_dv, solver.bounce_toi,
+                      cruising, dt, *self.wall_hits)
+        if self.scheduler is not None:
+            self.scheduler.advance(dt)
+        if self.geometry is not None:
+            awake = np.flatnonzero(~self.asleep[:n])
+            pos = self.positions[awake]
+            vel = self.velocities[awake]
+            self.geometry.collide(pos, vel, self.radii[awake], cruising[awake])
+            self.positions[awake] = pos
+            self.velocities[awake] = vel
+        if self.particles is not None:
+            self.particles.step(dt, self.geometry)
+        vel = self.velocities[:n]
+        self._orient(np.flatnonzero(cruising & (np.linalg.norm(vel, axis=1) > 0)))
+        if self.sleeping:
+            # rows that did not move during the whole step keep their state until something wakes them
+            self.asleep[:n] |= resting & ~np.any(vel, axis=1) & ~self.vanished[:n]
+        self._bakeResting()
+
+    def _wake(self, i, j, dt):
+        """
+        Wake sleeping rows that something moving can touch during this step
+
+        :param i: rows of first objects of listed pairs
+        :param j: rows of second objects of listed pairs
+        :param dt: length of the step in ticks
+        """
+        n = self.count
+        asleep = self.asleep[:n]
+        if not np.any(asleep):
+            return
+        moving = np.any(self.velocities[:n], axis=1)
+        candidates = np.flatnonzero((asleep[i] & moving[j]) | (asleep[j] & moving[i]))
+        if len(candidates) == 0:
+            return
+        i, j = i[candidates], j[candidates]
+        dv = self.velocities[j] - self.velocities[i]
+        reach = self.radii[i] + self.radii[j] + np.linalg.norm(dv, axis=1) * dt
+        close = self.neighbors.dist2[candidates] <= reach * reach
+        rows = np.unique(np.concatenate((i[close], j[close])))
+        rows = rows[asleep[rows]]
+        if len(rows) == 0:
+            return
+        asleep[rows] = False
+        # a woken row may start moving again, so its potential is no longer baked
+        for row in rows[self.baked[rows]].tolist():
+            self.environment.removeSource(self.baked_sources.pop(int(self.ids[row])))
+        if np.any(self.baked[rows]):
+            self.baked[rows] = False
+            self.neighbors.invalidate()
+
+    def _bakeResting(self):
+        """
+        Food that stopped moving no longer changes its potential, so it is baked into the environment field once
+        and dropped from the potential pairs. With sleeping enabled only sleeping food is baked
+        """
+        if self.environment is None:
+            return
+        n = self.count
+        resting = self.asleep[:n] if self.sleeping else ~np.any(self.velocities[:n], axis=1)
+        rows = np.flatnonzero((self.species[:n] == FOOD) & ~self.baked[:n] & resting)
+        if len(rows) == 0:
+            return
+        kernels = {t: k for (t, s), k in self.potentials.kernels.items() if s == FOOD}
+        for row in rows:
+            source = PointSource(self.positions[row], kernels)
+            self.environment.addSource(source)
+            self.baked_sources[int(self.ids[row])] = source
+        self.baked[rows] = True
+        self.neighbors.invalidate()
+
+    def _interactionPairs(self, extra=0.0):
+        """
+        Collect all pairs (i, j) that are within their interaction range plus extra: bounding spheres closer than
+        extra for collisions, kernel cutoff plus extra for species with a potential between them, and perception
+        plus extra for flocking species. In Barnes-Hut mode potentials do not use pairs.
+        Collision candidates come from the broadphase if there is one and its margin covers extra, otherwise from a
+        spatial hash grid.
+
+        :param extra: extra distance added to every interaction range
+        :type extra: float
+        :return: two arrays of row indices, every pair reported once
+        """
+        return next(self._pairStages(extra, 1))
+
+    def _pairStages(self, extra, parts):
+        """
+        Do the work of _interactionPairs in parts, so that a rebuild of the neighbor list can be spread over several
+        ticks. All grids are built from a copy of the positions in the first part, and every other part searches
+        pairs from its own share of the query points, so the parts together find the same pairs as a single build at
+        the tick the first part ran.
+
+        :param extra: extra distance added to every interaction range
+        :type extra: float
+        :param parts: number of parts
+        :type parts: int
+        :return: generator yielding None after every part but the last one, which yields the pairs
+        """
+        n = self.count
+        pos = self.positions[:n].copy()
+        radii = self.radii[:n]
+        species = self.species[:n]
+        first = []
+        second = []
+        # every search is (grid, radius, rows of the query points, rows of the stored points). Without query rows the
+        # stored points search among themselves and every pair is found once
+        searches = []
+        inflated = None
+        if self.broadphase is not None and extra <= 2 * self.broadphase.margin:
+            self.broadphase.refit(self.proxies[:n], pos, radii)
+            a, b = self.broadphase.candidatePairs()
+            ci = self.handle_rows[a]
+            cj = self.handle_rows[b]
+            d = pos[cj] - pos[ci]
+            reach = radii[ci] + radii[cj] + extra
+            close = np.einsum("ij,ij->i", d, d) <= reach * reach
+            first.append(ci[close])
+            second.append(cj[close])
+        else:
+            inflated = radii + extra / 2
+            self.grid = SpatialHashGrid(self.tank_dimensions,
+                                        SpatialHashGrid.cellSizeFor(self.tank_dimensions, inflated))
+            self.grid.build(pos)
+
+        # Potential and flocking pairs, sources seen by every steered species are put in their own grid
+        covered = np.zeros(0, dtype=np.int64)
+        queries = []
+        if self.potentials.theta is None:
+            queries += [(t, self.potentials.sources(t), self.potentials.cutoff(t), ~self.baked[:n])
+                        for t in self.potentials.targets()]
+        if self.flocking is not None:
+            queries += [(t, seen, reach, True) for t, seen, reach in self.flocking.ranges()]
+        for target, seen, cutoff, usable in queries:
+            reach = cutoff + extra
+            targets = np.flatnonzero(species == target)
+            sources = np.flatnonzero(np.isin(species, seen) & usable)
+            if len(targets) == 0 or len(sources) == 0:
+                continue
+            grid = SpatialHashGrid(self.tank_dimensions, reach)
+            if len(sources) == len(targets) and np.array_equal(sources, targets):
+                # a species seeing only itself, e.g. a flock, every pair is found once from half of the cells
+                grid.build(pos[sources])
+                searches.append((grid, reach, None, sources))
+                if inflated is not None and len(sources) > len(covered) and \
+                        reach >= 2 * float(np.max(inflated[sources])):
+                    covered = sources
+            elif len(targets) <= len(sources):
+                grid.build(pos[sources])
+                searches.append((grid, reach, targets, sources))
+            else:
+                # pairs are symmetric, so the fewer sources look around themselves in a grid of the targets
+                grid.build(pos[targets])
+                searches.append((grid, reach, sources, targets))
+
+        if inflated is not None:
+            # touching pairs among the rows of the largest search reaching that far are found by it already, so
+            # only the other rows look for their touching pairs, with the reach of the largest of them
+            others = np.setdiff1d(np.arange(n), covered, assume_unique=True)
+            if len(covered) == 0:
+                searches.append((self.grid, inflated, None, np.arange(n)))
+            elif len(others) > 0:
+                searches.append((self.grid, float(np.max(inflated[others]) + np.max(inflated)), others, np.arange(n)))
+
+        # building the grids takes about as long as a share of the searches, so it is a part of its own
+        shares = parts
+        if parts > 1:
+            shares -= 1
+            yield None
+        for part in range(shares):
+            for grid, radius, query_rows, stored_rows in searches:
+                size = len(stored_rows) if query_rows is None else len(query_rows)
+                share = np.arange(part * size // shares, (part + 1) * size // shares)
+                if query_rows is None:
+                    if np.ndim(radius) > 0:
+                        a, b = grid.selfPairs(radius, share)
+                    else:
+                        a, b = grid.pairsWithin(radius, share)
+                    first.append(np.take(stored_rows, a))
+                else:
+                    q, b = grid.queryBatch(np.take(pos, np.take(query_rows, share), axis=0), radius)
+                    first.append(np.take(query_rows, np.take(share, q)))
+                second.append(np.take(stored_rows, b))
+            if part < shares - 1:
+                yield None
+
+        first = np.concatenate(first)
+        second = np.concatenate(second)
+        distinct = np.flatnonzero(first != second)
+        first, second = np.take(first, distinct), np.take(second, distinct)
+        keys = uniqueSorted(np.minimum(first, second) * n + np.maximum(first, second))
+        first = keys // n
+        yield first, keys - first * n
+
+    def _trackContacts(self, i, j):
+        """
+        Compare pairs touching now with pairs touching after the last step and record contact begin/end events
+
+        :param i: rows of first objects of touching pairs
+        :param j: rows of second objects of touching pairs
+        :return: bool mask of pairs that started touching
+        """
+        ids_i = self.ids[i]
+        ids_j = self.ids[j]
+        keys = list(zip(np.minimum(ids_i, ids_j).tolist(), np.maximum(ids_i, ids_j).tolist()))
+        new = np.array([key not in self.contacts for key in keys], dtype=bool)
+        current = set(keys)
+        self.contact_began = (i[new], j[new])
+        self.contact_ended = list(self.contacts - current)
+        self.contacts = current
+        return new
+
+    def _applyContactEvents(self, enter_i, enter_j, exit_i, exit_j):
+        """
+        Record contact begin/end events reported by the scheduler
+
+        :param enter_i: rows of first objects of pairs starting to touch
+        :param enter_j: rows of second objects of pairs starting to touch
+        :param exit_i: rows of first objects of pairs no longer touching
+        :param exit_j: rows of second objects of pairs no longer touching
+        :return: bool mask of entering pairs that were not touching before
+        """
+        ids_i = self.ids[enter_i]
+        ids_j = self.ids[enter_j]
+        keys = list(zip(np.minimum(ids_i, ids_j).tolist(), np.maximum(ids_i, ids_j).tolist()))
+        new = np.array([key not in self.contacts for key in keys], dtype=bool)
+        self.contacts.update(keys)
+        self.contact_began = (enter_i[new], enter_j[new])
+        ids_i = self.ids[exit_i]
+        ids_j = self.ids[exit_j]
+        ended = set(zip(np.minimum(ids_i, ids_j).tolist(), np.maximum(ids_i, ids_j).tolist())) & self.contacts
+        self.contacts -= ended
+        self.contact_ended = list(ended)
+        return new
+
+    def queryRadius(self, point, radius):
+        """
+        Find creatures around a point with the broadphase, or the grid built in the last step
+
+        :param point: center of the query
+        :param radius: query radius
+        :type radius: float
+        :return: objects within radius of point
+        :rtype: list
+        """
+        point = np.asarray(point, dtype=float)
+        if self.broadphase is not None:
+            handles = np.array(self.broadphase.query(point - radius, point + radius), dtype=np.int64)
+            rows = self.handle_rows[handles]
+            d = self.positions[rows] - point
+            return [self.owners[i] for i in rows[np.einsum("ij,ij->i", d, d) <= radius * radius]]
+        if self.grid is None:
+            return []
+        return [self.owners[i] for i in self.grid.queryRadius(point, radius)]
+
+    def _advance(self, i, j, d, dv, toi, cruising, dt, wall_time=None, walls=None):
+        """
+        Move every object to its earliest contact in this step, respond to it, and spend the rest of the step with
+        the new velocity. A creature bouncing off another one reflects its velocity about the plane whose normal
+        points to the other at the moment of contact, but only if it is moving toward it. At tank walls creatures
+        turn back and other objects (food) stop moving along the axis that would leave the tank.
+
+        :param i: rows of first creatures of bouncing pairs
+        :param j: rows of second creatures of bouncing pairs
+        :param d: positions[j] - positions[i] of every pair
+        :param dv: relative motion of every pair during the step
+        :param toi: time of impact of every pair as a fraction of the step
+        :param cruising: bool mask of rows that swim with a cruise speed
+        :param dt: length of the step in ticks
+        :param wall_time: first wall hit of every row as a fraction of the step, swept here if not given
+        :param walls: bool mask (count, 3) of walls hit at wall_time
+        """
+        n = self.count
+        pos = self.positions[:n]
+        vel = self.velocities[:n]
+        radii = self.radii[:n]
+        half = np.asarray(self.tank_dimensions, dtype=float) / 2
+        # sleeping rows do not move, they are left out of all sweeps. A slice picks all rows without copying them
+        awake = ~self.asleep[:n]
+        awake = slice(None) if np.all(awake) else np.flatnonzero(awake)
+
+        # earliest bounce of every creature, normals point from it to the other creature at the moment of contact
+        rows = np.concatenate((i, j))
+        t = np.concatenate((toi, toi))
+        contact = d + toi[:, None] * dv
+        normals = np.concatenate((contact, -contact))
+        facing = np.einsum("ij,ij->i", vel[rows], normals) > 0
+        rows, t, normals = rows[facing], t[facing], normals[facing]
+        order = np.lexsort((t, rows))
+        rows, t, normals = rows[order], t[order], normals[order]
+        first = np.ones(len(rows), dtype=bool)
+        first[1:] = rows[1:] != rows[:-1]
+        event = np.full(n, np.inf)
+        event[rows[first]] = t[first]
+        normal = np.zeros((n, 3))
+        normal[rows[first]] = _normalize(normals[first])
+
+        # walls hit before the earliest bounce win
+        remaining = np.zeros(n)
+        remaining[awake] = 1.0
+        if wall_time is None:
+            wall_time = np.full(n, np.inf)
+            walls = np.zeros((n, 3), dtype=bool)
+            wall_time[awake], walls[awake] = sweptWalls(pos[awake], vel[awake] * dt, radii[awake], half)
+        wall = wall_time <= event
+        event = np.minimum(event, wall_time)
+        hit = np.isfinite(event)
+        spent = np.where(hit, event, 1.0)[awake]
+        pos[awake] += vel[awake] * (spent * dt)[:, None]
+        remaining[awake] -= spent
+        bounce = np.flatnonzero(hit & ~wall)
+        ndv = np.einsum("ij,ij->i", vel[bounce], normal[bounce])
+        vel[bounce] -= 2 * ndv[:, None] * normal[bounce]
+        self._hitWalls(walls & (hit & wall)[:, None], cruising)
+
+        # the rest of the step may still run into walls, one pass per axis is enough
+        for _ in range(3):
+            moving = np.flatnonzero(remaining > 0)
+            if len(moving) == 0:
+                break
+            wall_time, walls = sweptWalls(pos[moving], vel[moving] * dt, radii[moving], half, remaining[moving])
+            spent = np.minimum(wall_time, remaining[moving])
+            pos[moving] += vel[moving] * (spent * dt)[:, None]
+            remaining[moving] -= spent
+            hit_walls = np.zeros((n, 3), dtype=bool)
+            hit_walls[moving] = walls
+            self._hitWalls(hit_walls, cruising)
+
+    def _hitWalls(self, walls, cruising):
+        """
+        :param walls: bool mask (count, 3) of walls touched by every row
+        :param cruising: bool mask of rows that swim with a cruise speed
+        """
+        vel = self.velocities[:self.count]
+        vel[walls & cruising[:, None]] *= -1
+        vel[walls & ~cruising[:, None]] = 0
+
+    def _orient(self, rows):
+        """
+        Rebuild facing direction of creatures, so they face the direction they are moving
+        """
+        if len(rows) == 0:
+            return
+        forward = _normalize(self.velocities[rows])
+        side = _normalize(np.cross(forward, self.up_vector))
+        up = _normalize(np.cross(forward, side))
+        # forward, side and up fill the rows cyclically starting at the forward row of every model, e.g.
+        # [forward, side, up] for the predator and [side, up, forward] for the prey
+        first = self.forward_axes[rows]
+        for k, axis in enumerate((forward, side, up)):
+            self.orientations[rows, (first + k) % 3, :3] = axis
+
+
+def _cruiseScale(velocities, cruise):
+    """
+    Factor that brings every velocity to its cruise speed, 1 for rows without cruise speed
+    """
+    norm = np.linalg.norm(velocities, axis=1)
+    return np.divide(cruise, norm, out=np.ones(len(norm)), where=(cruise > 0) & (norm > 0))
+
+
+def _normalize(vectors):
+    """
+    Normalize every row of vectors, zero rows stay zero
+    """
+    length = np.sqrt(np.einsum("ij,ij->i", vectors, vectors))[:, None]
+    return np.divide(vectors, length, out=np.zeros_like(vectors), where=length > 0)
+
+
+class WorldRowView:
+    """
+    Mixin that makes an EnvironmentObject a thin view onto a row of a WorldState.
+
+    Before the object is added to a world, its state lives in local attributes. Once bound, current_position,
+    translation_speed, pre_rotation_matrix and vanish_flag read and write the world arrays directly.
+    This class should be listed before Component in the bases so that its properties take priority.
+    """
+    world = None  # WorldState
+    world_index = -1  # int
+    cruise_speed = 0  # float
+    forward_axis = 0  # int, row of pre_rotation_matrix that holds the forward direction of the model
+
+    _local_position = None  # Point
+    _local_speed = None  # Point
+    _local_rotation = None  # numpy.ndarray(4, 4)
+    _local_vanish = False
+
+    def bindWorldRow(self, world, index):
+        """
+        Called by WorldState when this object moves into a row
+        """
+        self.world = world
+        self.world_index = index
+
+    def unbindWorldRow(self):
+        """
+        Called by WorldState when this object leaves its row, keep a local copy of its last state
+        """
+        i = self.world_index
+        self._local_position = Point(self.world.positions[i])
+        self._local_speed = Point(self.world.velocities[i])
+        self._local_rotation = self.world.orientations[i].copy()
+        self._local_vanish = bool(self.world.vanished[i])
+        self.world = None
+        self.world_index = -1
+
+    @property
+    def current_position(self):
+        if self.world is None:
+            return self._local_position
+        p = Point()
+        p.coords = self.world.positions[self.world_index]
+        return p
+
+    @current_position.setter
+    def current_position(self, pos):
+        if self.world is None:
+            self._local_position = pos
+        else:
+            self.world.positions[self.world_index] = pos.coords
+
+    @property
+    def translation_speed(self):
+        if self.world is None:
+            return self._local_speed
+        p = Point()
+        p.coords = self.world.velocities[self.world_index]
+        return p
+
+    @translation_speed.setter
+    def translation_speed(self, speed):
+        if self.world is None:
+            self._local_speed = speed
+        else:
+            self.world.velocities[self.world_index] = speed.coords
+
+    @property
+    def pre_rotation_matrix(self):
+        if self.world is None:
+            return self._local_rotation
+        return self.world.orientations[self.world_index]
+
+    @pre_rotation_matrix.setter
+    def pre_rotation_matrix(self, matrix):
+        if self.world is None:
+            self._local_rotation = matrix
+        else:
+            self.world.orientations[self.world_index] = matrix
+
+    @property
+    def vanish_flag(self):
+        if self.world is None:
+            return self._local_vanish
+        return bool(self.world.vanished[self.world_index])
+
+    @vanish_flag.setter
+    def vanish_flag(self, flag):
+        if self.world is None:
+            self._local_vanish = flag
+        else:
+            self.world.vanished[self.world_index] = flag